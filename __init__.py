@@ -6,6 +6,15 @@ Sep 16, 2021
 9:10:18 AM
 '''
 
-from .grib import GRead, GUnpack, GDownload
+from .grib import (
+    GRead,
+    GUnpack,
+    GDownload,
+    GSparseBands,
+    GHandlePool,
+    GCAStore,
+    GTransferCtrl)
 
-from .grib_to_nc import GTCConvert
+from .grib_to_nc import GTCConvert, GTCBatch, GTCMerge, GTCStore
+
+from .pipeline import GPipeline
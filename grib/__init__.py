@@ -9,3 +9,7 @@ Sep 16, 2021
 from .read import GRead
 from .unpack import GUnpack
 from .download import GDownload
+from .sparse import GSparseBands
+from .pool import GHandlePool
+from .cas import GCAStore
+from .transfer import GTransferCtrl
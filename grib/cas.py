@@ -0,0 +1,402 @@
+'''
+@author: Faizan3800X-Uni
+
+Oct 19, 2026
+
+4:41:26 PM
+'''
+import os
+import errno
+import shutil
+import hashlib
+import tempfile
+import contextlib
+from pathlib import Path
+
+try:
+    import fcntl
+
+except ImportError:
+    # On Windows. Reflinks are not tried then.
+    fcntl = None
+
+from ..misc import print_sl, print_el, lock_file
+
+
+class GCAStore:
+
+    '''
+    A content-addressed store of files that can be shared by many jobs
+    and users, on the same file system, to avoid downloading and unpacking
+    the same files many times.
+
+    Files are kept under keys. A key is made from strings that identify
+    the content of a file e.g. its URL and ETag or the hash of its input.
+    A file is served from the store by hardlinking it to the requested
+    path. If that is not possible, a reflink (copy-on-write clone) is
+    tried and then a normal copy.
+
+    Since served files may share their data with the store, they should
+    never be modified in place. Replace them instead (write to another
+    file and rename). GDownload and GUnpack do so.
+
+    Concurrent population of the same key is made safe by lock files.
+    The least recently used files are evicted when the total size of the
+    store exceeds the given limit. A file is evicted only while holding
+    its lock, and files whose locks are held are skipped.
+
+    Layout of the store directory:
+    1. objects/: The files, named by their keys.
+    2. access/: An empty file for each key whose modification time is the
+    last time the key was used. Kept separately so that the times of the
+    hardlinked files are not touched.
+    3. locks/: The lock files. They are kept, see misc.lock_file.
+    4. tmp/: Files being added.
+
+    Last updated on: 2026-Oct-19
+    '''
+
+    # Linux FICLONE ioctl request number.
+    _gcas_ficlone = 0x40049409
+
+    def __init__(self, store_dir, max_bytes=None, verbose=True):
+
+        assert isinstance(store_dir, (str, Path)), (
+            f'store_dir not of the data type string or Path!')
+
+        store_dir = Path(store_dir)
+
+        assert store_dir.exists(), f'store_dir does not exist!'
+
+        assert store_dir.is_dir(), f'store_dir is not a directory!'
+
+        if max_bytes is not None:
+            assert isinstance(max_bytes, int), f'max_bytes not an integer!'
+
+            assert max_bytes > 0, f'max_bytes must be greater than zero!'
+
+        assert isinstance(verbose, bool), (
+            f'verbose not of the boolean data type!')
+
+        self._vb = verbose
+
+        self._gcas_store_dir = store_dir
+        self._gcas_max_bytes = max_bytes
+
+        self._gcas_objs_dir = store_dir / 'objects'
+        self._gcas_acss_dir = store_dir / 'access'
+        self._gcas_lcks_dir = store_dir / 'locks'
+        self._gcas_temp_dir = store_dir / 'tmp'
+
+        for dir_path in (
+            self._gcas_objs_dir,
+            self._gcas_acss_dir,
+            self._gcas_lcks_dir,
+            self._gcas_temp_dir):
+
+            dir_path.mkdir(exist_ok=True)
+
+        return
+
+    @staticmethod
+    def make_key(*parts):
+
+        '''
+        Make a key from strings that identify the content of a file.
+
+        Parameters
+        ----------
+        parts : str
+            e.g. the URL and the ETag of a file.
+
+        Returns
+        -------
+        The key as a hexadecimal string.
+        '''
+
+        assert len(parts), f'No parts!'
+
+        assert all([isinstance(part, str) for part in parts]), (
+            f'All parts should be strings!')
+
+        return hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+
+    def has(self, key):
+
+        '''
+        Check if a file is in the store under key.
+        '''
+
+        return self._gcas_get_obj_path(key).exists()
+
+    def fetch(self, key, path_to_output):
+
+        '''
+        Serve the file under key at path_to_output, if it is in the store.
+        An existing file at path_to_output is replaced.
+
+        Parameters
+        ----------
+        key : str
+            The key of the file.
+        path_to_output : str or Path
+            Where to put the file. Its parent directory must exist.
+
+        Returns
+        -------
+        True if the file was in the store, False otherwise.
+        '''
+
+        assert isinstance(path_to_output, (str, Path)), (
+            f'path_to_output not of the data type string or Path!')
+
+        path_to_output = Path(path_to_output)
+
+        assert path_to_output.parents[0].exists(), (
+            f'Parent directory of path_to_output does not exist!')
+
+        obj_path = self._gcas_get_obj_path(key)
+
+        if not obj_path.exists():
+            return False
+
+        temp_path = _get_temp_path(
+            path_to_output.parents[0], f'{path_to_output.name}.gcas.')
+
+        try:
+            try:
+                _link_or_copy(obj_path, temp_path, self._gcas_ficlone)
+
+            except FileNotFoundError:
+                # Evicted in the meantime.
+                return False
+
+            os.replace(temp_path, path_to_output)
+
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(temp_path)
+
+        self._gcas_touch(key)
+
+        if self._vb:
+            print(f'INFO: Served {path_to_output.name} from the store.')
+
+        return True
+
+    def put(self, key, path_to_input):
+
+        '''
+        Add a file to the store under key. Nothing is done if the key
+        exists already. The least recently used files are evicted
+        afterwards, if the store is larger than its limit.
+
+        Parameters
+        ----------
+        key : str
+            The key of the file.
+        path_to_input : str or Path
+            The file to add. It is hardlinked, if possible, or copied.
+        '''
+
+        assert isinstance(path_to_input, (str, Path)), (
+            f'path_to_input not of the data type string or Path!')
+
+        path_to_input = Path(path_to_input)
+
+        assert path_to_input.is_file(), f'path_to_input is not a file!'
+
+        obj_path = self._gcas_get_obj_path(key)
+
+        if not obj_path.exists():
+            obj_path.parents[0].mkdir(exist_ok=True)
+
+            temp_path = _get_temp_path(self._gcas_temp_dir, f'{key}.')
+
+            try:
+                _link_or_copy(path_to_input, temp_path, self._gcas_ficlone)
+
+                os.replace(temp_path, obj_path)
+
+            finally:
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(temp_path)
+
+        self._gcas_touch(key)
+
+        self.evict()
+        return
+
+    @contextlib.contextmanager
+    def lock(self, key):
+
+        '''
+        A context manager that holds the lock of key, for other processes
+        as well. Use it around checking, populating and fetching a key so
+        that only one process populates it and that it is not evicted
+        meanwhile. See misc.lock_file.
+        '''
+
+        with lock_file(self._gcas_get_lock_path(key)):
+            yield
+
+        return
+
+    def evict(self):
+
+        '''
+        Remove the least recently used files till the total size of the
+        store is within its limit. Nothing is done if there is no limit.
+        '''
+
+        if self._gcas_max_bytes is None:
+            return
+
+        objs = []
+        tot_bytes = 0
+        for obj_path in self._gcas_objs_dir.glob('*/*'):
+            key = obj_path.name
+
+            try:
+                obj_size = obj_path.stat().st_size
+
+            except FileNotFoundError:
+                continue
+
+            try:
+                acss_time = (self._gcas_acss_dir / key).stat().st_mtime
+
+            except FileNotFoundError:
+                acss_time = 0.0
+
+            objs.append((acss_time, key, obj_path, obj_size))
+
+            tot_bytes += obj_size
+
+        if tot_bytes <= self._gcas_max_bytes:
+            return
+
+        if self._vb:
+            print_sl()
+
+            print(
+                f'Evicting from the store of {tot_bytes} bytes with a '
+                f'limit of {self._gcas_max_bytes} bytes...')
+
+        objs.sort()
+
+        n_evicted = 0
+        for acss_time, key, obj_path, obj_size in objs:
+            if tot_bytes <= self._gcas_max_bytes:
+                break
+
+            with lock_file(
+                self._gcas_get_lock_path(key), False) as lock_flag:
+
+                # Being populated or fetched.
+                if not lock_flag:
+                    continue
+
+                with contextlib.suppress(FileNotFoundError):
+                    obj_path.unlink()
+
+                with contextlib.suppress(FileNotFoundError):
+                    (self._gcas_acss_dir / key).unlink()
+
+            tot_bytes -= obj_size
+            n_evicted += 1
+
+        if self._vb:
+            print(f'Evicted {n_evicted} files.')
+
+            print_el()
+
+        return
+
+    def _gcas_get_obj_path(self, key):
+
+        '''
+        Supposed to be called internally only.
+        '''
+
+        assert isinstance(key, str), f'key not of the data type string!'
+
+        assert len(key) > 2, f'key too short!'
+
+        return self._gcas_objs_dir / key[:2] / key
+
+    def _gcas_get_lock_path(self, key):
+
+        '''
+        Supposed to be called internally only.
+        '''
+
+        assert isinstance(key, str), f'key not of the data type string!'
+
+        return self._gcas_lcks_dir / f'{key}.lock'
+
+    def _gcas_touch(self, key):
+
+        '''
+        Supposed to be called internally only.
+        '''
+
+        (self._gcas_acss_dir / key).touch()
+        return
+
+
+def _get_temp_path(dir_path, prefix):
+
+    '''
+    Get a unique path in dir_path, that does not exist, for a temporary
+    file.
+
+    Supposed to be called internally only.
+    '''
+
+    temp_fd, temp_path = tempfile.mkstemp(prefix=prefix, dir=dir_path)
+
+    os.close(temp_fd)
+    os.unlink(temp_path)
+
+    return Path(temp_path)
+
+
+def _link_or_copy(src_path, dst_path, ficlone):
+
+    '''
+    Hardlink src_path to dst_path. If not possible, try a reflink and
+    then a normal copy. dst_path should not exist. It is never opened
+    if it does, as it could be a hardlink to a file in the store.
+
+    Supposed to be called internally only.
+    '''
+
+    try:
+        os.link(src_path, dst_path)
+        return
+
+    except OSError as exc:
+        if exc.errno in (errno.ENOENT, errno.EEXIST):
+            raise
+
+    if fcntl is not None:
+        try:
+            with open(src_path, 'rb') as src_hdl, open(
+                dst_path, 'xb') as dst_hdl:
+
+                fcntl.ioctl(dst_hdl.fileno(), ficlone, src_hdl.fileno())
+
+            return
+
+        except FileExistsError:
+            raise
+
+        except OSError:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(dst_path)
+
+    with open(src_path, 'rb') as src_hdl, open(dst_path, 'xb') as dst_hdl:
+        shutil.copyfileobj(src_hdl, dst_hdl)
+
+    return
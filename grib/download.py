@@ -5,13 +5,74 @@ Sep 17, 2021
 
 8:32:59 AM
 '''
+import os
+import re
+import html
+import json
+import time
+import timeit
+import hashlib
+import threading
 from pathlib import Path
 from fnmatch import fnmatch
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
-from bs4 import BeautifulSoup as bs
+from requests.adapters import HTTPAdapter
+
+from .cas import GCAStore
+from .transfer import GTransferCtrl
+from .scan import scan_grib_messages, _get_grib_msg_len, _grib_hdr_len
+from ..misc import (
+    print_sl, print_el, read_manifest, write_manifest, lock_manifest)
+
+# A namedtuple object to hold the result of downloading a file.
+# status is one of "downloaded", "cached" (served from the store set by
+# set_cas_store), "skipped" or "failed".
+_GDwnRes = namedtuple(
+    'GDwnRes',
+    ['url',
+     'name',
+     'status',
+     'n_bytes',
+     'secs',
+     'error'])
+
+# A namedtuple object to hold an entry of a directory listing.
+# size is in bytes and is approximate if the listing showed it as e.g.
+# "1.2M". size and date are None if the listing did not show them.
+_GDwnEntry = namedtuple(
+    'GDwnEntry',
+    ['url',
+     'name',
+     'size',
+     'date'])
+
+# A namedtuple object to hold a message of a remote GRIB file.
+# offset and length are in bytes. desc is the line of the index file
+# that describes the message or None if the messages were found by
+# scanning the file.
+_GDwnMsg = namedtuple(
+    'GDwnMsg',
+    ['index',
+     'offset',
+     'length',
+     'desc'])
+
+
+class _GDwnSizeError(IOError):
 
-from ..misc import print_sl, print_el
+    '''
+    Raised if the size of the downloaded data is not the one that the
+    server reported. The download is retried then.
+
+    Supposed to be used internally only.
+    '''
+
+    pass
 
 
 class GDownload:
@@ -19,8 +80,31 @@ class GDownload:
     '''
     Simple facilities to list and download files from a website.
 
-    1. List all files with a given extension for a given URL.
+    1. List all files with a given extension for a given URL, along with
+    the sizes and dates shown in the listing.
     2. Download a given file at a given URL.
+    3. Download many files at a given URL concurrently.
+    4. Crawl a tree of directories at a given URL concurrently to get all
+    the files in it.
+    5. Get the inventory of the messages of a remote (uncompressed) GRIB
+    file and download only the selected ones. See get_remote_inventory.
+
+    Listings can be cached on disk for a given time by calling
+    set_listing_cache, so that repeated calls do not fetch them again.
+
+    Downloads are streamed to disk in chunks and interrupted ones are
+    resumed using HTTP Range requests, where the server supports them.
+
+    A content-addressed store (GCAStore) can be set by calling
+    set_cas_store. Files are then served from it, if the same version of
+    a file was downloaded before by any job that uses the same store.
+
+    A transfer controller (GTransferCtrl) can be set by calling
+    set_transfer_ctrl. Failed downloads are then retried with backoff and
+    the number of parallel downloads is tuned to what the server sustains.
+
+    All requests go through a single pooled requests.Session so that
+    connections are reused.
 
     The URLs are supposed to have simple listings of files. I think it won't
     work on those fancy websites where files are shown inside widgets or
@@ -29,16 +113,111 @@ class GDownload:
     Take a look at the test/download_grib.py file of this modeule for
     the intended use case.
 
-    Last updated on: 2021-Sep-22
+    Last updated on: 2026-Oct-19
     '''
 
+    # Number of bytes written to disk at once while downloading.
+    _gdwn_chunk_size = 1024 ** 2
+
+    # Name of the file, inside a download directory, that records the
+    # ETag, Last-Modified and Content-Length of the downloaded files.
+    _gdwn_manifest_name = '_gdownload_manifest.json'
+
     def __init__(self, verbose=True):
 
         assert isinstance(verbose, bool), (
             f'verbose not of the data type boolean!')
 
-        self._vb = True
+        self._vb = verbose
+
+        self._gdwn_sess = None
+        self._gdwn_sess_n_conns = 0
+        self._gdwn_sess_lock = threading.Lock()
+        self._gdwn_mfst_lock = threading.Lock()
+
+        self._gdwn_lstg_cache_dir = None
+        self._gdwn_lstg_cache_ttl = None
+
+        self._gdwn_cas = None
+        self._gdwn_ctrl = None
+        return
+
+    def set_listing_cache(self, cache_dir, ttl_secs=3600):
+
+        '''
+        Cache the listings of URLs on disk. A cached listing is used
+        instead of fetching it again if it is younger than ttl_secs.
+        The cache can be shared by many scripts and processes.
+
+        Parameters
+        ----------
+        cache_dir : str or Path
+            The directory in which to keep the cached listings. Must exist.
+        ttl_secs : int or float
+            The time in seconds after which a cached listing is fetched
+            again. Must be greater than zero.
+        '''
+
+        assert isinstance(cache_dir, (str, Path)), (
+            f'cache_dir not of the data type string or Path!')
+
+        cache_dir = Path(cache_dir)
+
+        assert cache_dir.exists(), f'cache_dir does not exist!'
+
+        assert cache_dir.is_dir(), f'cache_dir is not a directory!'
+
+        assert isinstance(ttl_secs, (int, float)), (
+            f'ttl_secs not of the data type integer or float!')
+
+        assert ttl_secs > 0, f'ttl_secs must be greater than zero!'
+
+        self._gdwn_lstg_cache_dir = cache_dir
+        self._gdwn_lstg_cache_ttl = ttl_secs
+        return
+
+    def set_cas_store(self, cas_store):
+
+        '''
+        Use a content-addressed store for the downloaded files. The key of
+        a file is made from its URL and its ETag or, if the server sends no
+        strong ETag, its Last-Modified. A HEAD request is sent before each
+        download to get these. Files for which the server sends neither
+        are downloaded without the store.
+
+        Parameters
+        ----------
+        cas_store : GCAStore or None
+            The store. None means no store is used.
+        '''
+
+        if cas_store is not None:
+            assert isinstance(cas_store, GCAStore), (
+                f'cas_store not of the data type GCAStore!')
+
+        self._gdwn_cas = cas_store
+        return
+
+    def set_transfer_ctrl(self, transfer_ctrl):
+
+        '''
+        Use a transfer controller for the downloads of files. Downloads
+        that fail due to throttling (HTTP 429 or 503), server errors
+        (HTTP 408, 500, 502 or 504), broken connections or truncated data
+        are retried. Others fail at once. Retries resume from the
+        partial file, if the server supports ranges.
+
+        Parameters
+        ----------
+        transfer_ctrl : GTransferCtrl or None
+            The controller. None means no retries and no tuning.
+        '''
+
+        if transfer_ctrl is not None:
+            assert isinstance(transfer_ctrl, GTransferCtrl), (
+                f'transfer_ctrl not of the data type GTransferCtrl!')
 
+        self._gdwn_ctrl = transfer_ctrl
         return
 
     def get_all_names(self, url, ext):
@@ -60,6 +239,29 @@ class GDownload:
         List of all the names.
         '''
 
+        return [entry.name for entry in self.get_all_entries(url, ext)]
+
+    def get_all_entries(self, url, ext):
+
+        '''
+        Same as get_all_names but with the sizes and the dates that the
+        listing shows for each file. These are taken from the columns of
+        typical Apache or nginx index pages. Useful to plan downloads
+        without sending a request for each file.
+
+        Parameters
+        ----------
+        url : str
+            See get_all_names.
+        ext : str
+            See get_all_names.
+
+        Returns
+        -------
+        List of namedtuples, one for each file, with the attributes:
+        url, name, size (in bytes or None) and date (datetime or None).
+        '''
+
         if self._vb:
             print_sl()
 
@@ -79,31 +281,229 @@ class GDownload:
             print(f'URL: {url}')
             print(f'File extension: {ext}')
 
-        soup = bs(requests.get(url).text, features='html.parser')
-
         patt = f'*{ext}'
 
-        names = []
-        for href in soup.find_all('a'):
-            name = href['href']
+        entries = [
+            entry for entry in self._gdwn_get_listing(url)
+            if fnmatch(entry.name, patt)]
 
-            if not fnmatch(name, patt):
-                continue
+        if self._vb:
+            print(f'Found {len(entries)} files.')
 
-            names.append(name)
+        assert len(entries), (
+            f'Could not find any names with the extension {ext} at {url}!')
 
         if self._vb:
-            print(f'Found {len(names)} files.')
+            print_el()
 
-        assert len(names), (
-            f'Could not find any names with the extension {ext} at {url}!')
+        return entries
+
+    def crawl(
+            self,
+            url,
+            include_patts=('*',),
+            exclude_patts=(),
+            max_depth=8,
+            n_threads=8):
+
+        '''
+        Walk the directories under a given URL concurrently and get all
+        the files in them that match the given patterns. Directories of
+        the same depth are listed in parallel. The listing cache (see
+        set_listing_cache) is used, if set.
+
+        Parameters
+        ----------
+        url : str
+            The URL of the top directory. Must be a string and end with
+            a "/".
+        include_patts : list or tuple of str
+            Glob patterns, matched against the path of a file relative to
+            url e.g. "TOT_PRECIP/*.grb.bz2" or "*/T_2M.*". A file is taken
+            if its path matches any of them.
+        exclude_patts : list or tuple of str
+            Glob patterns, matched against the path of a file or
+            directory relative to url. Paths of directories end with
+            a "/" e.g. "constant/". Matching files are not taken and
+            matching directories are not walked.
+        max_depth : int
+            The number of directory levels to walk below url. Zero means
+            that only url is listed.
+        n_threads : int
+            The number of directories to list at the same time.
+
+        Returns
+        -------
+        A list of namedtuples, one for each file, with the attributes:
+        url (of the directory of the file), name, size and date. See
+        get_all_entries.
+        '''
+
+        if self._vb:
+            print_sl()
+
+            print('Crawling directories...')
+
+        assert isinstance(url, str), f'url not of the string data type!'
+
+        assert len(url), f'Empty url!'
+
+        assert url[-1] == '/', f'url not ending with a "/"!'
+
+        for patts, lab in (
+            (include_patts, 'include_patts'),
+            (exclude_patts, 'exclude_patts')):
+
+            assert isinstance(patts, (list, tuple)), (
+                f'{lab} not of the data type list or tuple!')
+
+            assert all([isinstance(patt, str) and len(patt)
+                        for patt in patts]), (
+                f'All values in {lab} should be non-empty strings!')
+
+        assert len(include_patts), f'Empty include_patts!'
+
+        assert isinstance(max_depth, int), f'max_depth not an integer!'
+
+        assert max_depth >= 0, f'max_depth must not be negative!'
+
+        assert isinstance(n_threads, int), f'n_threads not an integer!'
+
+        assert n_threads > 0, f'n_threads must be greater than zero!'
+
+        if self._vb:
+            print(f'URL: {url}')
+            print(f'Include patterns: {include_patts}')
+            print(f'Exclude patterns: {exclude_patts}')
+            print(f'Maximum depth: {max_depth}')
+
+        self._gdwn_get_sess(n_threads)
+
+        def get_listing(rel_dir):
+
+            try:
+                return self._gdwn_get_listing(f'{url}{rel_dir}'), None
+
+            except Exception as exc:
+                return [], repr(exc)
+
+        beg_time = timeit.default_timer()
+
+        entries = []
+        n_dirs = 0
+        rel_dirs = ['']
+        with ThreadPoolExecutor(max_workers=n_threads) as thread_pool:
+            for depth in range(max_depth + 1):
+                if not rel_dirs:
+                    break
+
+                n_dirs += len(rel_dirs)
+
+                next_rel_dirs = []
+                for rel_dir, (dir_entries, error) in zip(
+                    rel_dirs, thread_pool.map(get_listing, rel_dirs)):
+
+                    if error is not None:
+                        print(
+                            f'WARNING: Could not list {url}{rel_dir}: '
+                            f'{error}')
+
+                        continue
+
+                    for entry in dir_entries:
+                        rel_path = f'{rel_dir}{entry.name}'
+
+                        if any([fnmatch(rel_path, patt)
+                                for patt in exclude_patts]):
+
+                            continue
+
+                        if entry.name.endswith('/'):
+                            if depth < max_depth:
+                                next_rel_dirs.append(rel_path)
+
+                            continue
+
+                        if not any([fnmatch(rel_path, patt)
+                                    for patt in include_patts]):
+
+                            continue
+
+                        entries.append(entry)
+
+                rel_dirs = next_rel_dirs
 
         if self._vb:
+            print(
+                f'Found {len(entries)} files in {n_dirs} directories in '
+                f'{timeit.default_timer() - beg_time:0.1f} seconds.')
+
             print_el()
 
-        return names
+        return entries
+
+    def _gdwn_get_listing(self, url):
+
+        '''
+        Get all the entries of the listing at url, from the cache if
+        a fresh one exists there.
+
+        Supposed to be called internally only.
+        '''
+
+        if self._gdwn_lstg_cache_dir is not None:
+            cache_path = self._gdwn_lstg_cache_dir / (
+                f'{hashlib.sha1(url.encode()).hexdigest()}.json')
+
+            cache = read_manifest(cache_path)
 
-    def download_file(self, url, name, download_dir, overwrite_flag=False):
+            if (cache.get('url', None) == url) and (
+                (time.time() - cache['time']) < self._gdwn_lstg_cache_ttl):
+
+                return [
+                    _GDwnEntry(
+                        url,
+                        name,
+                        size,
+                        None if date is None else
+                        datetime.fromisoformat(date))
+                    for name, size, date in cache['entries']]
+
+        fetch_time = time.time()
+
+        resp = self._gdwn_get_sess().get(url, stream=True)
+
+        with resp:
+            resp.raise_for_status()
+
+            if resp.encoding is None:
+                resp.encoding = 'utf-8'
+
+            entries = [
+                _GDwnEntry(url, name, size, date)
+                for name, size, date in _parse_listing_lines(
+                    resp.iter_lines(decode_unicode=True))]
+
+        if self._gdwn_lstg_cache_dir is not None:
+            write_manifest(cache_path, {
+                'url': url,
+                'time': fetch_time,
+                'entries': [
+                    [entry.name,
+                     entry.size,
+                     None if entry.date is None else entry.date.isoformat()]
+                    for entry in entries],
+                })
+
+        return entries
+
+    def download_file(
+            self,
+            url,
+            name,
+            download_dir,
+            overwrite_flag=False,
+            update_flag=False):
 
         '''
         Download a file from a given URL with a check to see if the previous
@@ -112,6 +512,13 @@ class GDownload:
         This is done by having a temporary file created before download
         and deleted afterwards if the download was successful.
 
+        The file is streamed to disk in chunks in to a partial file
+        named as the file with a ".part" suffix. It is renamed to the file
+        once its size matches the one that the server reported. If a
+        previous attempt left a partial file, the download is resumed
+        from its end using an HTTP Range request. If the server does not
+        support ranges, the file is downloaded from the start.
+
         Parameters
         ----------
         url : str
@@ -129,6 +536,18 @@ class GDownload:
             the file does exist then no it is not downloaded.
             If the file download was unsuccessful the last time then it
             is overwritten regardless.
+        update_flag : bool
+            Only has an effect if overwrite_flag is False. Whether to
+            download an existing file again if it changed on the server.
+            For files in the manifest of the download_dir, a conditional
+            request (If-None-Match and If-Modified-Since) is sent and the
+            file is only transferred if it changed. For others, a HEAD
+            request is sent and the file is downloaded if its size differs
+            from the local one.
+
+        The ETag, Last-Modified and Content-Length of each downloaded
+        file are recorded in a manifest in the download_dir, named by
+        the class variable _gdwn_manifest_name.
         '''
 
         if self._vb:
@@ -158,6 +577,9 @@ class GDownload:
         assert isinstance(overwrite_flag, bool), (
             f'overwrite_flag not of the boolean data type!')
 
+        assert isinstance(update_flag, bool), (
+            f'update_flag not of the boolean data type!')
+
         out_file_path = download_dir / name
 
         if self._vb:
@@ -165,37 +587,1316 @@ class GDownload:
             print(f'File name: {name}')
             print(f'Output path: {out_file_path}')
 
-        # Used to determine if the file was downloaded and written to
-        # completely.
-        temp_file_path = download_dir / f'{name}.tmp'
+        res = self._gdwn_download(
+            url, name, download_dir, overwrite_flag, update_flag)
 
-        if temp_file_path.exists():
-            overwrite_flag = True
+        if res.status == 'failed':
+            raise RuntimeError(f'Could not download {url}{name}: {res.error}')
+
+        if self._vb:
+            if res.status == 'downloaded':
+                print(f'Done downloading.')
+
+            elif res.status == 'cached':
+                print(f'Served from the store.')
+
+            else:
+                print('Not downloading.')
+
+            print_el()
+
+        return
+
+    def download_many(
+            self,
+            url,
+            names,
+            download_dir,
+            overwrite_flag=False,
+            n_threads=4,
+            update_flag=False):
+
+        '''
+        Download many files from a given URL concurrently. A bounded pool
+        of threads shares one pooled requests.Session so that connections
+        are reused. The check of the previous unsuccessful attempt is the
+        same as that of download_file. A file that fails to download does
+        not stop the others.
+
+        Parameters
+        ----------
+        url : str
+            The url where the files exist. See download_file.
+        names : list or tuple of str
+            The names of the files to download.
+        download_dir : str or Path
+            See download_file.
+        overwrite_flag : bool
+            See download_file.
+        n_threads : int
+            The number of files to download at the same time. If a
+            transfer controller is set, it is the maximum number of
+            connections of the controller instead.
+        update_flag : bool
+            See download_file.
+
+        Returns
+        -------
+        A list of namedtuples, one for each name in the same order, with
+        the attributes: url, name, status ("downloaded", "cached",
+        "skipped" or "failed"), n_bytes (bytes transferred), secs (time
+        taken) and error (None or the error message).
+        '''
+
+        if self._vb:
+            print_sl()
+
+            print('Downloading many files...')
+
+        assert isinstance(url, str), f'url not of the data type string!'
+
+        assert len(url), f'Empty url string!'
+
+        assert url[-1] == '/', f'url not ending with a "/"!'
+
+        assert isinstance(names, (list, tuple)), (
+            f'names not of the data type list or tuple!')
+
+        assert len(names), f'Empty names!'
+
+        assert all([isinstance(name, str) and len(name) for name in names]), (
+            f'All names should be non-empty strings!')
+
+        assert len(set(names)) == len(names), f'Duplicate names!'
+
+        assert isinstance(download_dir, (str, Path)), (
+            f'download_dir not of the data type string or Path!')
+
+        download_dir = Path(download_dir)
+
+        assert download_dir.exists(), f'download_dir does not exist!'
+
+        assert download_dir.is_dir(), f'download_dir is not a directory!'
+
+        assert isinstance(overwrite_flag, bool), (
+            f'overwrite_flag not of the boolean data type!')
+
+        assert isinstance(update_flag, bool), (
+            f'update_flag not of the boolean data type!')
+
+        assert isinstance(n_threads, int), f'n_threads not an integer!'
+
+        assert n_threads > 0, f'n_threads must be greater than zero!'
+
+        if self._gdwn_ctrl is not None:
+            n_threads = self._gdwn_ctrl.get_max_conns()
+
+        if self._vb:
+            print(f'URL: {url}')
+            print(f'Number of files: {len(names)}')
+            print(f'Number of threads: {n_threads}')
+
+        self._gdwn_get_sess(n_threads)
+
+        beg_time = timeit.default_timer()
+
+        with ThreadPoolExecutor(max_workers=n_threads) as thread_pool:
+            results = list(thread_pool.map(
+                lambda name: self._gdwn_download(
+                    url, name, download_dir, overwrite_flag, update_flag),
+                names))
+
+        tot_secs = timeit.default_timer() - beg_time
+
+        if self._vb:
+            for res in results:
+                if res.status != 'failed':
+                    continue
+
+                print(f'WARNING: Could not download {res.name}: {res.error}')
+
+            for status in ('downloaded', 'cached', 'skipped', 'failed'):
+                print(
+                    f'{status.capitalize()}:',
+                    sum([res.status == status for res in results]))
+
+            tot_bytes = sum([res.n_bytes for res in results])
 
             print(
-                f'INFO: Previous attempt to download the file seems '
-                f'to have been unsuccessful. Overwriting the previous file.')
+                f'Transferred {tot_bytes / 1024 ** 2:0.1f} MiB in '
+                f'{tot_secs:0.1f} seconds '
+                f'({tot_bytes / 1024 ** 2 / max(tot_secs, 1e-9):0.2f} '
+                f'MiB/s).')
 
-        else:
-            open(temp_file_path, 'w')
+            print_el()
 
-        if overwrite_flag or (not out_file_path.exists()):
-            if self._vb:
-                print(f'Downloading...')
+        return results
+
+    def get_remote_inventory(self, url, name):
+
+        '''
+        Get the messages of a remote GRIB file without downloading it.
+
+        If the server has an index file next to the GRIB file, named as it
+        with an ".idx" suffix, it is used. Lines of the wgrib2 format
+        e.g. "3:52412:d=2021091700:TMP:2 m above ground:anl:" and of the
+        ECMWF JSON format e.g. {"_offset": 0, "_length": 1024, ...} are
+        understood. Otherwise, the messages are found by reading the
+        first bytes of each message with small HTTP Range requests, one
+        per message.
+
+        This only works for uncompressed GRIB files on servers that
+        support ranges.
+
+        Parameters
+        ----------
+        url : str
+            The url where the file exists. See download_file.
+        name : str
+            The name of the GRIB file.
 
-            req_cont = requests.get(f'{url}{name}', allow_redirects=True)
-            open(out_file_path, 'wb').write(req_cont.content)
+        Returns
+        -------
+        A list of namedtuples, one for each message in the order of the
+        file, with the attributes: index, offset, length and desc.
+        desc is the line of the index file for the message (lines joined
+        by newlines if there are many) or None if there was no index
+        file. Fields of GRIB2 messages that the index
+        file lists separately (e.g. "3.1", "3.2") are one message here.
+        '''
+
+        if self._vb:
+            print_sl()
+
+            print('Getting remote inventory...')
+
+        assert isinstance(url, str), f'url not of the data type string!'
+
+        assert len(url), f'Empty url string!'
+
+        assert url[-1] == '/', f'url not ending with a "/"!'
+
+        assert isinstance(name, str), 'name not of the data type string!'
+
+        assert len(name), 'Empty name string!'
+
+        file_url = f'{url}{name}'
+
+        resp = self._gdwn_get_sess().head(
+            file_url,
+            allow_redirects=True,
+            headers={'Accept-Encoding': 'identity'})
+
+        resp.raise_for_status()
 
+        assert 'Content-Length' in resp.headers, (
+            f'Server did not report the size of {file_url}!')
+
+        file_size = int(resp.headers['Content-Length'])
+
+        resp = self._gdwn_get_sess().get(
+            f'{file_url}.idx', allow_redirects=True)
+
+        if resp.status_code == 200:
             if self._vb:
-                print(f'Done downloading.')
+                print('Using the index file.')
+
+            msgs = _parse_idx_lines(resp.text.splitlines(), file_size)
 
         else:
             if self._vb:
-                print('Not downloading.')
+                print(
+                    f'No index file (HTTP {resp.status_code}). Scanning '
+                    f'the message headers...')
 
-        temp_file_path.unlink()
+            msgs = self._gdwn_scan_remote(file_url, file_size)
 
         if self._vb:
+            print(f'URL: {file_url}')
+            print(f'Number of messages: {len(msgs)}')
+
             print_el()
 
-        return
+        return msgs
+
+    def download_messages(
+            self,
+            url,
+            name,
+            download_dir,
+            msg_idxs=None,
+            desc_patts=None,
+            out_name=None,
+            overwrite_flag=False):
+
+        '''
+        Download only the selected messages of a remote GRIB file and
+        write them, in the order of the remote file, to a local GRIB file
+        that GRead can open. Adjacent messages are fetched with a single
+        HTTP Range request. The check of the previous unsuccessful attempt
+        is the same as that of download_file. The messages in the local
+        file are checked for their "GRIB" and "7777" markers before it is
+        given its final name.
+
+        Parameters
+        ----------
+        url : str
+            The url where the file exists. See download_file.
+        name : str
+            The name of the remote GRIB file.
+        download_dir : str or Path
+            See download_file.
+        msg_idxs : list or tuple of int or None
+            The indices of the messages to download, as in the inventory
+            that get_remote_inventory returns. Only one of msg_idxs and
+            desc_patts should be specified.
+        desc_patts : list or tuple of str or None
+            Glob patterns matched against the desc of each message of the
+            inventory e.g. "*:TMP:2 m above ground:*". A message is taken
+            if its desc matches any of them. Needs an index file on the
+            server.
+        out_name : str or None
+            The name of the local file. If None, it is name.
+        overwrite_flag : bool
+            See download_file.
+
+        Returns
+        -------
+        The number of bytes transferred. Zero if the file was not
+        downloaded because it existed.
+        '''
+
+        if self._vb:
+            print_sl()
+
+            print('Downloading messages...')
+
+        assert isinstance(download_dir, (str, Path)), (
+            f'download_dir not of the data type string or Path!')
+
+        download_dir = Path(download_dir)
+
+        assert download_dir.exists(), f'download_dir does not exist!'
+
+        assert download_dir.is_dir(), f'download_dir is not a directory!'
+
+        assert (msg_idxs is None) != (desc_patts is None), (
+            f'Exactly one of msg_idxs and desc_patts should be specified!')
+
+        if msg_idxs is not None:
+            assert isinstance(msg_idxs, (list, tuple)), (
+                f'msg_idxs not of the data type list or tuple!')
+
+            assert len(msg_idxs), f'Empty msg_idxs!'
+
+            assert all([isinstance(msg_idx, int) for msg_idx in msg_idxs]), (
+                f'All values in msg_idxs should be integers!')
+
+        else:
+            assert isinstance(desc_patts, (list, tuple)), (
+                f'desc_patts not of the data type list or tuple!')
+
+            assert len(desc_patts), f'Empty desc_patts!'
+
+            assert all([isinstance(patt, str) and len(patt)
+                        for patt in desc_patts]), (
+                f'All values in desc_patts should be non-empty strings!')
+
+        if out_name is None:
+            out_name = name
+
+        assert isinstance(out_name, str), (
+            f'out_name not of the data type string!')
+
+        assert len(out_name), f'Empty out_name string!'
+
+        assert isinstance(overwrite_flag, bool), (
+            f'overwrite_flag not of the boolean data type!')
+
+        out_file_path = download_dir / out_name
+
+        temp_file_path = download_dir / f'{out_name}.tmp'
+        part_file_path = download_dir / f'{out_name}.part'
+
+        if temp_file_path.exists():
+            overwrite_flag = True
+
+            print(
+                f'INFO: Previous attempt to download the messages to '
+                f'{out_name} seems to have been unsuccessful. Overwriting '
+                f'the previous file.')
+
+        if (not overwrite_flag) and out_file_path.exists():
+            if self._vb:
+                print('Output exists already. Not downloading.')
+
+                print_el()
+
+            return 0
+
+        msgs = self.get_remote_inventory(url, name)
+
+        if msg_idxs is not None:
+            assert all([0 <= msg_idx < len(msgs) for msg_idx in msg_idxs]), (
+                f'Values in msg_idxs should be from 0 to {len(msgs) - 1}!')
+
+            sel_msgs = [msgs[msg_idx] for msg_idx in sorted(set(msg_idxs))]
+
+        else:
+            sel_msgs = [
+                msg for msg in msgs
+                if (msg.desc is not None) and
+                any([fnmatch(msg.desc, patt) for patt in desc_patts])]
+
+        assert len(sel_msgs), f'No messages selected!'
+
+        # Adjacent messages are merged in to a single range.
+        ranges = []
+        for msg in sel_msgs:
+            if ranges and (ranges[-1][1] == msg.offset):
+                ranges[-1][1] = msg.offset + msg.length
+
+            else:
+                ranges.append([msg.offset, msg.offset + msg.length])
+
+        sel_bytes = sum([msg.length for msg in sel_msgs])
+
+        if self._vb:
+            print(f'Output path: {out_file_path}')
+
+            print(
+                f'Selected {len(sel_msgs)} of {len(msgs)} messages '
+                f'({sel_bytes / 1024 ** 2:0.2f} of '
+                f'{sum([msg.length for msg in msgs]) / 1024 ** 2:0.2f} MiB) '
+                f'in {len(ranges)} ranges.')
+
+        open(temp_file_path, 'w')
+
+        file_url = f'{url}{name}'
+
+        n_bytes = 0
+        with open(part_file_path, 'wb') as part_hdl:
+            for beg, end in ranges:
+                n_bytes += self._gdwn_stream_range(
+                    file_url, beg, end, part_hdl)
+
+        n_local_msgs = len(scan_grib_messages(part_file_path))
+
+        assert n_local_msgs == len(sel_msgs), (
+            f'Number of valid messages in the downloaded file '
+            f'({n_local_msgs}) not equal to the selected ones '
+            f'({len(sel_msgs)})!')
+
+        os.replace(part_file_path, out_file_path)
+
+        temp_file_path.unlink()
+
+        if self._vb:
+            print('Done downloading.')
+
+            print_el()
+
+        return n_bytes
+
+    def _gdwn_scan_remote(self, file_url, file_size):
+
+        '''
+        Find the messages of a remote GRIB file by reading the first bytes
+        of each message. The next message is taken to start right after
+        the end of the current one.
+
+        Supposed to be called internally only.
+        '''
+
+        msgs = []
+
+        offset = 0
+        while offset < file_size:
+            hdr = self._gdwn_get_range(
+                file_url,
+                offset,
+                min(offset + _grib_hdr_len, file_size))
+
+            edition_len = _get_grib_msg_len(hdr)
+
+            assert edition_len is not None, (
+                f'No GRIB message at byte {offset} of {file_url}!')
+
+            msg_len = edition_len[1]
+
+            assert offset + msg_len <= file_size, (
+                f'Message at byte {offset} of {file_url} goes beyond '
+                f'the end of the file!')
+
+            msgs.append(_GDwnMsg(len(msgs), offset, msg_len, None))
+
+            offset += msg_len
+
+        return msgs
+
+    def _gdwn_get_range(self, file_url, beg, end):
+
+        '''
+        Get the bytes from beg to end (exclusive) of a remote file.
+
+        Supposed to be called internally only.
+        '''
+
+        resp = self._gdwn_get_sess().get(
+            file_url,
+            headers={
+                'Range': f'bytes={beg}-{end - 1}',
+                'Accept-Encoding': 'identity'},
+            allow_redirects=True)
+
+        resp.raise_for_status()
+
+        assert resp.status_code == 206, (
+            f'Server does not support ranges for {file_url}!')
+
+        assert len(resp.content) == (end - beg), (
+            f'Got {len(resp.content)} bytes instead of {end - beg} from '
+            f'{file_url}!')
+
+        return resp.content
+
+    def _gdwn_stream_range(self, file_url, beg, end, out_hdl):
+
+        '''
+        Stream the bytes from beg to end (exclusive) of a remote file to
+        out_hdl in chunks.
+
+        Supposed to be called internally only.
+        '''
+
+        resp = self._gdwn_get_sess().get(
+            file_url,
+            headers={
+                'Range': f'bytes={beg}-{end - 1}',
+                'Accept-Encoding': 'identity'},
+            stream=True,
+            allow_redirects=True)
+
+        with resp:
+            resp.raise_for_status()
+
+            # Otherwise the whole file would come.
+            assert resp.status_code == 206, (
+                f'Server does not support ranges for {file_url}!')
+
+            cont_range = resp.headers.get('Content-Range', '')
+
+            assert cont_range.startswith(f'bytes {beg}-{end - 1}/'), (
+                f'Unexpected Content-Range ({cont_range}) for the range '
+                f'{beg}-{end - 1}!')
+
+            n_bytes = 0
+            for chunk in resp.iter_content(self._gdwn_chunk_size):
+                if self._gdwn_ctrl is not None:
+                    self._gdwn_ctrl.take_bytes(len(chunk))
+
+                out_hdl.write(chunk)
+
+                n_bytes += len(chunk)
+
+        if n_bytes != (end - beg):
+            raise _GDwnSizeError(
+                f'Got {n_bytes} bytes instead of {end - beg} from '
+                f'{file_url}!')
+
+        return n_bytes
+
+    def _gdwn_get_sess(self, n_conns=1):
+
+        '''
+        Get the shared requests.Session. It is (re)created if it does not
+        exist or if its connection pool is smaller than n_conns.
+
+        Supposed to be called internally only.
+        '''
+
+        with self._gdwn_sess_lock:
+            if (self._gdwn_sess is None) or (
+                self._gdwn_sess_n_conns < n_conns):
+
+                if self._gdwn_sess is not None:
+                    self._gdwn_sess.close()
+
+                sess = requests.Session()
+
+                adapter = HTTPAdapter(
+                    pool_connections=n_conns, pool_maxsize=n_conns)
+
+                sess.mount('http://', adapter)
+                sess.mount('https://', adapter)
+
+                self._gdwn_sess = sess
+                self._gdwn_sess_n_conns = n_conns
+
+            sess = self._gdwn_sess
+
+        return sess
+
+    def _gdwn_download(
+            self, url, name, download_dir, overwrite_flag, update_flag=False):
+
+        '''
+        Download a single file. Inputs are supposed to be validated
+        before. Errors are not raised but returned in the result.
+
+        Supposed to be called internally only.
+        '''
+
+        out_file_path = download_dir / name
+
+        beg_time = timeit.default_timer()
+
+        # Used to determine if the file was downloaded and written to
+        # completely.
+        temp_file_path = download_dir / f'{name}.tmp'
+
+        # Data is written to this file and it is renamed to out_file_path
+        # at the end.
+        part_file_path = download_dir / f'{name}.part'
+
+        if temp_file_path.exists():
+            overwrite_flag = True
+
+            print(
+                f'INFO: Previous attempt to download the file {name} seems '
+                f'to have been unsuccessful. Overwriting the previous file.')
+
+        else:
+            open(temp_file_path, 'w')
+
+            # Not from an unsuccessful attempt that this class knows of.
+            _delete_part_file(part_file_path)
+
+        cond_headers = None
+
+        if (not overwrite_flag) and out_file_path.exists():
+            if update_flag:
+                try:
+                    cond_headers = self._gdwn_get_cond_headers(
+                        url, name, download_dir)
+
+                except Exception as exc:
+                    temp_file_path.unlink()
+
+                    return _GDwnRes(
+                        url,
+                        name,
+                        'failed',
+                        0,
+                        timeit.default_timer() - beg_time,
+                        repr(exc))
+
+            if (not update_flag) or (cond_headers is None):
+                temp_file_path.unlink()
+
+                return _GDwnRes(
+                    url,
+                    name,
+                    'skipped',
+                    0,
+                    timeit.default_timer() - beg_time,
+                    None)
+
+        try:
+            status, n_bytes, resp_headers = self._gdwn_transfer_ctrl(
+                f'{url}{name}', out_file_path, part_file_path, cond_headers)
+
+            if status == 'skipped':
+                # Not modified on the server.
+                temp_file_path.unlink()
+
+                return _GDwnRes(
+                    url,
+                    name,
+                    'skipped',
+                    0,
+                    timeit.default_timer() - beg_time,
+                    None)
+
+            self._gdwn_set_manifest_entry(
+                download_dir, name, f'{url}{name}', resp_headers)
+
+        except Exception as exc:
+            # The temporary and the partial files stay so that the next
+            # attempt resumes or overwrites.
+            return _GDwnRes(
+                url,
+                name,
+                'failed',
+                0,
+                timeit.default_timer() - beg_time,
+                repr(exc))
+
+        temp_file_path.unlink()
+
+        return _GDwnRes(
+            url,
+            name,
+            status,
+            n_bytes,
+            timeit.default_timer() - beg_time,
+            None)
+
+    def _gdwn_transfer_ctrl(
+            self, file_url, out_file_path, part_file_path, cond_headers):
+
+        '''
+        Download a file through the store, if set, and retry through the
+        transfer controller, if set. See _gdwn_transfer for the returned
+        values.
+
+        Supposed to be called internally only.
+        '''
+
+        if self._gdwn_cas is None:
+            transfer = self._gdwn_transfer
+
+        else:
+            transfer = self._gdwn_transfer_cas
+
+        if self._gdwn_ctrl is None:
+            return transfer(
+                file_url, out_file_path, part_file_path, cond_headers)
+
+        attempt = 0
+        while True:
+            try:
+                with self._gdwn_ctrl.slot():
+                    status, n_bytes, resp_headers = transfer(
+                        file_url, out_file_path, part_file_path, cond_headers)
+
+                self._gdwn_ctrl.report_success(n_bytes)
+
+                return status, n_bytes, resp_headers
+
+            except Exception as exc:
+                retry_flag, throttled_flag, retry_after = _get_retry_info(exc)
+
+                if ((not retry_flag) or
+                    (attempt >= self._gdwn_ctrl.get_max_retries())):
+
+                    raise
+
+                wait_secs = self._gdwn_ctrl.report_failure(
+                    attempt, throttled_flag, retry_after)
+
+                if self._vb:
+                    print(
+                        f'INFO: Retrying {file_url} in {wait_secs:0.1f} '
+                        f'seconds after: {exc!r}')
+
+                time.sleep(wait_secs)
+
+                attempt += 1
+
+    def _gdwn_transfer(
+            self, file_url, out_file_path, part_file_path, cond_headers):
+
+        '''
+        Download a file through its partial file and rename it to
+        out_file_path.
+
+        Supposed to be called internally only.
+
+        Returns
+        -------
+        The status ("downloaded" or "skipped" if not modified on the
+        server), the number of bytes transferred and the headers of the
+        response.
+        '''
+
+        n_bytes, resp_headers = self._gdwn_stream_to_part(
+            file_url, part_file_path, cond_headers)
+
+        if n_bytes is None:
+            return 'skipped', 0, resp_headers
+
+        os.replace(part_file_path, out_file_path)
+
+        _delete_part_file(part_file_path)
+
+        return 'downloaded', n_bytes, resp_headers
+
+    def _gdwn_transfer_cas(
+            self, file_url, out_file_path, part_file_path, cond_headers):
+
+        '''
+        Same as _gdwn_transfer but the file is served from the store if it
+        is there. Otherwise, it is downloaded and added to the store. The
+        key is locked meanwhile so that other jobs wait for this download
+        instead of making their own.
+
+        Supposed to be called internally only.
+        '''
+
+        resp = self._gdwn_get_sess().head(file_url, allow_redirects=True)
+
+        resp.raise_for_status()
+
+        validator = _get_cas_validator(resp.headers)
+
+        if validator is None:
+            return self._gdwn_transfer(
+                file_url, out_file_path, part_file_path, cond_headers)
+
+        cas_key = self._gdwn_cas.make_key(file_url, validator)
+
+        with self._gdwn_cas.lock(cas_key):
+            if self._gdwn_cas.fetch(cas_key, out_file_path):
+                _delete_part_file(part_file_path)
+
+                return 'cached', 0, resp.headers
+
+            status, n_bytes, resp_headers = self._gdwn_transfer(
+                file_url, out_file_path, part_file_path, cond_headers)
+
+            # The file may have changed on the server after the HEAD
+            # request.
+            if ((status == 'downloaded') and
+                (_get_cas_validator(resp_headers) == validator)):
+
+                self._gdwn_cas.put(cas_key, out_file_path)
+
+        return status, n_bytes, resp_headers
+
+    def _gdwn_get_cond_headers(self, url, name, download_dir):
+
+        '''
+        Get the headers of a conditional request for an existing file
+        from its manifest entry. If there is no entry, a HEAD request is
+        sent and the size of the file on the server is compared with the
+        local one. None is returned if the file does not need to be
+        downloaded again. An empty dict is returned if the file should be
+        downloaded unconditionally.
+
+        Supposed to be called internally only.
+        '''
+
+        entry = self._gdwn_get_manifest_entry(download_dir, name)
+
+        if entry is not None:
+            cond_headers = {}
+
+            if entry['etag'] is not None:
+                cond_headers['If-None-Match'] = entry['etag']
+
+            if entry['last_modified'] is not None:
+                cond_headers['If-Modified-Since'] = entry['last_modified']
+
+            if cond_headers:
+                return cond_headers
+
+        resp = self._gdwn_get_sess().head(
+            f'{url}{name}', allow_redirects=True)
+
+        resp.raise_for_status()
+
+        local_size = (download_dir / name).stat().st_size
+
+        if (resp.headers.get('Content-Length', None) is not None) and (
+            int(resp.headers['Content-Length']) == local_size):
+
+            self._gdwn_set_manifest_entry(
+                download_dir, name, f'{url}{name}', resp.headers)
+
+            return None
+
+        return {}
+
+    def _gdwn_get_manifest_entry(self, download_dir, name):
+
+        '''
+        Supposed to be called internally only.
+        '''
+
+        with self._gdwn_mfst_lock:
+            manifest = read_manifest(download_dir / self._gdwn_manifest_name)
+
+        return manifest.get(name, None)
+
+    def _gdwn_set_manifest_entry(self, download_dir, name, file_url, headers):
+
+        '''
+        Record the validators of a downloaded file in the manifest of the
+        download_dir.
+
+        Supposed to be called internally only.
+        '''
+
+        manifest_path = download_dir / self._gdwn_manifest_name
+
+        # Other processes may use the same download_dir.
+        with self._gdwn_mfst_lock, lock_manifest(manifest_path):
+            manifest = read_manifest(manifest_path)
+
+            manifest[name] = {
+                'url': file_url,
+                'etag': headers.get('ETag', None),
+                'last_modified': headers.get('Last-Modified', None),
+                'content_length': (download_dir / name).stat().st_size,
+                }
+
+            write_manifest(manifest_path, manifest)
+
+        return
+
+    def _gdwn_stream_to_part(
+            self, file_url, part_file_path, cond_headers=None):
+
+        '''
+        Stream the file at file_url to part_file_path in chunks. If
+        part_file_path exists, the download is resumed from its end if the
+        server supports ranges. The final size is checked against the
+        size that the server reported, if any. An error is raised if they
+        do not match. The headers in cond_headers, if any, are sent
+        along as well.
+
+        The ETag and the Last-Modified of the response that started the
+        partial file are saved next to it. A resume sends them as
+        If-Range so that a file that changed on the server in the
+        meantime is downloaded from the start instead of being appended
+        to the old bytes. Partial files without them are not resumed.
+
+        Supposed to be called internally only.
+
+        Returns
+        -------
+        The number of bytes transferred and the headers of the response.
+        The number of bytes is None if the server replied that the file
+        was not modified.
+        '''
+
+        part_vldrs = _read_part_validators(part_file_path)
+
+        if part_file_path.exists() and (part_vldrs is not None):
+            resume_pos = part_file_path.stat().st_size
+
+        else:
+            _delete_part_file(part_file_path)
+
+            resume_pos = 0
+
+        # Byte positions, for resuming, and Content-Length are those of
+        # the file itself then, not of an encoded response.
+        headers = {'Accept-Encoding': 'identity'}
+        if cond_headers:
+            headers.update(cond_headers)
+
+        if_range = None
+        if resume_pos:
+            if_range = _get_if_range(part_vldrs)
+
+            if if_range is None:
+                # Cannot know if the file is still the same.
+                _delete_part_file(part_file_path)
+
+                resume_pos = 0
+
+        if resume_pos:
+            headers['Range'] = f'bytes={resume_pos}-'
+            headers['If-Range'] = if_range
+
+        resp = self._gdwn_get_sess().get(
+            file_url, headers=headers, stream=True, allow_redirects=True)
+
+        with resp:
+            if resp.status_code == 416:
+                tot_size = resp.headers.get(
+                    'Content-Range', '').split('/')[-1]
+
+                if tot_size.isdigit() and (int(tot_size) == resume_pos):
+                    # The partial file was complete already.
+                    return 0, part_vldrs
+
+                # The partial file is not useable, start again.
+                _delete_part_file(part_file_path)
+
+                return self._gdwn_stream_to_part(
+                    file_url, part_file_path, cond_headers)
+
+            if resp.status_code == 304:
+                return None, resp.headers
+
+            resp.raise_for_status()
+
+            tot_size = None
+
+            if resp.status_code == 206:
+                cont_range = resp.headers.get('Content-Range', '')
+
+                assert cont_range.startswith(f'bytes {resume_pos}-'), (
+                    f'Unexpected Content-Range ({cont_range}) for a resume '
+                    f'from byte {resume_pos}!')
+
+                if cont_range.split('/')[-1].isdigit():
+                    tot_size = int(cont_range.split('/')[-1])
+
+                file_mode = 'ab'
+
+            else:
+                # Range not supported, not requested or the file changed
+                # on the server.
+                resume_pos = 0
+
+                if 'Content-Length' in resp.headers:
+                    tot_size = int(resp.headers['Content-Length'])
+
+                file_mode = 'wb'
+
+                _write_part_validators(part_file_path, resp.headers)
+
+            # Content-Length is that of the encoded data then.
+            if resp.headers.get('Content-Encoding', 'identity') != 'identity':
+                tot_size = None
+
+            n_bytes = 0
+            with open(part_file_path, file_mode) as part_hdl:
+                for chunk in resp.iter_content(self._gdwn_chunk_size):
+                    if self._gdwn_ctrl is not None:
+                        self._gdwn_ctrl.take_bytes(len(chunk))
+
+                    part_hdl.write(chunk)
+
+                    n_bytes += len(chunk)
+
+        if tot_size is not None:
+            part_size = part_file_path.stat().st_size
+
+            if part_size != tot_size:
+                raise _GDwnSizeError(
+                    f'Size of the downloaded file ({part_size}) not equal '
+                    f'to the one reported by the server ({tot_size})!')
+
+        return n_bytes, resp.headers
+
+
+def _get_part_validators_path(part_file_path):
+
+    '''
+    Supposed to be called internally only.
+    '''
+
+    return part_file_path.parents[0] / f'{part_file_path.name}.json'
+
+
+def _read_part_validators(part_file_path):
+
+    '''
+    Read the ETag and the Last-Modified of the response that started
+    part_file_path, as a dict with the names of the headers as keys.
+    None is returned if they were not saved or are not readable.
+
+    Supposed to be called internally only.
+    '''
+
+    vldrs_path = _get_part_validators_path(part_file_path)
+
+    if not vldrs_path.exists():
+        return None
+
+    try:
+        with open(vldrs_path, 'r') as json_hdl:
+            return json.load(json_hdl)
+
+    except (OSError, ValueError):
+        return None
+
+
+def _write_part_validators(part_file_path, headers):
+
+    '''
+    Supposed to be called internally only.
+    '''
+
+    vldrs = {
+        hdr_name: headers[hdr_name]
+        for hdr_name in ('ETag', 'Last-Modified')
+        if headers.get(hdr_name, None) is not None}
+
+    with open(_get_part_validators_path(part_file_path), 'w') as json_hdl:
+        json.dump(vldrs, json_hdl)
+
+    return
+
+
+def _delete_part_file(part_file_path):
+
+    '''
+    Delete a partial file, if it exists, and its saved validators.
+
+    Supposed to be called internally only.
+    '''
+
+    for file_path in (
+        part_file_path, _get_part_validators_path(part_file_path)):
+
+        if file_path.exists():
+            file_path.unlink()
+
+    return
+
+
+def _get_if_range(part_vldrs):
+
+    '''
+    Get the value of the If-Range header for a resume from the saved
+    validators of a partial file. Only a strong ETag or else the
+    Last-Modified can be used. None is returned if there is neither.
+
+    Supposed to be called internally only.
+    '''
+
+    etag = part_vldrs.get('ETag', None)
+
+    if (etag is not None) and (not etag.startswith('W/')):
+        return etag
+
+    return part_vldrs.get('Last-Modified', None)
+
+
+def _get_cas_validator(headers):
+
+    '''
+    Get the strong ETag or else the Last-Modified from the headers of
+    a response. None is returned if there is neither. Weak ETags do
+    not guarantee the same bytes.
+
+    Supposed to be called internally only.
+    '''
+
+    etag = headers.get('ETag', None)
+
+    if (etag is not None) and (not etag.startswith('W/')):
+        return f'etag:{etag}'
+
+    last_modified = headers.get('Last-Modified', None)
+
+    if last_modified is not None:
+        return f'last_modified:{last_modified}'
+
+    return None
+
+
+def _get_retry_info(exc):
+
+    '''
+    Get whether a failed transfer should be retried, whether the server
+    throttled and the seconds in the Retry-After header of the response,
+    if any.
+
+    Supposed to be called internally only.
+    '''
+
+    if isinstance(exc, requests.exceptions.HTTPError) and (
+        exc.response is not None):
+
+        if exc.response.status_code in (429, 503):
+            return True, True, _get_retry_after(exc.response.headers)
+
+        return exc.response.status_code in (408, 500, 502, 504), False, None
+
+    if isinstance(exc, (
+        requests.exceptions.ConnectionError,
+        requests.exceptions.Timeout,
+        requests.exceptions.ChunkedEncodingError,
+        _GDwnSizeError)):
+
+        return True, False, None
+
+    return False, False, None
+
+
+def _get_retry_after(headers):
+
+    '''
+    Get the Retry-After header, as seconds or as an HTTP date, in
+    seconds. None is returned if it is not there or invalid.
+
+    Supposed to be called internally only.
+    '''
+
+    retry_after = headers.get('Retry-After', None)
+
+    if retry_after is None:
+        return None
+
+    retry_after = retry_after.strip()
+
+    if retry_after.isdigit():
+        return float(retry_after)
+
+    try:
+        retry_date = parsedate_to_datetime(retry_after)
+
+    except (TypeError, ValueError):
+        return None
+
+    if retry_date.tzinfo is None:
+        retry_date = retry_date.replace(tzinfo=timezone.utc)
+
+    return max(
+        0.0, (retry_date - datetime.now(timezone.utc)).total_seconds())
+
+
+def _parse_idx_lines(lines, file_size):
+
+    '''
+    Get the messages from the lines of an index file of a GRIB file of
+    file_size bytes. Lines in the wgrib2 format have the message number
+    and the offset as the first two fields separated by ":". Lines in the
+    ECMWF format are JSON objects with the "_offset" and "_length" keys.
+    The length of a message in the wgrib2 format is taken up to the next
+    offset or the end of the file. Lines with the same offset (fields of
+    the same message) are taken as one message with the lines joined
+    by newlines as its desc.
+
+    Supposed to be called internally only.
+    '''
+
+    offs_lens_descs = []
+    for line in lines:
+        line = line.strip()
+
+        if not line:
+            continue
+
+        if line.startswith('{'):
+            line_dict = json.loads(line)
+
+            offs_lens_descs.append(
+                (int(line_dict['_offset']),
+                 int(line_dict['_length']),
+                 line))
+
+        else:
+            offs_lens_descs.append((int(line.split(':')[1]), None, line))
+
+    offs_lens_descs.sort(key=lambda off_len_desc: off_len_desc[0])
+
+    # Lines of the same offset are joined.
+    uniq_offs_lens_descs = []
+    for offset, length, desc in offs_lens_descs:
+        if uniq_offs_lens_descs and (uniq_offs_lens_descs[-1][0] == offset):
+            uniq_offs_lens_descs[-1][2] += f'\n{desc}'
+
+        else:
+            uniq_offs_lens_descs.append([offset, length, desc])
+
+    offs_lens_descs = uniq_offs_lens_descs
+
+    msgs = []
+    for i, (offset, length, desc) in enumerate(offs_lens_descs):
+        if length is None:
+            if (i + 1) < len(offs_lens_descs):
+                length = offs_lens_descs[i + 1][0] - offset
+
+            else:
+                length = file_size - offset
+
+        assert 0 < length <= (file_size - offset), (
+            f'Invalid length ({length}) of the message at byte {offset} in '
+            f'the index file!')
+
+        msgs.append(_GDwnMsg(len(msgs), offset, length, desc))
+
+    return msgs
+
+
+# An anchor with its href (double, single or not quoted), the text
+# inside it and the text after it upto the next tag that starts an
+# anchor.
+_lstg_anchor_patt = re.compile(
+    r'<a\s[^>]*?href\s*=\s*'
+    r'(?:"(?P<dq_href>[^"]+)"|\'(?P<sq_href>[^\']+)\'|(?P<uq_href>[^\s>]+))'
+    r'[^>]*>(?P<text>.*?)</a>'
+    r'(?P<tail>(?:(?!<a\s).)*)',
+    re.IGNORECASE)
+
+_lstg_tag_patt = re.compile(r'<[^>]*>')
+
+_lstg_date_patts = (
+    (re.compile(r'\d{2}-[A-Za-z]{3}-\d{4} \d{2}:\d{2}:\d{2}'),
+     '%d-%b-%Y %H:%M:%S'),
+    (re.compile(r'\d{2}-[A-Za-z]{3}-\d{4} \d{2}:\d{2}'),
+     '%d-%b-%Y %H:%M'),
+    (re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}'),
+     '%Y-%m-%d %H:%M:%S'),
+    (re.compile(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}'),
+     '%Y-%m-%d %H:%M'),
+    )
+
+_lstg_size_patt = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([KMGTP]?)i?B?\b')
+
+_lstg_size_mults = {
+    '': 1,
+    'K': 1024,
+    'M': 1024 ** 2,
+    'G': 1024 ** 3,
+    'T': 1024 ** 4,
+    'P': 1024 ** 5}
+
+
+def _parse_listing_lines(lines):
+
+    '''
+    Get the (name, size, date) of each entry in the lines of an index
+    page. Links to parent directories, sorting links and absolute links
+    are ignored. Lines are processed one by one so the whole page is never
+    held. A line with an unclosed anchor is joined with the next one.
+
+    Supposed to be called internally only.
+    '''
+
+    entries = []
+
+    pending = ''
+    for line in lines:
+        pending += line
+
+        if pending.lower().count('<a ') > pending.lower().count('</a>'):
+            continue
+
+        for match in _lstg_anchor_patt.finditer(pending):
+            # Attributes are HTML-escaped e.g. "&amp;" for "&".
+            name = html.unescape(
+                match.group('dq_href') or
+                match.group('sq_href') or
+                match.group('uq_href'))
+
+            if (name.startswith(('?', '/', '#', '../')) or
+                ('://' in name) or
+                (name in ('.', './'))):
+
+                continue
+
+            tail = _lstg_tag_patt.sub(' ', match.group('tail'))
+
+            date = None
+            for date_patt, date_fmt in _lstg_date_patts:
+                date_match = date_patt.search(tail)
+
+                if date_match is None:
+                    continue
+
+                date = datetime.strptime(date_match.group(0), date_fmt)
+
+                tail = tail[date_match.end():]
+                break
+
+            size = None
+            size_match = _lstg_size_patt.search(tail)
+            if size_match is not None:
+                size = int(
+                    float(size_match.group(1)) *
+                    _lstg_size_mults[size_match.group(2)])
+
+            entries.append((name, size, date))
+
+        pending = ''
+
+    return entries
@@ -0,0 +1,295 @@
+'''
+@author: Faizan3800X-Uni
+
+Oct 19, 2026
+
+11:36:05 AM
+'''
+import threading
+from pathlib import Path
+from collections import OrderedDict, namedtuple
+
+from .read import GRead
+
+# A namedtuple object to hold an open GRIB file of the pool.
+# time_idxs is a dict with time stamps as keys and band indices as values.
+_GPoolEntry = namedtuple(
+    'GPoolEntry',
+    ['gread',
+     'lock',
+     'mtime_ns',
+     'size',
+     'time_idxs'])
+
+
+class GHandlePool:
+
+    '''
+    A bounded, thread-safe pool of open GRIB files for workloads that make
+    many small reads (a band or a window of it) across many files.
+
+    Each file is opened once with its spatial properties, metadata and
+    band time stamps read (GRead.read_grib with data_flag=False). The
+    GRead object is kept open in the pool for the next reads. The least
+    recently used file is closed when the pool is full. A file is reopened
+    if its modification time or size changed since it was opened.
+
+    Reads of the same file are serialized because GDAL datasets are not
+    thread-safe. Reads of different files can run in parallel.
+
+    How-To-Use
+    ----------
+    Initiate a pool (pool_cls = GHandlePool(max_size, verbose)) and call
+    read_band or read_time_step with the path to a GRIB file. The GRead
+    object of a file can be had by calling get_grib, for the other
+    properties of the file. Call clear to close all the files.
+
+    Last updated on: 2026-Oct-19
+    '''
+
+    def __init__(self, max_size=32, verbose=True):
+
+        assert isinstance(max_size, int), f'max_size not an integer!'
+
+        assert max_size > 0, f'max_size must be greater than zero!'
+
+        assert isinstance(verbose, bool), (
+            f'verbose not of the boolean data type!')
+
+        self._vb = verbose
+
+        self._ghpl_max_size = max_size
+
+        self._ghpl_entries = OrderedDict()
+        self._ghpl_lock = threading.Lock()
+        return
+
+    def __len__(self):
+
+        with self._ghpl_lock:
+            n_entries = len(self._ghpl_entries)
+
+        return n_entries
+
+    def get_grib(self, path_to_grib):
+
+        '''
+        Get the GRead object of a GRIB file from the pool. The file is
+        opened and added to the pool if it is not there already or if it
+        changed on disk.
+
+        The returned object should only be used for its get_* methods.
+        Use read_band or read_time_step of the pool to read data.
+
+        Parameters
+        ----------
+        path_to_grib : str or Path
+            Path to the GRIB file. Must exist.
+
+        Returns
+        -------
+        The GRead object of the file.
+        '''
+
+        return self._ghpl_get_entry(path_to_grib).gread
+
+    def get_time_index(self, path_to_grib):
+
+        '''
+        Returns
+        -------
+        A dict with the time stamps of a GRIB file as keys and the
+        indices of the corresponding bands as values.
+        '''
+
+        return dict(self._ghpl_get_entry(path_to_grib).time_idxs)
+
+    def read_band(self, path_to_grib, index, window=None):
+
+        '''
+        Read a band of a GRIB file. See GRead.read_band_grib for the
+        parameters and the returned array.
+        '''
+
+        return self._ghpl_read(path_to_grib, lambda entry: index, window)
+
+    def read_time_step(self, path_to_grib, time_stamp, window=None):
+
+        '''
+        Read the band of a GRIB file that has the given time stamp.
+
+        Parameters
+        ----------
+        path_to_grib : str or Path
+            Path to the GRIB file. Must exist.
+        time_stamp : datetime
+            The time stamp of the band. Should be one of the time stamps
+            that GRead.get_time_stamps_grib returns.
+        window : tuple or None
+            See GRead.read_band_grib.
+
+        Returns
+        -------
+        The band data as a 2D np.ndarray.
+        '''
+
+        def get_index(entry):
+
+            assert time_stamp in entry.time_idxs, (
+                f'time_stamp ({time_stamp}) not in the GRIB file: '
+                f'{path_to_grib}!')
+
+            return entry.time_idxs[time_stamp]
+
+        return self._ghpl_read(path_to_grib, get_index, window)
+
+    def evict(self, path_to_grib):
+
+        '''
+        Close a GRIB file and remove it from the pool, if it is there.
+        '''
+
+        key = str(Path(path_to_grib).resolve())
+
+        with self._ghpl_lock:
+            entry = self._ghpl_entries.pop(key, None)
+
+        if entry is not None:
+            self._ghpl_close_entry(key, entry)
+
+        return
+
+    def clear(self):
+
+        '''
+        Close all the GRIB files and empty the pool.
+        '''
+
+        with self._ghpl_lock:
+            entries = list(self._ghpl_entries.items())
+
+            self._ghpl_entries.clear()
+
+        for key, entry in entries:
+            self._ghpl_close_entry(key, entry)
+
+        return
+
+    def _ghpl_read(self, path_to_grib, get_index, window):
+
+        '''
+        Read a band from the pool entry of a GRIB file. get_index takes
+        the entry and returns the index of the band to read.
+
+        Supposed to be called internally only.
+        '''
+
+        while True:
+            entry = self._ghpl_get_entry(path_to_grib)
+
+            with entry.lock:
+                # The entry may have been evicted and closed by another
+                # thread after it was had here.
+                if entry.gread._gread_handle is None:
+                    continue
+
+                return entry.gread.read_band_grib(get_index(entry), window)
+
+    def _ghpl_get_entry(self, path_to_grib):
+
+        '''
+        Supposed to be called internally only.
+        '''
+
+        assert isinstance(path_to_grib, (str, Path)), (
+            f'Invalid data type of path_to_grib: type({path_to_grib})!')
+
+        path_to_grib = Path(path_to_grib).resolve()
+
+        key = str(path_to_grib)
+
+        file_stat = path_to_grib.stat()
+
+        stale_entry = None
+        with self._ghpl_lock:
+            entry = self._ghpl_entries.get(key, None)
+
+            if entry is not None:
+                if ((entry.mtime_ns == file_stat.st_mtime_ns) and
+                    (entry.size == file_stat.st_size)):
+
+                    self._ghpl_entries.move_to_end(key)
+
+                    return entry
+
+                stale_entry = self._ghpl_entries.pop(key)
+
+        if stale_entry is not None:
+            if self._vb:
+                print(f'INFO: GRIB file changed on disk, reopening: {key}')
+
+            self._ghpl_close_entry(key, stale_entry)
+
+        # Opened outside the lock so that other files can be had in the
+        # meantime.
+        gread = GRead(False)
+
+        gread.set_path_to_grib(path_to_grib)
+        gread.verify()
+        gread.read_grib(data_flag=False)
+
+        time_idxs = {}
+        for i, time_stamp in enumerate(gread.get_time_stamps_grib()):
+            time_idxs.setdefault(time_stamp, i)
+
+        entry = _GPoolEntry(
+            gread,
+            threading.Lock(),
+            file_stat.st_mtime_ns,
+            file_stat.st_size,
+            time_idxs)
+
+        evicted_entries = []
+        with self._ghpl_lock:
+            other_entry = self._ghpl_entries.get(key, None)
+
+            if ((other_entry is not None) and
+                (other_entry.mtime_ns == entry.mtime_ns) and
+                (other_entry.size == entry.size)):
+
+                # Another thread opened the same file in the meantime.
+                evicted_entries.append((key, entry))
+
+                entry = other_entry
+
+            else:
+                if other_entry is not None:
+                    evicted_entries.append((key, other_entry))
+
+                self._ghpl_entries[key] = entry
+
+            self._ghpl_entries.move_to_end(key)
+
+            while len(self._ghpl_entries) > self._ghpl_max_size:
+                evicted_entries.append(
+                    self._ghpl_entries.popitem(last=False))
+
+        for evicted_key, evicted_entry in evicted_entries:
+            self._ghpl_close_entry(evicted_key, evicted_entry)
+
+        return entry
+
+    def _ghpl_close_entry(self, key, entry):
+
+        '''
+        Supposed to be called internally only.
+        '''
+
+        # Wait for any ongoing read of the file to finish.
+        with entry.lock:
+            entry.gread.close_grib()
+
+        if self._vb:
+            print(f'INFO: Closed GRIB file in pool: {key}')
+
+        return
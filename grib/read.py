@@ -6,13 +6,16 @@ Sep 16, 2021
 10:21:17 AM
 '''
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 
 import parse
 import numpy as np
-from osgeo import gdal, osr
+from osgeo import gdal, gdal_array, osr
 
+from .scan import scan_grib_messages, _GMsgProps
+from .sparse import GSparseBands
 from ..misc import print_sl, print_el
 
 # A namedtuple object to hold the raster props, to avoid remembering the
@@ -65,8 +68,12 @@ class GRead:
     Closing can be done after reading as all the relevant data is loaded
     in to RAM. Any required variable can then be had by calling any of the
     get_* methods. See the documentation of each method for the format.
+    For large multi-message files, scan_grib can be called before read_grib
+    to get the messages cheaply and read_grib can decode them using
+    multiple processes. For forecast files, get_run_lead_index_grib and
+    read_cube_grib give the bands by model run and lead time.
 
-    Last updated on: 2021-Sep-22
+    Last updated on: 2026-Oct-19
     '''
 
     _grib_time_units = (
@@ -95,12 +102,21 @@ class GRead:
         self._gread_x_crds_cntrs = None
         self._gread_y_crds_cntrs = None
         self._gread_meta_data = None
+        self._gread_nodata_values = None
         self._gread_time_stamps = None
+        self._gread_run_times = None
+        self._gread_lead_times = None
+        self._gread_run_lead_idxs = None
+        self._gread_run_lead_dup = None
         self._gread_data = None
         self._gread_dtype = None
+        self._gread_msgs = None
+
+        self._gread_warned_secs = False
 
         self._gread_verify_flag = False
         self._gread_read_flag = False
+        self._gread_scan_flag = False
         return
 
     def set_path_to_grib(self, path_to_grib):
@@ -161,7 +177,71 @@ class GRead:
 
         return
 
-    def read_grib(self):
+    def scan_grib(self):
+
+        '''
+        Find the byte ranges of all the messages in the GRIB file without
+        decoding them. This is cheap compared to read_grib and gives
+        the exact number of messages before any heavy work starts.
+        The result is had by calling get_messages_grib.
+        '''
+
+        if self._vb:
+            print_sl()
+
+            print('Scanning GRIB file for messages...')
+
+        assert self._gread_verify_flag, (
+            f'Inputs not verified. Call verify first!')
+
+        self._gread_msgs = scan_grib_messages(self._gread_path_to_grib)
+
+        assert len(self._gread_msgs), (
+            f'No GRIB messages found in: {self._gread_path_to_grib}!')
+
+        self._gread_scan_flag = True
+
+        if self._vb:
+            print(f'Found {len(self._gread_msgs)} messages.')
+
+            print_el()
+
+        return
+
+    def read_grib(self, n_cpus=1, sparse_flag=False, data_flag=True):
+
+        '''
+        Read the GRIB file i.e. the spatial properties, the metadata,
+        the time stamps and the data of all the bands.
+
+        Parameters
+        ----------
+        n_cpus : int
+            The number of processes to decode the bands with. If greater
+            than one, the file is scanned for messages (if scan_grib was
+            not called before) and disjoint, contiguous byte ranges of
+            messages are decoded by each process through GDAL's
+            /vsisubfile/. Useful for large multi-message files only.
+        sparse_flag : bool
+            Whether to hold the data as a GSparseBands object instead of a
+            dense array. Useful for fields that are mostly zero or NoData
+            e.g. precipitation. Cells having the NoData value of a band
+            are NaNs in the dense array (floating point data only) and
+            are marked as NoData in the sparse one.
+        data_flag : bool
+            Whether to read the data of all the bands. If False, only the
+            spatial properties, the metadata and the time stamps are read
+            and the handle to the file is kept open. Bands can then be
+            read one at a time by calling read_band_grib. Call close_grib
+            afterwards. n_cpus and sparse_flag have no effect then.
+
+        Note: Cells of floating point bands that have the NoData value of
+        their band are NaNs in the dense data (here and in read_band_grib).
+        Earlier versions kept the NoData value in them. To get it back,
+        use np.nan_to_num or np.where with the values that
+        get_nodata_values_grib returns. Integer bands keep their NoData
+        value, since they cannot hold NaNs.
+        '''
 
         if self._vb:
             print_sl()
@@ -171,6 +251,16 @@ class GRead:
         assert self._gread_verify_flag, (
             f'Inputs not verified. Call verify first!')
 
+        assert isinstance(n_cpus, int), f'n_cpus not an integer!'
+
+        assert n_cpus > 0, f'n_cpus must be greater than zero!'
+
+        assert isinstance(sparse_flag, bool), (
+            f'sparse_flag not of the boolean data type!')
+
+        assert isinstance(data_flag, bool), (
+            f'data_flag not of the boolean data type!')
+
         grib_hdl = gdal.Open(str(self._gread_path_to_grib))
 
         assert grib_hdl is not None, (
@@ -242,75 +332,109 @@ class GRead:
         #======================================================================
 
         # Read data.
-        meta_data = []
+        if (n_cpus == 1) or (not data_flag):
+            meta_data, nodata_values, data = _read_grib_bands(
+                grib_hdl, sparse_flag, data_flag)
+
+        else:
+            meta_data, nodata_values, data = self._gread_read_data_mp(
+                n_cpus, sparse_flag)
+
+        assert len(meta_data) == band_count, (
+            f'Number of bands read ({len(meta_data)}) not equal to the '
+            f'band count ({band_count}) of the GRIB file!')
+
         time_stamps = []
-        data = None
+        for band_meta_data in meta_data:
+            time_stamps.append(self._gread_get_band_time(band_meta_data))
 
-        warned_secs = False
-        for i in range(band_count):
-            band = grib_hdl.GetRasterBand(i + 1)
+        self._gread_meta_data = tuple(meta_data)
+        self._gread_nodata_values = tuple(nodata_values)
+        self._gread_time_stamps = tuple(time_stamps)
+        self._gread_data = data
+
+        self._gread_set_run_lead_index()
+
+        if data_flag:
+            self._gread_dtype = self._gread_data.dtype
 
-            band_meta_data = band.GetMetadata()
+        else:
+            self._gread_dtype = np.dtype(
+                gdal_array.GDALTypeCodeToNumericTypeCode(
+                    grib_hdl.GetRasterBand(1).DataType))
+
+        self._gread_read_flag = True
 
-            ref_time_str = band_meta_data['GRIB_REF_TIME']
+        if self._vb:
+            print('Done reading GRIB data.')
+
+            print_el()
 
-            try:
-                parse_res = parse.search(
-                    '{time:12d} {unit:w} {ref:w}', ref_time_str)
+        return
 
-                assert parse_res is not None, (
-                    f'Could not parse: {ref_time_str} to get time!')
+    def read_band_grib(self, index, window=None):
 
-                assert parse_res['unit'] in self._grib_time_units, (
-                    f'The key "unit" is not in parse!')
+        '''
+        Read the data of a single band from the open handle to the GRIB
+        file. NoData cells are NaNs for floating point data.
 
-                assert parse_res['ref'] in self._grib_time_refs, (
-                    f'The key "ref" is not in parse!')
+        Parameters
+        ----------
+        index : int
+            The zero based index of the band. Same as the index of its
+            time stamp in get_time_stamps_grib.
+        window : tuple or None
+            If not None, only this window of the band is read. Should be
+            a tuple of four integers: (col_beg, row_beg, n_cols, n_rows).
 
-                band_time = datetime.utcfromtimestamp(parse_res['time'])
+        Returns
+        -------
+        The band data as a 2D np.ndarray.
 
-            except:
-                if not warned_secs:
+        Note: Works only if a call to read_grib is made before and
+        close_grib is not called yet.
+        '''
 
-                    print(
-                        'WARNING: Only seconds seem to have been specified '
-                        'in the GRIB_REF_TIME!')
+        assert self._gread_read_flag, f'Call read_grib first!'
 
-                    warned_secs = True
+        assert self._gread_handle is not None, (
+            f'Handle to the GRIB file is closed!')
 
-                parse_res = parse.search('{time:12d}', ref_time_str)
+        assert isinstance(index, int), f'index not an integer!'
 
-                assert parse_res is not None, (
-                    f'Could not parse: {ref_time_str} to get time!')
+        assert 0 <= index < self._gread_sp_props_orig.band_count, (
+            f'index ({index}) out of bounds!')
 
-                band_time = datetime.utcfromtimestamp(
-                    parse_res['time'] +
-                    int(band_meta_data['GRIB_FORECAST_SECONDS']))
+        band = self._gread_handle.GetRasterBand(index + 1)
 
+        if window is None:
             band_data = band.ReadAsArray()
 
-            if data is None:
-                data = np.empty(
-                    (band_count, n_rows, n_cols), dtype=band_data.dtype)
+        else:
+            assert isinstance(window, tuple), f'window not a tuple!'
 
-            meta_data.append(band_meta_data)
-            time_stamps.append(band_time)
-            data[i,:,:] = band_data
+            assert len(window) == 4, f'window not of length four!'
 
-        self._gread_meta_data = tuple(meta_data)
-        self._gread_time_stamps = tuple(time_stamps)
-        self._gread_data = data
+            assert all([isinstance(val, int) for val in window]), (
+                f'Values in window not integers!')
 
-        self._gread_dtype = self._gread_data[0].dtype
+            assert (
+                (window[0] >= 0) and
+                (window[1] >= 0) and
+                (window[2] > 0) and
+                (window[3] > 0) and
+                ((window[0] + window[2]) <= self._gread_grid_shape[1]) and
+                ((window[1] + window[3]) <= self._gread_grid_shape[0])), (
+                    f'window ({window}) out of bounds!')
 
-        self._gread_read_flag = True
+            band_data = band.ReadAsArray(*window)
 
-        if self._vb:
-            print('Done reading GRIB data.')
+        assert band_data is not None, (
+            f'Could not read band {index + 1} of the GRIB file!')
 
-            print_el()
+        _set_nodata_nan(band_data, band.GetNoDataValue())
 
-        return
+        return band_data
 
     def close_grib(self):
 
@@ -329,6 +453,210 @@ class GRead:
 
         return
 
+    def _gread_get_band_time(self, band_meta_data):
+
+        '''
+        Get the time stamp of a band from its metadata.
+
+        Supposed to be called internally only.
+        '''
+
+        ref_time_str = band_meta_data['GRIB_REF_TIME']
+
+        try:
+            parse_res = parse.search(
+                '{time:12d} {unit:w} {ref:w}', ref_time_str)
+
+            assert parse_res is not None, (
+                f'Could not parse: {ref_time_str} to get time!')
+
+            assert parse_res['unit'] in self._grib_time_units, (
+                f'The key "unit" is not in parse!')
+
+            assert parse_res['ref'] in self._grib_time_refs, (
+                f'The key "ref" is not in parse!')
+
+            band_time = datetime.utcfromtimestamp(parse_res['time'])
+
+        except:
+            if not self._gread_warned_secs:
+
+                print(
+                    'WARNING: Only seconds seem to have been specified '
+                    'in the GRIB_REF_TIME!')
+
+                self._gread_warned_secs = True
+
+            parse_res = parse.search('{time:12d}', ref_time_str)
+
+            assert parse_res is not None, (
+                f'Could not parse: {ref_time_str} to get time!')
+
+            band_time = datetime.utcfromtimestamp(
+                parse_res['time'] +
+                int(band_meta_data['GRIB_FORECAST_SECONDS']))
+
+        return band_time
+
+    def _gread_set_run_lead_index(self):
+
+        '''
+        Build the 2D (reference time, lead time) index of the bands from
+        their metadata. The index is not set if the lead time is missing
+        in the metadata of any band. The first pair of bands with the
+        same run and lead, if any, is kept to be reported when the index
+        is used.
+
+        Supposed to be called internally only.
+        '''
+
+        self._gread_run_times = None
+        self._gread_lead_times = None
+        self._gread_run_lead_idxs = None
+        self._gread_run_lead_dup = None
+
+        band_run_times = []
+        band_lead_times = []
+        for band_meta_data in self._gread_meta_data:
+
+            if 'GRIB_FORECAST_SECONDS' not in band_meta_data:
+                return
+
+            ref_secs = _get_grib_secs(band_meta_data['GRIB_REF_TIME'])
+            lead_secs = _get_grib_secs(
+                band_meta_data['GRIB_FORECAST_SECONDS'])
+
+            if (ref_secs is None) or (lead_secs is None):
+                return
+
+            band_run_times.append(datetime.utcfromtimestamp(ref_secs))
+            band_lead_times.append(timedelta(seconds=lead_secs))
+
+        run_times = tuple(sorted(set(band_run_times)))
+        lead_times = tuple(sorted(set(band_lead_times)))
+
+        run_idxs = {run_time: i for i, run_time in enumerate(run_times)}
+        lead_idxs = {lead_time: i for i, lead_time in enumerate(lead_times)}
+
+        run_lead_idxs = np.full(
+            (len(run_times), len(lead_times)), -1, dtype=np.int64)
+
+        run_lead_dup = None
+        for i, (run_time, lead_time) in enumerate(
+            zip(band_run_times, band_lead_times)):
+
+            run_idx = run_idxs[run_time]
+            lead_idx = lead_idxs[lead_time]
+
+            # e.g. more than one variable or level in the file.
+            if run_lead_idxs[run_idx, lead_idx] != -1:
+                if run_lead_dup is None:
+                    run_lead_dup = (
+                        run_lead_idxs[run_idx, lead_idx],
+                        i,
+                        run_time,
+                        lead_time)
+
+                continue
+
+            run_lead_idxs[run_idx, lead_idx] = i
+
+        self._gread_run_times = run_times
+        self._gread_lead_times = lead_times
+        self._gread_run_lead_idxs = run_lead_idxs
+        self._gread_run_lead_dup = run_lead_dup
+        return
+
+    def _gread_check_run_lead_index(self):
+
+        '''
+        Check that the run and lead time index is available and that each
+        run and lead has a single band.
+
+        Supposed to be called internally only.
+        '''
+
+        assert self._gread_run_lead_idxs is not None, (
+            f'Run and lead time index not available. At least one of the '
+            f'bands does not have a lead time in its metadata!')
+
+        if self._gread_run_lead_dup is not None:
+            band_idx_1, band_idx_2, run_time, lead_time = (
+                self._gread_run_lead_dup)
+
+            raise AssertionError(
+                f'Bands {band_idx_1} and {band_idx_2} have the same run '
+                f'({run_time}) and lead time ({lead_time})! The run and '
+                f'lead time index needs a single band per run and lead '
+                f'i.e. a file of a single variable and level.')
+
+        return
+
+    def _gread_read_data_mp(self, n_cpus, sparse_flag):
+
+        '''
+        Read the metadata and the data of all the bands using n_cpus
+        processes. Each process gets a disjoint and contiguous byte range
+        of messages.
+
+        Supposed to be called internally only.
+        '''
+
+        if not self._gread_scan_flag:
+            self._gread_msgs = scan_grib_messages(self._gread_path_to_grib)
+            self._gread_scan_flag = True
+
+        msgs = self._gread_msgs
+
+        assert len(msgs), (
+            f'No GRIB messages found in: {self._gread_path_to_grib}!')
+
+        n_cpus = min(n_cpus, len(msgs))
+
+        # Split messages in to groups of nearly equal byte sizes.
+        msg_ends = np.cumsum([msg.length for msg in msgs])
+
+        grp_brks = np.searchsorted(
+            msg_ends,
+            np.linspace(0, msg_ends[-1], n_cpus + 1)[1:-1],
+            side='right')
+
+        grp_idxs = np.unique(
+            np.concatenate(([0], grp_brks, [len(msgs)])))
+
+        mp_args = []
+        for beg_idx, end_idx in zip(grp_idxs[:-1], grp_idxs[1:]):
+            beg_msg = msgs[beg_idx]
+            end_msg = msgs[end_idx - 1]
+
+            mp_args.append((
+                str(self._gread_path_to_grib),
+                beg_msg.offset,
+                end_msg.offset + end_msg.length - beg_msg.offset,
+                sparse_flag))
+
+        meta_data = []
+        nodata_values = []
+        data = []
+        with ProcessPoolExecutor(max_workers=len(mp_args)) as mp_pool:
+            for grp_meta_data, grp_nodata_values, grp_data in mp_pool.map(
+                _read_grib_msgs, mp_args):
+
+                meta_data.extend(grp_meta_data)
+                nodata_values.extend(grp_nodata_values)
+                data.append(grp_data)
+
+        if sparse_flag:
+            for grp_data in data[1:]:
+                data[0].extend(grp_data)
+
+            data = data[0]
+
+        else:
+            data = np.concatenate(data, axis=0)
+
+        return meta_data, nodata_values, data
+
     def get_spatial_properties_grib(self):
 
         '''
@@ -615,7 +943,13 @@ class GRead:
         (time, horizontal coordinates, vertical coordinates). The dtype
         depends on whatever GDAL read. The size of this array can be
         significant so it is better to delete the GRead object after it
-        is not required.
+        is not required. NoData cells of floating point data are NaNs,
+        see read_grib. If read_grib was called with sparse_flag set
+        to True, a GSparseBands object is returned instead. It has the
+        same shape and dtype.
+
+        Note: Does not work if read_grib was called with data_flag set
+        to False.
 
         Note: Works only if a call to read_grib is made before.
         '''
@@ -630,14 +964,44 @@ class GRead:
         assert self._gread_data is not None, (
             f'Required attribute (self._gread_data) not set!')
 
-        assert isinstance(self._gread_data, np.ndarray), (
-            f'Required attribute (self._gread_data) not a np.ndarray!')
+        assert isinstance(self._gread_data, (np.ndarray, GSparseBands)), (
+            f'Required attribute (self._gread_data) not a np.ndarray or '
+            f'GSparseBands!')
 
         if self._vb:
             print_el()
 
         return self._gread_data
 
+    def get_nodata_values_grib(self):
+
+        '''
+        Returns
+        -------
+        The NoData value of each band as a tuple. A value is None if it
+        was not set for a given band.
+
+        Note: Works only if a call to read_grib is made before.
+        '''
+
+        if self._vb:
+            print_sl()
+
+            print('Getting GRIB NoData values for each time step...')
+
+        assert self._gread_read_flag, f'Call read_grib first!'
+
+        assert self._gread_nodata_values is not None, (
+            f'Required attribute (self._gread_nodata_values) not set!')
+
+        assert isinstance(self._gread_nodata_values, tuple), (
+            f'Required attribute not a tuple!')
+
+        if self._vb:
+            print_el()
+
+        return self._gread_nodata_values
+
     def get_dtype_grib(self):
 
         '''
@@ -666,4 +1030,324 @@ class GRead:
 
         return self._gread_dtype
 
+    def get_run_lead_index_grib(self):
+
+        '''
+        Returns
+        -------
+        The 2D index of the bands by model run (reference time) and lead
+        time, built from GRIB_REF_TIME and GRIB_FORECAST_SECONDS of each
+        band, as a tuple of three objects:
+        1. The sorted unique reference times as a tuple of datetimes.
+        2. The sorted unique lead times as a tuple of timedeltas.
+        3. A 2D np.ndarray of the band indices having the shape
+        (number of runs, number of leads). Combinations that are not
+        in the file have an index of -1.
+
+        Note: Works only if a call to read_grib is made before, all the
+        bands have the lead time in their metadata and no two bands have
+        the same run and lead time.
+        '''
+
+        if self._vb:
+            print_sl()
+
+            print('Getting GRIB run and lead time index...')
+
+        assert self._gread_read_flag, f'Call read_grib first!'
+
+        self._gread_check_run_lead_index()
+
+        if self._vb:
+            print_el()
+
+        return (
+            self._gread_run_times,
+            self._gread_lead_times,
+            self._gread_run_lead_idxs.copy())
+
+    def read_cube_grib(
+            self, run_times=None, lead_times=None, valid_times=None):
+
+        '''
+        Get the data as a 4D (run, lead, rows, columns) cube. Only the
+        bands of the selected runs, leads and valid times are used. These
+        are taken from the data that read_grib read or, if read_grib was
+        called with data_flag set to False, decoded from the open handle
+        one band at a time.
+
+        Parameters
+        ----------
+        run_times : sequence of datetimes or None
+            The reference times of the model runs to select. All the runs
+            are selected if None.
+        lead_times : sequence of timedeltas or None
+            The lead times to select. All the leads are selected if None.
+        valid_times : sequence of datetimes or None
+            If not None, only the bands whose reference time plus lead
+            time is one of these are selected. Runs and leads that have
+            no selected bands are dropped from the cube.
+
+        Returns
+        -------
+        A tuple of three objects:
+        1. The selected reference times as a tuple of datetimes.
+        2. The selected lead times as a tuple of timedeltas.
+        3. The cube as a 4D np.ndarray. Run and lead combinations that are
+        not in the file or not selected are NaNs.
+
+        Note: Works only if a call to read_grib is made before, all the
+        bands have the lead time in their metadata and no two bands have
+        the same run and lead time.
+        '''
+
+        if self._vb:
+            print_sl()
+
+            print('Reading GRIB run and lead time cube...')
+
+        assert self._gread_read_flag, f'Call read_grib first!'
+
+        self._gread_check_run_lead_index()
+
+        assert (self._gread_data is not None) or (
+            self._gread_handle is not None), (
+                f'Data not read and the handle to the GRIB file is closed!')
+
+        run_idxs = self._gread_get_sel_idxs(
+            self._gread_run_times, run_times, datetime, 'run_times')
+
+        lead_idxs = self._gread_get_sel_idxs(
+            self._gread_lead_times, lead_times, timedelta, 'lead_times')
+
+        band_idxs = self._gread_run_lead_idxs[np.ix_(run_idxs, lead_idxs)]
+
+        if valid_times is not None:
+            valid_times = set(valid_times)
+
+            assert all([isinstance(valid_time, datetime)
+                        for valid_time in valid_times]), (
+                f'Values in valid_times not datetimes!')
+
+            for i, run_idx in enumerate(run_idxs):
+                for j, lead_idx in enumerate(lead_idxs):
+                    valid_time = (
+                        self._gread_run_times[run_idx] +
+                        self._gread_lead_times[lead_idx])
+
+                    if valid_time not in valid_times:
+                        band_idxs[i, j] = -1
+
+            run_idxs = [
+                run_idx for i, run_idx in enumerate(run_idxs)
+                if np.any(band_idxs[i,:] >= 0)]
+
+            lead_idxs = [
+                lead_idx for j, lead_idx in enumerate(lead_idxs)
+                if np.any(band_idxs[:, j] >= 0)]
+
+            band_idxs = band_idxs[np.ix_(
+                np.any(band_idxs >= 0, axis=1),
+                np.any(band_idxs >= 0, axis=0))]
+
+        if self._gread_dtype.kind == 'f':
+            cube_dtype = self._gread_dtype
+
+        else:
+            cube_dtype = np.float64
+
+        cube = np.full(
+            band_idxs.shape + self._gread_grid_shape,
+            np.nan,
+            dtype=cube_dtype)
+
+        for i in range(band_idxs.shape[0]):
+            for j in range(band_idxs.shape[1]):
+                band_idx = int(band_idxs[i, j])
+
+                if band_idx == -1:
+                    continue
+
+                if self._gread_data is not None:
+                    cube[i, j] = self._gread_data[band_idx]
+
+                else:
+                    cube[i, j] = self.read_band_grib(band_idx)
+
+        if self._vb:
+            print(f'Cube shape: {cube.shape}')
+
+            print_el()
+
+        return (
+            tuple([self._gread_run_times[idx] for idx in run_idxs]),
+            tuple([self._gread_lead_times[idx] for idx in lead_idxs]),
+            cube)
+
+    def _gread_get_sel_idxs(self, all_vals, sel_vals, sel_type, sel_lab):
+
+        '''
+        Get the indices of the selected values in all_vals. All the
+        indices are returned if sel_vals is None.
+
+        Supposed to be called internally only.
+        '''
+
+        if sel_vals is None:
+            return list(range(len(all_vals)))
+
+        sel_idxs = []
+        for sel_val in sel_vals:
+            assert isinstance(sel_val, sel_type), (
+                f'Values in {sel_lab} not of the {sel_type.__name__} type!')
+
+            assert sel_val in all_vals, (
+                f'{sel_val} in {sel_lab} not in the GRIB file!')
+
+            sel_idxs.append(all_vals.index(sel_val))
+
+        return sel_idxs
+
+    def get_messages_grib(self):
+
+        '''
+        Returns
+        -------
+        The messages found in the GRIB file as a tuple of namedtuples.
+        Each namedtuple has the following attributes:
+        1. offset: The byte at which the message starts in the file.
+        2. length: The number of bytes of the message.
+        3. edition: The GRIB edition of the message.
+        4. sec_lens: A tuple of (section number, section length) pairs.
+        5. n_fields: The number of fields (bands) in the message.
+
+        Note: Works only if a call to scan_grib is made before.
+        '''
+
+        if self._vb:
+            print_sl()
+
+            print('Getting GRIB messages...')
+
+        assert self._gread_scan_flag, f'Call scan_grib first!'
+
+        assert self._gread_msgs is not None, (
+            f'Required attribute (self._gread_msgs) not set!')
+
+        assert all([
+            isinstance(msg, _GMsgProps) for msg in self._gread_msgs]), (
+                f'Expected all the messages to be of the _GMsgProps type!')
+
+        if self._vb:
+            print_el()
+
+        return self._gread_msgs
+
     __verify = verify
+
+
+def _get_grib_secs(secs_str):
+
+    '''
+    Get the integer seconds at the start of a GRIB metadata time string
+    e.g. "  1420070400 sec UTC" or "3600 sec". None is returned if
+    there are none.
+
+    Supposed to be called internally only.
+    '''
+
+    parse_res = parse.search('{secs:d}', secs_str)
+
+    if parse_res is None:
+        return None
+
+    return parse_res['secs']
+
+
+def _read_grib_bands(grib_hdl, sparse_flag, data_flag=True):
+
+    '''
+    Read the metadata, the NoData values and the data of all the bands of
+    an open GDAL GRIB handle. The data is a dense 3D array with NoData
+    cells as NaNs (floating point data only) or a GSparseBands object if
+    sparse_flag is True. The data is None if data_flag is False.
+
+    Supposed to be called internally only.
+    '''
+
+    band_count = grib_hdl.RasterCount
+
+    meta_data = []
+    nodata_values = []
+    data = None
+    for i in range(band_count):
+        band = grib_hdl.GetRasterBand(i + 1)
+
+        meta_data.append(band.GetMetadata())
+        nodata_values.append(band.GetNoDataValue())
+
+        if not data_flag:
+            continue
+
+        band_data = band.ReadAsArray()
+
+        nodata_value = nodata_values[-1]
+
+        if data is None:
+            if sparse_flag:
+                data = GSparseBands(band_data.shape, band_data.dtype)
+
+            else:
+                data = np.empty(
+                    (band_count,) + band_data.shape, dtype=band_data.dtype)
+
+        if sparse_flag:
+            data.add_band(band_data, nodata_value)
+
+        else:
+            _set_nodata_nan(band_data, nodata_value)
+
+            data[i,:,:] = band_data
+
+    return meta_data, nodata_values, data
+
+
+def _set_nodata_nan(band_data, nodata_value):
+
+    '''
+    Set the cells of band_data that are equal to nodata_value to NaNs,
+    in-place. Only done for floating point data.
+
+    Supposed to be called internally only.
+    '''
+
+    if (nodata_value is None) or (band_data.dtype.kind != 'f'):
+        return
+
+    band_data[band_data == nodata_value] = np.nan
+    return
+
+
+def _read_grib_msgs(args):
+
+    '''
+    Read the metadata, the NoData values and the data of all the bands in
+    a byte range of a GRIB file. The range should contain complete
+    messages only.
+
+    Supposed to be called internally only, in a separate process.
+    '''
+
+    path_to_grib, offset, length, sparse_flag = args
+
+    grib_hdl = gdal.Open(f'/vsisubfile/{offset}_{length},{path_to_grib}')
+
+    assert grib_hdl is not None, (
+        f'Could not open bytes {offset} to {offset + length} of the file: '
+        f'{path_to_grib} using GDAL!')
+
+    meta_data, nodata_values, data = _read_grib_bands(grib_hdl, sparse_flag)
+
+    grib_hdl = None
+
+    return meta_data, nodata_values, data
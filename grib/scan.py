@@ -0,0 +1,176 @@
+'''
+@author: Faizan3800X-Uni
+
+Oct 19, 2026
+
+9:02:11 AM
+'''
+import mmap
+from pathlib import Path
+from collections import namedtuple
+
+# A namedtuple object to hold the properties of a single GRIB message.
+# sec_lens is a tuple of (section number, section length in bytes) pairs.
+# n_fields is the number of fields (GDAL bands) inside the message.
+_GMsgProps = namedtuple(
+    'GMsgProps',
+    ['offset',
+     'length',
+     'edition',
+     'sec_lens',
+     'n_fields'])
+
+_grib_beg_mark = b'GRIB'
+_grib_end_mark = b'7777'
+
+# The minimum number of bytes required to know the length of a message.
+_grib_hdr_len = 16
+
+
+def _get_grib_msg_len(hdr):
+
+    '''
+    Get the edition and the total length of a GRIB message from
+    its first (at least 16) bytes. None is returned if hdr is not the
+    start of a GRIB1 or GRIB2 message.
+
+    Supposed to be called internally only.
+    '''
+
+    if (len(hdr) < _grib_hdr_len) or (hdr[:4] != _grib_beg_mark):
+        return None
+
+    edition = hdr[7]
+
+    if edition == 1:
+        msg_len = int.from_bytes(hdr[4:7], 'big')
+
+    elif edition == 2:
+        msg_len = int.from_bytes(hdr[8:16], 'big')
+
+    else:
+        return None
+
+    return edition, msg_len
+
+
+def _get_grib_sec_lens(buf, offset, length, edition):
+
+    '''
+    Get the lengths of all the sections of a GRIB message that
+    starts at offset in buf and has the total length.
+
+    Supposed to be called internally only.
+    '''
+
+    sec_lens = []
+    n_fields = 0
+
+    if edition == 1:
+        sec_lens.append((0, 8))
+
+        pos = offset + 8
+
+        sec_len = int.from_bytes(buf[pos:pos + 3], 'big')
+        sec_lens.append((1, sec_len))
+
+        flag = buf[pos + 7]
+
+        pos += sec_len
+
+        for sec_num, sec_flag in ((2, 0x80), (3, 0x40), (4, None)):
+
+            if (sec_flag is not None) and (not (flag & sec_flag)):
+                continue
+
+            sec_len = int.from_bytes(buf[pos:pos + 3], 'big')
+            sec_lens.append((sec_num, sec_len))
+
+            pos += sec_len
+
+        n_fields = 1
+
+    else:
+        sec_lens.append((0, 16))
+
+        pos = offset + 16
+        end = offset + length - 4
+
+        while pos < end:
+            sec_len = int.from_bytes(buf[pos:pos + 4], 'big')
+            sec_num = buf[pos + 4]
+
+            assert sec_len > 0, (
+                f'Invalid length of section {sec_num} in the GRIB message '
+                f'at byte: {offset}!')
+
+            sec_lens.append((sec_num, sec_len))
+
+            if sec_num == 7:
+                n_fields += 1
+
+            pos += sec_len
+
+    sec_lens.append((8, 4))
+
+    return tuple(sec_lens), n_fields
+
+
+def scan_grib_messages(path_to_grib):
+
+    '''
+    Find all the GRIB messages in a file without decoding them.
+
+    The file is memory mapped and searched for the "GRIB" marker. The
+    length of each message is taken from its indicator section and
+    the "7777" end marker is checked. Bytes between messages that do not
+    belong to a valid message are skipped.
+
+    Parameters
+    ----------
+    path_to_grib : str or Path
+        Path to the GRIB file.
+
+    Returns
+    -------
+    A tuple of _GMsgProps namedtuples, one for each message, in the order
+    they appear in the file.
+    '''
+
+    path_to_grib = Path(path_to_grib)
+
+    msgs = []
+
+    if path_to_grib.stat().st_size < _grib_hdr_len:
+        return tuple(msgs)
+
+    with open(path_to_grib, 'rb') as grib_hdl, mmap.mmap(
+        grib_hdl.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+
+        buf_len = len(buf)
+
+        pos = buf.find(_grib_beg_mark, 0)
+        while pos != -1:
+
+            len_res = _get_grib_msg_len(buf[pos:pos + _grib_hdr_len])
+
+            if len_res is None:
+                pos = buf.find(_grib_beg_mark, pos + 1)
+                continue
+
+            edition, msg_len = len_res
+
+            end = pos + msg_len
+
+            if (end > buf_len) or (buf[end - 4:end] != _grib_end_mark):
+                pos = buf.find(_grib_beg_mark, pos + 1)
+                continue
+
+            sec_lens, n_fields = _get_grib_sec_lens(
+                buf, pos, msg_len, edition)
+
+            msgs.append(_GMsgProps(pos, msg_len, edition, sec_lens, n_fields))
+
+            pos = buf.find(_grib_beg_mark, end)
+
+    return tuple(msgs)
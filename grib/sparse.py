@@ -0,0 +1,395 @@
+'''
+@author: Faizan3800X-Uni
+
+Oct 19, 2026
+
+10:14:52 AM
+'''
+import numpy as np
+
+
+class GSparseBands:
+
+    '''
+    A sparse, in-memory representation of a 3D (time, rows, columns)
+    array whose values are mostly zero or NoData e.g. precipitation.
+
+    Each band is held as a bit mask of the cells that have valid non-zero
+    values, the packed non-zero values in row-major order and a bit mask of
+    the NoData cells. Valid cells that are not in the non-zero mask are
+    zero.
+
+    The statistics methods (get_*) work on the sparse bands directly
+    without creating the dense array. NoData cells are excluded from all
+    the statistics.
+
+    Description
+    -----------
+    Bands are added one at a time by calling add_band. A band or a range
+    of bands can be had as dense arrays by calling get_band or get_bands.
+    NoData cells of dense arrays are filled with NaNs for floating point
+    data types and with the NoData value of the band otherwise.
+
+    Last updated on: 2026-Oct-19
+    '''
+
+    def __init__(self, grid_shape, dtype):
+
+        assert isinstance(grid_shape, tuple), f'grid_shape not a tuple!'
+
+        assert len(grid_shape) == 2, f'grid_shape not of length two!'
+
+        assert all([isinstance(n, int) and (n > 0) for n in grid_shape]), (
+            f'Invalid values in grid_shape: {grid_shape}!')
+
+        self._spbd_grid_shape = grid_shape
+        self._spbd_n_cells = grid_shape[0] * grid_shape[1]
+        self._spbd_dtype = np.dtype(dtype)
+
+        self._spbd_nz_masks = []
+        self._spbd_nz_vals = []
+        self._spbd_nd_masks = []
+        self._spbd_nd_values = []
+        return
+
+    def __len__(self):
+
+        return len(self._spbd_nz_vals)
+
+    def __getitem__(self, index):
+
+        return self.get_band(index)
+
+    @property
+    def shape(self):
+
+        return (len(self),) + self._spbd_grid_shape
+
+    @property
+    def dtype(self):
+
+        return self._spbd_dtype
+
+    @property
+    def nbytes(self):
+
+        '''
+        The number of bytes used by the sparse bands.
+        '''
+
+        n_bytes = 0
+        for i in range(len(self)):
+            n_bytes += self._spbd_nz_masks[i].nbytes
+            n_bytes += self._spbd_nz_vals[i].nbytes
+
+            if self._spbd_nd_masks[i] is not None:
+                n_bytes += self._spbd_nd_masks[i].nbytes
+
+        return n_bytes
+
+    def add_band(self, band_data, nodata_value=None):
+
+        '''
+        Add a band at the end.
+
+        Parameters
+        ----------
+        band_data : np.ndarray
+            A 2D array with the shape of the grid.
+        nodata_value : int or float or None
+            The NoData value of the band. Cells having this value, or NaNs,
+            are taken as NoData.
+        '''
+
+        assert isinstance(band_data, np.ndarray), (
+            f'band_data not a np.ndarray!')
+
+        assert band_data.shape == self._spbd_grid_shape, (
+            f'Shape of band_data ({band_data.shape}) not equal to that of '
+            f'the grid ({self._spbd_grid_shape})!')
+
+        band_data = band_data.ravel()
+
+        nd_mask = _get_nodata_mask(band_data, nodata_value)
+
+        if nd_mask is None:
+            nz_mask = band_data != 0
+
+            self._spbd_nd_masks.append(None)
+
+        else:
+            nz_mask = (band_data != 0) & (~nd_mask)
+
+            self._spbd_nd_masks.append(np.packbits(nd_mask))
+
+        self._spbd_nd_values.append(nodata_value)
+
+        self._spbd_nz_masks.append(np.packbits(nz_mask))
+
+        self._spbd_nz_vals.append(
+            band_data[nz_mask].astype(self._spbd_dtype, copy=True))
+
+        return
+
+    def extend(self, sparse_bands):
+
+        '''
+        Add all the bands of another GSparseBands object at the end.
+        '''
+
+        assert isinstance(sparse_bands, GSparseBands), (
+            f'sparse_bands not a GSparseBands object!')
+
+        assert sparse_bands._spbd_grid_shape == self._spbd_grid_shape, (
+            f'Grid shapes not equal!')
+
+        self._spbd_nz_masks.extend(sparse_bands._spbd_nz_masks)
+        self._spbd_nz_vals.extend(sparse_bands._spbd_nz_vals)
+        self._spbd_nd_masks.extend(sparse_bands._spbd_nd_masks)
+        self._spbd_nd_values.extend(sparse_bands._spbd_nd_values)
+        return
+
+    def get_band(self, index):
+
+        '''
+        Returns
+        -------
+        The band at index as a dense 2D array. NoData cells are NaNs for
+        floating point data types and the NoData value of the band
+        otherwise.
+        '''
+
+        index = range(len(self))[index]
+
+        band_data = np.zeros(self._spbd_n_cells, dtype=self._spbd_dtype)
+
+        band_data[self._spbd_get_nz_mask(index)] = self._spbd_nz_vals[index]
+
+        nd_mask = self._spbd_get_nd_mask(index)
+
+        if nd_mask is not None:
+            if self._spbd_dtype.kind == 'f':
+                band_data[nd_mask] = np.nan
+
+            else:
+                # Only cells equal to it are NoData for these types.
+                band_data[nd_mask] = self._spbd_nd_values[index]
+
+        return band_data.reshape(self._spbd_grid_shape)
+
+    def get_bands(self, beg_index, end_index):
+
+        '''
+        Returns
+        -------
+        The bands from beg_index upto but not including end_index as a
+        dense 3D array.
+        '''
+
+        idxs = range(len(self))[beg_index:end_index]
+
+        data = np.empty(
+            (len(idxs),) + self._spbd_grid_shape, dtype=self._spbd_dtype)
+
+        for i, index in enumerate(idxs):
+            data[i] = self.get_band(index)
+
+        return data
+
+    def to_dense(self):
+
+        '''
+        Returns
+        -------
+        All the bands as a dense 3D array.
+        '''
+
+        return self.get_bands(0, len(self))
+
+    def get_sum(self, idxs=None):
+
+        '''
+        Returns
+        -------
+        The sum of the valid values of each cell over the bands at idxs
+        (all the bands if None) as a 2D float64 array.
+        '''
+
+        sums = np.zeros(self._spbd_n_cells, dtype=np.float64)
+
+        for index in self._spbd_get_idxs(idxs):
+            sums[self._spbd_get_nz_mask(index)] += self._spbd_nz_vals[index]
+
+        return sums.reshape(self._spbd_grid_shape)
+
+    def get_count_valid(self, idxs=None):
+
+        '''
+        Returns
+        -------
+        The number of bands at idxs (all the bands if None) in which each
+        cell is not NoData as a 2D int64 array.
+        '''
+
+        idxs = self._spbd_get_idxs(idxs)
+
+        counts = np.full(self._spbd_n_cells, len(idxs), dtype=np.int64)
+
+        for index in idxs:
+            nd_mask = self._spbd_get_nd_mask(index)
+
+            if nd_mask is not None:
+                counts -= nd_mask
+
+        return counts.reshape(self._spbd_grid_shape)
+
+    def get_count_nonzero(self, idxs=None):
+
+        '''
+        Returns
+        -------
+        The number of bands at idxs (all the bands if None) in which each
+        cell has a valid non-zero value as a 2D int64 array.
+        '''
+
+        counts = np.zeros(self._spbd_n_cells, dtype=np.int64)
+
+        for index in self._spbd_get_idxs(idxs):
+            counts += self._spbd_get_nz_mask(index)
+
+        return counts.reshape(self._spbd_grid_shape)
+
+    def get_mean(self, idxs=None):
+
+        '''
+        Returns
+        -------
+        The mean of the valid values of each cell over the bands at idxs
+        (all the bands if None) as a 2D float64 array. Cells that are NoData
+        in all the bands are NaNs.
+        '''
+
+        counts = self.get_count_valid(idxs)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = self.get_sum(idxs) / counts
+
+        means[counts == 0] = np.nan
+
+        return means
+
+    def get_max(self, idxs=None):
+
+        '''
+        Returns
+        -------
+        The maximum of the valid values of each cell over the bands at idxs
+        (all the bands if None) as a 2D float64 array. Cells that are NoData
+        in all the bands are NaNs.
+        '''
+
+        idxs = self._spbd_get_idxs(idxs)
+
+        maxs = np.full(self._spbd_n_cells, -np.inf, dtype=np.float64)
+
+        for index in idxs:
+            nz_mask = self._spbd_get_nz_mask(index)
+
+            maxs[nz_mask] = np.maximum(
+                maxs[nz_mask], self._spbd_nz_vals[index])
+
+        # Valid zeros.
+        zero_mask = (self.get_count_valid(idxs) -
+                     self.get_count_nonzero(idxs)).ravel() > 0
+
+        maxs[zero_mask] = np.maximum(maxs[zero_mask], 0.0)
+
+        maxs[np.isneginf(maxs)] = np.nan
+
+        return maxs.reshape(self._spbd_grid_shape)
+
+    def get_aggregated(self, labels):
+
+        '''
+        Aggregate the bands by summing the ones that have the same label
+        e.g. hourly to daily sums. A cell is NoData in the result if it was
+        NoData in all the bands of a label.
+
+        Parameters
+        ----------
+        labels : sequence
+            A label for each band. Must have the same length as the number
+            of bands. Labels should be hashable and sortable.
+
+        Returns
+        -------
+        A tuple of the sorted unique labels and a GSparseBands object with
+        one band per unique label.
+        '''
+
+        assert len(labels) == len(self), (
+            f'Number of labels ({len(labels)}) not equal to the number of '
+            f'bands ({len(self)})!')
+
+        uniq_labels = tuple(sorted(set(labels)))
+
+        agg_bands = GSparseBands(self._spbd_grid_shape, np.float64)
+
+        for label in uniq_labels:
+            idxs = [i for i in range(len(self)) if labels[i] == label]
+
+            sums = self.get_sum(idxs)
+
+            sums[self.get_count_valid(idxs) == 0] = np.nan
+
+            agg_bands.add_band(sums)
+
+        return uniq_labels, agg_bands
+
+    def _spbd_get_idxs(self, idxs):
+
+        if idxs is None:
+            idxs = range(len(self))
+
+        return idxs
+
+    def _spbd_get_nz_mask(self, index):
+
+        return np.unpackbits(
+            self._spbd_nz_masks[index], count=self._spbd_n_cells).view(bool)
+
+    def _spbd_get_nd_mask(self, index):
+
+        if self._spbd_nd_masks[index] is None:
+            return None
+
+        return np.unpackbits(
+            self._spbd_nd_masks[index], count=self._spbd_n_cells).view(bool)
+
+
+def _get_nodata_mask(band_data, nodata_value):
+
+    '''
+    Get a boolean mask of the NoData cells of band_data. Cells equal to
+    nodata_value, if not None, and NaNs are taken as NoData. None is
+    returned if there are no NoData cells.
+
+    Supposed to be called internally only.
+    '''
+
+    nd_mask = None
+
+    if band_data.dtype.kind == 'f':
+        nd_mask = np.isnan(band_data)
+
+    if nodata_value is not None:
+        if nd_mask is None:
+            nd_mask = band_data == nodata_value
+
+        else:
+            nd_mask |= band_data == nodata_value
+
+    if (nd_mask is not None) and (not nd_mask.any()):
+        nd_mask = None
+
+    return nd_mask
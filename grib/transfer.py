@@ -0,0 +1,355 @@
+'''
+@author: Faizan3800X-Uni
+
+Oct 19, 2026
+
+5:34:52 PM
+'''
+import time
+import random
+import threading
+import contextlib
+
+
+class GTransferCtrl:
+
+    '''
+    Control the transfers of many threads to a server so that they run at
+    the highest rate that the server sustains without blocking them.
+
+    1. Number of parallel connections: Tuned in the AIMD way. It starts
+    at min_conns. After every window of as many finished transfers as
+    there are allowed connections, it is increased by one if the
+    throughput of the window was higher than that of the previous one
+    and there were few errors. It is decreased by one if the throughput
+    dropped, and halved if there were many errors or if the server
+    throttled (HTTP 429 or 503).
+    2. Retries: A failed transfer should be retried after the time given
+    by report_failure. It grows exponentially with the attempt and is
+    randomized (full jitter) so that the threads do not retry at the same
+    time. A Retry-After from the server is respected. All the threads
+    pause when the server throttles.
+    3. Bandwidth: An optional cap on the total bytes per second of all
+    the threads, enforced with a token bucket.
+
+    How-To-Use
+    ----------
+    Initiate an object and give it to GDownload.set_transfer_ctrl.
+    The object can be shared by many GDownload objects that download
+    from the same server.
+
+    Last updated on: 2026-Oct-19
+    '''
+
+    # The minimum relative change in throughput between two windows
+    # that counts as an increase or a decrease.
+    _gtct_min_gain = 0.05
+
+    # Errors in a window above this ratio lead to halving the connections.
+    _gtct_max_err_ratio = 0.1
+
+    def __init__(
+            self,
+            max_conns=8,
+            min_conns=1,
+            max_retries=5,
+            backoff_base_secs=1.0,
+            backoff_max_secs=120.0,
+            max_bytes_per_sec=None,
+            verbose=True):
+
+        assert isinstance(max_conns, int), f'max_conns not an integer!'
+
+        assert isinstance(min_conns, int), f'min_conns not an integer!'
+
+        assert 0 < min_conns <= max_conns, (
+            f'min_conns must be greater than zero and not greater than '
+            f'max_conns!')
+
+        assert isinstance(max_retries, int), f'max_retries not an integer!'
+
+        assert max_retries >= 0, f'max_retries must not be negative!'
+
+        for secs, lab in (
+            (backoff_base_secs, 'backoff_base_secs'),
+            (backoff_max_secs, 'backoff_max_secs')):
+
+            assert isinstance(secs, (int, float)), (
+                f'{lab} not of the data type integer or float!')
+
+            assert secs > 0, f'{lab} must be greater than zero!'
+
+        assert backoff_base_secs <= backoff_max_secs, (
+            f'backoff_base_secs greater than backoff_max_secs!')
+
+        if max_bytes_per_sec is not None:
+            assert isinstance(max_bytes_per_sec, (int, float)), (
+                f'max_bytes_per_sec not of the data type integer or float!')
+
+            assert max_bytes_per_sec > 0, (
+                f'max_bytes_per_sec must be greater than zero!')
+
+        assert isinstance(verbose, bool), (
+            f'verbose not of the boolean data type!')
+
+        self._vb = verbose
+
+        self._gtct_max_conns = max_conns
+        self._gtct_min_conns = min_conns
+        self._gtct_max_retries = max_retries
+        self._gtct_backoff_base_secs = backoff_base_secs
+        self._gtct_backoff_max_secs = backoff_max_secs
+        self._gtct_max_bytes_per_sec = max_bytes_per_sec
+
+        self._gtct_cond = threading.Condition()
+
+        self._gtct_n_conns = min_conns
+        self._gtct_n_active = 0
+        self._gtct_pause_until = 0.0
+
+        # Transfers finished in the current window.
+        self._gtct_wndw_beg_time = None
+        self._gtct_wndw_n_bytes = 0
+        self._gtct_wndw_n_succs = 0
+        self._gtct_wndw_n_errs = 0
+        self._gtct_prev_tput = None
+
+        self._gtct_bckt_lock = threading.Lock()
+        self._gtct_bckt_tokens = (
+            0.0 if max_bytes_per_sec is None else float(max_bytes_per_sec))
+
+        self._gtct_bckt_time = time.monotonic()
+        return
+
+    def get_n_conns(self):
+
+        '''
+        Returns
+        -------
+        The number of parallel connections allowed currently.
+        '''
+
+        with self._gtct_cond:
+            n_conns = self._gtct_n_conns
+
+        return n_conns
+
+    def get_max_conns(self):
+
+        '''
+        Returns
+        -------
+        The maximum number of parallel connections.
+        '''
+
+        return self._gtct_max_conns
+
+    def get_max_retries(self):
+
+        '''
+        Returns
+        -------
+        The number of times that a failed transfer should be retried.
+        '''
+
+        return self._gtct_max_retries
+
+    @contextlib.contextmanager
+    def slot(self):
+
+        '''
+        A context manager to be used around a single transfer. It blocks
+        till a connection is allowed and the threads are not paused.
+        '''
+
+        with self._gtct_cond:
+            while True:
+                wait_secs = self._gtct_pause_until - time.monotonic()
+
+                if wait_secs > 0:
+                    self._gtct_cond.wait(wait_secs)
+
+                elif self._gtct_n_active >= self._gtct_n_conns:
+                    self._gtct_cond.wait()
+
+                else:
+                    break
+
+            self._gtct_n_active += 1
+
+            if self._gtct_wndw_beg_time is None:
+                self._gtct_wndw_beg_time = time.monotonic()
+
+        try:
+            yield
+
+        finally:
+            with self._gtct_cond:
+                self._gtct_n_active -= 1
+
+                self._gtct_cond.notify_all()
+
+        return
+
+    def report_success(self, n_bytes):
+
+        '''
+        Report a finished transfer of n_bytes.
+        '''
+
+        with self._gtct_cond:
+            self._gtct_wndw_n_bytes += n_bytes
+            self._gtct_wndw_n_succs += 1
+
+            self._gtct_end_window()
+
+        return
+
+    def report_failure(self, attempt, throttled_flag, retry_after=None):
+
+        '''
+        Report a failed transfer.
+
+        Parameters
+        ----------
+        attempt : int
+            The attempt that failed, starting from zero.
+        throttled_flag : bool
+            Whether the server throttled (HTTP 429 or 503). All the
+            threads are paused then and the connections are halved.
+        retry_after : int or float or None
+            The seconds to wait that the server asked for, if any.
+
+        Returns
+        -------
+        The seconds to wait before retrying.
+        '''
+
+        wait_secs = random.uniform(
+            0,
+            min(self._gtct_backoff_max_secs,
+                self._gtct_backoff_base_secs * (2 ** attempt)))
+
+        if retry_after is not None:
+            wait_secs = max(wait_secs, retry_after)
+
+        with self._gtct_cond:
+            self._gtct_wndw_n_errs += 1
+
+            if throttled_flag:
+                # Other threads are throttled at the same time often.
+                # Halved once for all of them.
+                if time.monotonic() >= self._gtct_pause_until:
+                    self._gtct_set_n_conns(
+                        self._gtct_n_conns // 2, 'server throttled')
+
+                    self._gtct_reset_window()
+
+                self._gtct_pause_until = max(
+                    self._gtct_pause_until, time.monotonic() + wait_secs)
+
+            else:
+                self._gtct_end_window()
+
+        return wait_secs
+
+    def take_bytes(self, n_bytes):
+
+        '''
+        Take n_bytes from the token bucket of the bandwidth cap. Blocks
+        till they are available. Nothing is done if there is no cap.
+        '''
+
+        if self._gtct_max_bytes_per_sec is None:
+            return
+
+        with self._gtct_bckt_lock:
+            cur_time = time.monotonic()
+
+            self._gtct_bckt_tokens = min(
+                float(self._gtct_max_bytes_per_sec),
+                self._gtct_bckt_tokens + (
+                    (cur_time - self._gtct_bckt_time) *
+                    self._gtct_max_bytes_per_sec))
+
+            self._gtct_bckt_time = cur_time
+
+            # Can go below zero. Later calls wait for it then.
+            self._gtct_bckt_tokens -= n_bytes
+
+            wait_secs = -self._gtct_bckt_tokens / self._gtct_max_bytes_per_sec
+
+        if wait_secs > 0:
+            time.sleep(wait_secs)
+
+        return
+
+    def _gtct_end_window(self):
+
+        '''
+        Tune the number of connections if the current window is complete.
+        Should be called with self._gtct_cond held.
+
+        Supposed to be called internally only.
+        '''
+
+        n_done = self._gtct_wndw_n_succs + self._gtct_wndw_n_errs
+
+        if n_done < self._gtct_n_conns:
+            return
+
+        tput = self._gtct_wndw_n_bytes / max(
+            1e-9, time.monotonic() - self._gtct_wndw_beg_time)
+
+        if (self._gtct_wndw_n_errs / n_done) > self._gtct_max_err_ratio:
+            self._gtct_set_n_conns(self._gtct_n_conns // 2, 'many errors')
+
+        elif (self._gtct_prev_tput is None) or (
+            tput >= (self._gtct_prev_tput * (1 + self._gtct_min_gain))):
+
+            self._gtct_set_n_conns(
+                self._gtct_n_conns + 1,
+                f'throughput {tput / 1024 ** 2:0.2f} MiB/s')
+
+        elif tput <= (self._gtct_prev_tput * (1 - self._gtct_min_gain)):
+            self._gtct_set_n_conns(
+                self._gtct_n_conns - 1,
+                f'throughput {tput / 1024 ** 2:0.2f} MiB/s')
+
+        self._gtct_reset_window()
+
+        self._gtct_prev_tput = tput
+        return
+
+    def _gtct_reset_window(self):
+
+        '''
+        Supposed to be called internally only.
+        '''
+
+        self._gtct_wndw_beg_time = time.monotonic()
+        self._gtct_wndw_n_bytes = 0
+        self._gtct_wndw_n_succs = 0
+        self._gtct_wndw_n_errs = 0
+        return
+
+    def _gtct_set_n_conns(self, n_conns, reason):
+
+        '''
+        Supposed to be called internally only.
+        '''
+
+        n_conns = min(
+            self._gtct_max_conns, max(self._gtct_min_conns, n_conns))
+
+        if n_conns != self._gtct_n_conns:
+            if self._vb:
+                print(
+                    f'INFO: Connections: {self._gtct_n_conns} -> {n_conns} '
+                    f'({reason}).')
+
+            self._gtct_n_conns = n_conns
+
+            self._gtct_cond.notify_all()
+
+        return
@@ -5,11 +5,32 @@ Sep 16, 2021
 
 5:48:41 PM
 '''
+import re
 import bz2
-import shutil
+import glob
+import gzip
+import lzma
+import mmap
+import timeit
+import hashlib
+import zipfile
 from pathlib import Path
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-from ..misc import print_sl, print_el
+from .cas import GCAStore
+from ..misc import (
+    print_sl, print_el, read_manifest, write_manifest, lock_manifest)
+
+# A namedtuple object to hold the result of unpacking a file in a batch.
+# status is one of "unpacked", "skipped" or "failed".
+_GUnpackRes = namedtuple(
+    'GUnpackRes',
+    ['path_to_input',
+     'path_to_output',
+     'status',
+     'secs',
+     'error'])
 
 
 class GUnpack:
@@ -17,14 +38,52 @@ class GUnpack:
     '''
     A simple class to help unpack compressed data.
 
-    For now, only bz2 is supported.
+    The bz2, gzip, xz, lzma (legacy) and zip formats are supported. The
+    format is detected from the magic bytes at the start of a file, not
+    its extension. A zip archive should have a single file in it.
+
+    A hash of the unpacked data can be computed while unpacking and
+    written to a sidecar file next to the output, named as the output
+    with the hash name appended as a suffix e.g. "file.grb.sha256".
+    It has the same format as that of the sha256sum (or similar) utility.
+    Integrity checks and deduplication can then use it without reading
+    the output again. See read_hash_sidecar.
+
+    A content-addressed store (GCAStore) can be set by calling
+    set_cas_store. Outputs are then served from it, if an archive with
+    the same content was unpacked before by any job that uses the same
+    store. New outputs are added to it.
 
     Take a look at the test/unpack_bz2.py file of this modeule for
     the intended use case.
 
-    Last updated on: 2021-Sep-22
+    Last updated on: 2026-Oct-19
     '''
 
+    # Size of the read buffer for the serial unpack.
+    _gupk_buff_size = 16 * 1024 ** 2
+
+    # Upper limit of the compressed bytes given to a process at once
+    # in the parallel unpack.
+    _gupk_max_seg_size = 32 * 1024 ** 2
+
+    # Name of the file, inside the output directory of a batch unpack,
+    # that records the completed outputs.
+    _gupk_manifest_name = '_gunpack_manifest.json'
+
+    # Format names and their magic bytes.
+    _gupk_codec_magics = (
+        ('bz2', b'BZh'),
+        ('gzip', b'\x1f\x8b'),
+        ('xz', b'\xfd7zXZ\x00'),
+        ('lzma', b'\x5d\x00\x00'),
+        ('zip', b'PK\x03\x04'),
+        )
+
+    # Extensions of the archives that are taken when a directory is given
+    # to a batch unpack.
+    _gupk_codec_exts = ('.bz2', '.gz', '.xz', '.lzma', '.zip')
+
     def __init__(self, verbose=True):
 
         assert isinstance(verbose, bool), (
@@ -32,9 +91,79 @@ class GUnpack:
 
         self._vb = verbose
 
+        self._gupk_cas = None
         return
 
-    def unpack_bz2(self, path_to_input, path_to_output, overwrite_flag=False):
+    def set_cas_store(self, cas_store):
+
+        '''
+        Use a content-addressed store for the outputs. The key of an output
+        is made from the hash of its archive, so the archive is read once
+        more before unpacking.
+
+        Parameters
+        ----------
+        cas_store : GCAStore or None
+            The store. None means no store is used.
+        '''
+
+        if cas_store is not None:
+            assert isinstance(cas_store, GCAStore), (
+                f'cas_store not of the data type GCAStore!')
+
+        self._gupk_cas = cas_store
+        return
+
+    def unpack(
+            self,
+            path_to_input,
+            path_to_output,
+            overwrite_flag=False,
+            n_cpus=1,
+            hash_name='sha256'):
+
+        '''
+        Unpack an archive of any of the supported formats. A check is made
+        to see if the previous unpack was successful or not.
+
+        Parameters
+        ----------
+        path_to_input : str or Path
+            Path of the input archive. Must have the string or Path
+            data type. Should exist. The format is detected from the
+            magic bytes at the start of the file.
+        path_to_ouput : str or Path
+            Path of the output decompressed archive. The file may decompress
+            in to a single only. Must be of the string or Path data type.
+        overwrite_flag : bool
+            Whether to overwrite existing results. Unsuccesful unpack results
+            are overwritten regardless.
+        n_cpus : int
+            The number of processes to unpack with. Only has an effect
+            for bz2 archives that have multiple independent streams.
+            See unpack_bz2.
+        hash_name : str or None
+            The name of a hashlib algorithm e.g. "sha256", "blake2b" or
+            "md5". The hash of the unpacked data is computed while
+            unpacking and written to a sidecar file. No hash is computed
+            if None.
+        '''
+
+        return self._gupk_unpack(
+            path_to_input,
+            path_to_output,
+            overwrite_flag,
+            n_cpus,
+            hash_name,
+            None)
+
+    def unpack_bz2(
+            self,
+            path_to_input,
+            path_to_output,
+            overwrite_flag=False,
+            n_cpus=1,
+            hash_name=None):
 
         '''
         Unpack a bz2 archive. A check is made to see if the previous unpack
@@ -51,12 +180,45 @@ class GUnpack:
         overwrite_flag : bool
             Whether to overwrite existing results. Unsuccesful unpack results
             are overwritten regardless.
+        n_cpus : int
+            The number of processes to unpack with. Only has an effect
+            for archives that have multiple independent bz2 streams
+            e.g. the ones made by pbzip2. The streams are decompressed
+            in parallel and written to the output in order. Archives
+            with a single stream are unpacked serially.
+        hash_name : str or None
+            See unpack. Unlike unpack and unpack_batch, no hash is
+            computed by default, as before they existed.
+        '''
+
+        return self._gupk_unpack(
+            path_to_input,
+            path_to_output,
+            overwrite_flag,
+            n_cpus,
+            hash_name,
+            'bz2')
+
+    def _gupk_unpack(
+            self,
+            path_to_input,
+            path_to_output,
+            overwrite_flag,
+            n_cpus,
+            hash_name,
+            req_codec):
+
+        '''
+        Unpack an archive. If req_codec is not None, the archive should
+        be of that format.
+
+        Supposed to be called internally only.
         '''
 
         if self._vb:
             print_sl()
 
-            print('Unpacking BZ2 file...')
+            print('Unpacking file...')
 
         assert isinstance(path_to_input, (str, Path)), (
             f'path_to_input not of the data type string or Path!')
@@ -79,36 +241,747 @@ class GUnpack:
         assert isinstance(overwrite_flag, bool), (
             f'overwrite_flag not of the boolean data type!')
 
+        assert isinstance(n_cpus, int), f'n_cpus not an integer!'
+
+        assert n_cpus > 0, f'n_cpus must be greater than zero!'
+
+        if hash_name is not None:
+            assert isinstance(hash_name, str), (
+                f'hash_name not of the data type string!')
+
+            assert hash_name in hashlib.algorithms_available, (
+                f'hash_name not among the available ones: '
+                f'{sorted(hashlib.algorithms_available)}!')
+
+        codec = self._gupk_get_codec(path_to_input)
+
+        if req_codec is not None:
+            assert codec == req_codec, (
+                f'Input is not a {req_codec} archive but: {codec}!')
+
         print(f'path_to_input:', path_to_input)
         print(f'path_to_ouput:', path_to_output)
 
-        with bz2.BZ2File(path_to_input, 'rb') as f_in:
+        if self._vb:
+            print(f'Format: {codec}')
+
+        # Used to determine if the file was unpacked correctly.
+        temp_file_path = path_to_output.parents[0] / (
+            f'{path_to_output.name}.tmp')
 
-            # Used to determine if the file was unpacked correctly.
-            temp_file_path = path_to_output.parents[0] / (
-                f'{path_to_output.name}.tmp')
+        if temp_file_path.exists():
+            print(
+                f'It seems that the previous attempt to unpack '
+                f'was unsuccessful. Overwriting previous results.')
 
-            if temp_file_path.exists():
-                print(
-                    f'It seems that the previous attempt to unpack '
-                    f'was unsuccessful. Overwriting previous results.')
+            overwrite_flag = True
 
-                overwrite_flag = True
+        else:
+            open(temp_file_path, 'w')
+
+        if overwrite_flag or (not path_to_output.exists()):
+            if self._gupk_cas is None:
+                self._gupk_unpack_out(
+                    path_to_input, path_to_output, n_cpus, hash_name, codec)
 
             else:
-                open(temp_file_path, 'w')
+                cas_key = self._gupk_cas.make_key(
+                    'gunpack', _get_file_hash(
+                        path_to_input, 'sha256', self._gupk_buff_size))
 
-            if overwrite_flag or (not path_to_output.exists()):
-                with open(path_to_output, 'wb') as f_out:
-                        shutil.copyfileobj(f_in, f_out)
+                with self._gupk_cas.lock(cas_key):
+                    if not self._gupk_fetch_cas(
+                        cas_key, path_to_output, hash_name):
 
-                print('Unpacked successfully.')
+                        self._gupk_unpack_out(
+                            path_to_input,
+                            path_to_output,
+                            n_cpus,
+                            hash_name,
+                            codec)
 
-            else:
-                print('Output exists already.')
+                        self._gupk_put_cas(
+                            cas_key, path_to_output, hash_name)
+
+            print('Unpacked successfully.')
+
+        else:
+            print('Output exists already.')
+
+        if self._vb:
+            print_el()
+
+        temp_file_path.unlink()
+        return
+
+    def _gupk_unpack_out(
+            self, path_to_input, path_to_output, n_cpus, hash_name, codec):
+
+        '''
+        Unpack an archive to path_to_output and write the hash sidecar.
+
+        Supposed to be called internally only.
+        '''
+
+        # It may be a hardlink to a file in a store. Writing to it would
+        # change the file there as well.
+        if path_to_output.exists():
+            path_to_output.unlink()
+
+        if (codec != 'bz2') or (n_cpus == 1):
+            strm_offsets = [0]
+
+        else:
+            strm_offsets = _get_bz2_stream_offsets(path_to_input)
+
+        hash_hdl = None
+
+        if len(strm_offsets) > 1:
+            if self._vb:
+                print(
+                    f'Unpacking {len(strm_offsets)} bz2 streams '
+                    f'using {n_cpus} processes...')
+
+            try:
+                hash_hdl = self._gupk_get_hash_hdl(hash_name)
+
+                self._gupk_unpack_bz2_mp(
+                    path_to_input,
+                    path_to_output,
+                    strm_offsets,
+                    n_cpus,
+                    hash_hdl)
+
+            except (OSError, EOFError, ValueError):
+                # A false stream start inside a stream leads to
+                # an incomplete stream.
+                print(
+                    'WARNING: Parallel unpack failed! Unpacking '
+                    'serially.')
+
+                strm_offsets = [0]
+
+        if len(strm_offsets) == 1:
+            hash_hdl = self._gupk_get_hash_hdl(hash_name)
+
+            self._gupk_unpack_sl(
+                path_to_input, path_to_output, codec, hash_hdl)
+
+        if hash_hdl is not None:
+            _write_hash_sidecar(
+                path_to_output, hash_name, hash_hdl.hexdigest())
 
             if self._vb:
-                print_el()
+                print(f'{hash_name}: {hash_hdl.hexdigest()}')
+
+        return
+
+    def _gupk_fetch_cas(self, cas_key, path_to_output, hash_name):
+
+        '''
+        Get an output and its hash sidecar, if hash_name is not None, from
+        the store. False is returned if either of them is not there.
+
+        Supposed to be called internally only.
+        '''
+
+        hash_hex = None
+
+        if hash_name is not None:
+            sidecar_path = path_to_output.parents[0] / (
+                f'{path_to_output.name}.{hash_name}')
+
+            if not self._gupk_cas.fetch(
+                self._gupk_cas.make_key(cas_key, hash_name), sidecar_path):
+
+                return False
+
+            hash_hex = _read_hash_sidecar(path_to_output, hash_name)
+
+            # Shared with the store. It is written again below.
+            sidecar_path.unlink()
+
+        if not self._gupk_cas.fetch(cas_key, path_to_output):
+            return False
+
+        if hash_hex is not None:
+            _write_hash_sidecar(path_to_output, hash_name, hash_hex)
+
+        return True
+
+    def _gupk_put_cas(self, cas_key, path_to_output, hash_name):
+
+        '''
+        Supposed to be called internally only.
+        '''
+
+        self._gupk_cas.put(cas_key, path_to_output)
+
+        if hash_name is not None:
+            self._gupk_cas.put(
+                self._gupk_cas.make_key(cas_key, hash_name),
+                path_to_output.parents[0] / (
+                    f'{path_to_output.name}.{hash_name}'))
 
-            temp_file_path.unlink()
         return
+
+    def read_hash_sidecar(self, path_to_output, hash_name='sha256'):
+
+        '''
+        Read the hash of an unpacked file from its sidecar file.
+
+        Parameters
+        ----------
+        path_to_output : str or Path
+            Path of the unpacked file.
+        hash_name : str
+            Name of the hash that was used while unpacking.
+
+        Returns
+        -------
+        The hash as a hexadecimal string or None if the sidecar file does
+        not exist.
+        '''
+
+        assert isinstance(path_to_output, (str, Path)), (
+            f'path_to_ouput is not of the string or Path data type!')
+
+        assert isinstance(hash_name, str), (
+            f'hash_name not of the data type string!')
+
+        return _read_hash_sidecar(Path(path_to_output), hash_name)
+
+    def unpack_batch(
+            self,
+            inputs,
+            output_dir,
+            overwrite_flag=False,
+            n_cpus=1,
+            hash_name='sha256'):
+
+        '''
+        Unpack many archives using a process pool. Largest archives
+        are scheduled first. Each archive is unpacked by unpack so
+        the same check of the previous unsuccessful unpack applies.
+
+        A manifest of the completed outputs (input size, input
+        modification time, output size and output hash, if any) is kept
+        in the output directory
+        in a file named by the class variable _gupk_manifest_name. An
+        archive is skipped without opening it if its entry in the manifest
+        matches the current input and output and no temporary file of
+        an unsuccessful unpack exists.
+
+        The store set by set_cas_store, if any, is used by all the
+        processes.
+
+        Parameters
+        ----------
+        inputs : str or Path
+            A directory containing the archives (all files ending with
+            one of the extensions in the class variable _gupk_codec_exts
+            in it are taken) or a glob pattern e.g.
+            "/data/TOT_PRECIP.2D.*.grb.bz2".
+        output_dir : str or Path
+            The directory in which to unpack the archives. Must exist.
+            Output names are the input names without the last suffix
+            e.g. ".bz2".
+        overwrite_flag : bool
+            Whether to overwrite existing outputs. If True, the manifest
+            is not used to skip archives.
+        n_cpus : int
+            The number of processes. Each archive is unpacked serially
+            by a single process.
+        hash_name : str or None
+            See unpack.
+
+        Returns
+        -------
+        A list of namedtuples, one for each archive, with the attributes:
+        path_to_input, path_to_output, status ("unpacked", "skipped" or
+        "failed"), secs (time taken) and error (None or the error message).
+        '''
+
+        if self._vb:
+            print_sl()
+
+            print('Unpacking files in batch...')
+
+        assert isinstance(inputs, (str, Path)), (
+            f'inputs not of the data type string or Path!')
+
+        if Path(inputs).is_dir():
+            paths_to_input = [
+                path for path in Path(inputs).iterdir()
+                if path.suffix in self._gupk_codec_exts]
+
+        else:
+            paths_to_input = [Path(path) for path in glob.glob(str(inputs))]
+
+        paths_to_input = [path for path in paths_to_input if path.is_file()]
+
+        assert len(paths_to_input), f'No input files found for: {inputs}!'
+
+        assert isinstance(output_dir, (str, Path)), (
+            f'output_dir not of the data type string or Path!')
+
+        output_dir = Path(output_dir)
+
+        assert output_dir.exists(), f'output_dir does not exist!'
+
+        assert output_dir.is_dir(), f'output_dir is not a directory!'
+
+        assert isinstance(overwrite_flag, bool), (
+            f'overwrite_flag not of the boolean data type!')
+
+        assert isinstance(n_cpus, int), f'n_cpus not an integer!'
+
+        assert n_cpus > 0, f'n_cpus must be greater than zero!'
+
+        manifest_path = output_dir / self._gupk_manifest_name
+
+        manifest = read_manifest(manifest_path)
+        #======================================================================
+
+        results = []
+        mp_args = []
+        for path_to_input in paths_to_input:
+            path_to_output = output_dir / path_to_input.with_suffix('').name
+
+            input_stat = path_to_input.stat()
+
+            if (not overwrite_flag) and self._gupk_is_in_manifest(
+                manifest, input_stat, path_to_output):
+
+                results.append(_GUnpackRes(
+                    path_to_input, path_to_output, 'skipped', 0.0, None))
+
+                continue
+
+            mp_args.append((
+                path_to_input,
+                path_to_output,
+                overwrite_flag,
+                hash_name,
+                input_stat.st_size,
+                input_stat.st_mtime_ns,
+                self._gupk_cas))
+
+        # Largest first.
+        mp_args.sort(key=lambda mp_arg: mp_arg[4], reverse=True)
+
+        if self._vb:
+            print(
+                f'{len(results)} archives skipped, {len(mp_args)} '
+                f'to unpack using {n_cpus} processes.')
+        #======================================================================
+
+        if mp_args:
+            with ProcessPoolExecutor(max_workers=n_cpus) as mp_pool:
+                futures = [
+                    mp_pool.submit(_unpack_batch_file, mp_arg)
+                    for mp_arg in mp_args]
+
+                for future in as_completed(futures):
+                    (path_to_input,
+                     path_to_output,
+                     status,
+                     secs,
+                     error,
+                     input_size,
+                     input_mtime_ns,
+                     output_size) = future.result()
+
+                    result = _GUnpackRes(
+                        path_to_input, path_to_output, status, secs, error)
+
+                    results.append(result)
+
+                    if result.status != 'unpacked':
+                        print(
+                            f'WARNING: Could not unpack '
+                            f'{result.path_to_input}: {result.error}')
+
+                        continue
+
+                    if hash_name is not None:
+                        hash_hex = _read_hash_sidecar(
+                            result.path_to_output, hash_name)
+
+                    else:
+                        hash_hex = None
+
+                    # Read again, other processes may have updated it.
+                    with lock_manifest(manifest_path):
+                        manifest = read_manifest(manifest_path)
+
+                        manifest[result.path_to_output.name] = {
+                            'input_path': str(result.path_to_input),
+                            'input_size': input_size,
+                            'input_mtime_ns': input_mtime_ns,
+                            'output_size': output_size,
+                            'hash_name': hash_name,
+                            'hash': hash_hex,
+                            }
+
+                        write_manifest(manifest_path, manifest)
+
+        if self._vb:
+            for status in ('unpacked', 'skipped', 'failed'):
+                print(
+                    f'{status.capitalize()}:',
+                    sum([result.status == status for result in results]))
+
+            print_el()
+
+        return results
+
+    def _gupk_is_in_manifest(self, manifest, input_stat, path_to_output):
+
+        '''
+        Check if an output is recorded as complete in the manifest and
+        is still the same as was recorded, without opening any file.
+
+        Supposed to be called internally only.
+        '''
+
+        entry = manifest.get(path_to_output.name, None)
+
+        if entry is None:
+            return False
+
+        if ((entry['input_size'] != input_stat.st_size) or
+            (entry['input_mtime_ns'] != input_stat.st_mtime_ns)):
+
+            return False
+
+        temp_file_path = path_to_output.parents[0] / (
+            f'{path_to_output.name}.tmp')
+
+        if temp_file_path.exists() or (not path_to_output.exists()):
+            return False
+
+        return path_to_output.stat().st_size == entry['output_size']
+
+    def _gupk_get_codec(self, path_to_input):
+
+        '''
+        Get the format of an archive from its magic bytes.
+
+        Supposed to be called internally only.
+        '''
+
+        with open(path_to_input, 'rb') as f_in:
+            magic = f_in.read(8)
+
+        for codec, codec_magic in self._gupk_codec_magics:
+            if magic.startswith(codec_magic):
+                return codec
+
+        raise AssertionError(
+            f'Format of the file {path_to_input} is not among the '
+            f'supported ones: '
+            f'{[codec for codec, _ in self._gupk_codec_magics]}!')
+
+    def _gupk_get_hash_hdl(self, hash_name):
+
+        '''
+        Supposed to be called internally only.
+        '''
+
+        if hash_name is None:
+            return None
+
+        return hashlib.new(hash_name)
+
+    def _gupk_unpack_sl(self, path_to_input, path_to_output, codec, hash_hdl):
+
+        '''
+        Unpack an archive serially with a large reusable buffer. The hash
+        of the unpacked data is updated in the same pass, if hash_hdl is
+        not None.
+
+        Supposed to be called internally only.
+        '''
+
+        with open(path_to_input, 'rb', buffering=self._gupk_buff_size) as (
+            f_raw), open(path_to_output, 'wb') as f_out:
+
+            if codec == 'bz2':
+                f_in = bz2.BZ2File(f_raw, 'rb')
+
+            elif codec == 'gzip':
+                f_in = gzip.GzipFile(fileobj=f_raw, mode='rb')
+
+            elif codec == 'xz':
+                f_in = lzma.LZMAFile(f_raw, 'rb', format=lzma.FORMAT_XZ)
+
+            elif codec == 'lzma':
+                f_in = lzma.LZMAFile(f_raw, 'rb', format=lzma.FORMAT_ALONE)
+
+            else:
+                assert codec == 'zip', f'Unknown format: {codec}!'
+
+                zip_hdl = zipfile.ZipFile(f_raw, 'r')
+
+                zip_infos = [
+                    zip_info for zip_info in zip_hdl.infolist()
+                    if not zip_info.is_dir()]
+
+                assert len(zip_infos) == 1, (
+                    f'Zip archive should have exactly one file in it, '
+                    f'not {len(zip_infos)}!')
+
+                f_in = zip_hdl.open(zip_infos[0], 'r')
+
+            with f_in:
+                buff = bytearray(self._gupk_buff_size)
+                buff_view = memoryview(buff)
+
+                while True:
+                    n_bytes = f_in.readinto(buff)
+
+                    if not n_bytes:
+                        break
+
+                    f_out.write(buff_view[:n_bytes])
+
+                    if hash_hdl is not None:
+                        hash_hdl.update(buff_view[:n_bytes])
+
+        return
+
+    def _gupk_unpack_bz2_mp(
+            self,
+            path_to_input,
+            path_to_output,
+            strm_offsets,
+            n_cpus,
+            hash_hdl):
+
+        '''
+        Unpack the streams of a multi-stream bz2 archive in parallel.
+        Streams are grouped in to segments of contiguous bytes. The
+        decompressed segments are written to the output in order. At most
+        two segments per process are decompressed or waiting to be
+        written at a given time.
+
+        Supposed to be called internally only.
+        '''
+
+        file_size = path_to_input.stat().st_size
+
+        seg_size = max(
+            1, min(file_size // (4 * n_cpus), self._gupk_max_seg_size))
+
+        seg_brks = [0]
+        for strm_offset in strm_offsets[1:]:
+            if (strm_offset - seg_brks[-1]) >= seg_size:
+                seg_brks.append(strm_offset)
+
+        seg_brks.append(file_size)
+
+        mp_args = [
+            (str(path_to_input), beg, end)
+            for beg, end in zip(seg_brks[:-1], seg_brks[1:])]
+
+        max_pending = 2 * n_cpus
+
+        with ProcessPoolExecutor(max_workers=n_cpus) as mp_pool, open(
+            path_to_output, 'wb') as f_out:
+
+            futures = []
+            for mp_arg in mp_args:
+                futures.append(mp_pool.submit(_unpack_bz2_segment, mp_arg))
+
+                if len(futures) < max_pending:
+                    continue
+
+                seg_data = futures.pop(0).result()
+
+                f_out.write(seg_data)
+
+                if hash_hdl is not None:
+                    hash_hdl.update(seg_data)
+
+            for future in futures:
+                seg_data = future.result()
+
+                f_out.write(seg_data)
+
+                if hash_hdl is not None:
+                    hash_hdl.update(seg_data)
+
+        return
+
+
+def _write_hash_sidecar(path_to_output, hash_name, hash_hex):
+
+    '''
+    Write the hash of an output to its sidecar file in the format of
+    the sha256sum (or similar) utility.
+
+    Supposed to be called internally only.
+    '''
+
+    sidecar_path = path_to_output.parents[0] / (
+        f'{path_to_output.name}.{hash_name}')
+
+    with open(sidecar_path, 'w') as sidecar_hdl:
+        sidecar_hdl.write(f'{hash_hex}  {path_to_output.name}\n')
+
+    return
+
+
+def _read_hash_sidecar(path_to_output, hash_name):
+
+    '''
+    Read the hash of an output from its sidecar file. None is returned
+    if the sidecar file does not exist.
+
+    Supposed to be called internally only.
+    '''
+
+    sidecar_path = path_to_output.parents[0] / (
+        f'{path_to_output.name}.{hash_name}')
+
+    if not sidecar_path.exists():
+        return None
+
+    with open(sidecar_path, 'r') as sidecar_hdl:
+        hash_hex = sidecar_hdl.read().split()[0]
+
+    return hash_hex
+
+
+def _unpack_batch_file(args):
+
+    '''
+    Unpack a single archive of a batch.
+
+    Supposed to be called internally only, in a separate process.
+    '''
+
+    (path_to_input,
+     path_to_output,
+     overwrite_flag,
+     hash_name,
+     input_size,
+     input_mtime_ns,
+     cas_store) = args
+
+    beg_time = timeit.default_timer()
+
+    try:
+        unpack_cls = GUnpack(False)
+
+        unpack_cls.set_cas_store(cas_store)
+
+        unpack_cls.unpack(
+            path_to_input, path_to_output, overwrite_flag, 1, hash_name)
+
+        status = 'unpacked'
+        error = None
+        output_size = path_to_output.stat().st_size
+
+    except Exception as exc:
+        status = 'failed'
+        error = repr(exc)
+        output_size = None
+
+    return (
+        path_to_input,
+        path_to_output,
+        status,
+        timeit.default_timer() - beg_time,
+        error,
+        input_size,
+        input_mtime_ns,
+        output_size)
+
+
+def _get_file_hash(path_to_input, hash_name, buff_size):
+
+    '''
+    Get the hash of a file as a hexadecimal string.
+
+    Supposed to be called internally only.
+    '''
+
+    hash_hdl = hashlib.new(hash_name)
+
+    buff = bytearray(buff_size)
+    buff_view = memoryview(buff)
+
+    with open(path_to_input, 'rb', buffering=0) as f_in:
+        while True:
+            n_bytes = f_in.readinto(buff)
+
+            if not n_bytes:
+                break
+
+            hash_hdl.update(buff_view[:n_bytes])
+
+    return hash_hdl.hexdigest()
+
+
+# The start of a bz2 stream: stream header with block size followed by the
+# magic number of the first block.
+_bz2_strm_beg_patt = re.compile(rb'BZh[1-9]\x31\x41\x59\x26\x53\x59')
+
+
+def _get_bz2_stream_offsets(path_to_input):
+
+    '''
+    Get the byte offsets of the starts of all bz2 streams in a file.
+    The byte pattern may also occur inside a stream by chance. Such an
+    offset results in an incomplete stream during decompression.
+
+    Supposed to be called internally only.
+    '''
+
+    with open(path_to_input, 'rb') as f_in:
+        if not f_in.seek(0, 2):
+            return [0]
+
+        with mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            strm_offsets = [
+                match.start() for match in _bz2_strm_beg_patt.finditer(buf)]
+
+    if (not strm_offsets) or (strm_offsets[0] != 0):
+        return [0]
+
+    return strm_offsets
+
+
+def _unpack_bz2_segment(args):
+
+    '''
+    Decompress the bz2 streams in a byte range of a file. The range
+    should contain complete streams only. Otherwise an EOFError is
+    raised.
+
+    Supposed to be called internally only, in a separate process.
+    '''
+
+    path_to_input, beg, end = args
+
+    with open(path_to_input, 'rb') as f_in:
+        f_in.seek(beg)
+
+        data = f_in.read(end - beg)
+
+    out_data = []
+    while data:
+        decompressor = bz2.BZ2Decompressor()
+
+        out_data.append(decompressor.decompress(data))
+
+        if not decompressor.eof:
+            raise EOFError(
+                f'Incomplete bz2 stream in bytes {beg} to {end} of '
+                f'{path_to_input}!')
+
+        data = decompressor.unused_data
+
+    return b''.join(out_data)
@@ -7,3 +7,6 @@ Sep 16, 2021
 '''
 
 from .convert import GTCConvert
+from .batch import GTCBatch
+from .merge import GTCMerge
+from .store import GTCStore
@@ -0,0 +1,343 @@
+'''
+@author: Faizan3800X-Uni
+
+Oct 19, 2026
+
+7:05:18 PM
+'''
+import glob
+import timeit
+from pathlib import Path
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .convert import GTCConvert
+from .settings import GTCSettingsArgs, _apply_nc_args
+from ..misc import print_sl, print_el
+
+# A namedtuple object to hold the result of converting a file in a batch.
+# status is one of "converted", "skipped" or "failed".
+_GTCBatchRes = namedtuple(
+    'GTCBatchRes',
+    ['path_to_grib',
+     'path_to_nc',
+     'status',
+     'secs',
+     'error'])
+
+
+class GTCBatch(GTCSettingsArgs):
+
+    '''
+    Convert many GRIB files to netCDF4 using a process pool, with the same
+    settings for all of them.
+
+    The settings are validated once, in the main process. Each file is
+    converted by GTCConvert in a separate process, band by band (see
+    GTCConvert.convert_to_nc), with the largest files scheduled first.
+    The transformed cell corners of a grid are computed once per
+    process and used for all the files of the same grid, or once for all
+    the processes if a cache directory is set by set_nc_crds_transform.
+
+    Outputs that exist and whose temporary file of an unsuccessful
+    conversion does not exist are skipped without opening their GRIB
+    files, unless overwrite_flag is True.
+
+    How-To-Use
+    ----------
+    After initiating a GTCBatch object (batch_cls = GTCBatch(verbose)),
+    call set_inputs, set_outputs and set_nc_settings. Optionally call
+    set_nc_compression, set_nc_precision, set_nc_crds_transform and
+    set_nc_regrid. Call verify and then convert.
+
+    Last updated on: 2026-Oct-19
+    '''
+
+    def __init__(self, verbose=True):
+
+        assert isinstance(verbose, bool), (
+            f'verbose not of the boolean data type!')
+
+        GTCSettingsArgs.__init__(self, verbose)
+
+        self._gtcb_paths_to_grib = None
+
+        self._gtcb_nc_dir = None
+        self._gtcb_name_tmpl = None
+
+        self._gtcb_verify_flag = False
+        return
+
+    def set_inputs(self, inputs):
+
+        '''
+        Set the GRIB files to convert.
+
+        Parameters
+        ----------
+        inputs : str or Path
+            A glob pattern of the GRIB files e.g.
+            "/data/TOT_PRECIP.2D.*.grb".
+        '''
+
+        assert isinstance(inputs, (str, Path)), (
+            f'inputs not of the data type string or Path!')
+
+        paths_to_grib = sorted([
+            Path(path) for path in glob.glob(str(inputs))
+            if Path(path).is_file()])
+
+        assert len(paths_to_grib), f'No input files found for: {inputs}!'
+
+        self._gtcb_paths_to_grib = tuple(paths_to_grib)
+        return
+
+    def set_outputs(self, nc_dir, name_tmpl='{stem}.nc'):
+
+        '''
+        Set where and how to name the netCDF4 outputs.
+
+        Parameters
+        ----------
+        nc_dir : str or Path
+            The directory of the outputs. Must exist.
+        name_tmpl : str
+            The template of the output names. The fields "{stem}" (the
+            GRIB name without its last suffix) and "{name}" (the GRIB
+            name) are replaced for each file e.g. "{stem}.nc" or
+            "converted_{name}.nc".
+        '''
+
+        assert isinstance(nc_dir, (str, Path)), (
+            f'nc_dir not of the data type string or Path!')
+
+        nc_dir = Path(nc_dir)
+
+        assert nc_dir.exists(), f'nc_dir does not exist!'
+
+        assert nc_dir.is_dir(), f'nc_dir is not a directory!'
+
+        assert isinstance(name_tmpl, str), (
+            f'name_tmpl not of the data type string!')
+
+        assert ('{stem}' in name_tmpl) or ('{name}' in name_tmpl), (
+            f'name_tmpl should have the field "{{stem}}" or "{{name}}"!')
+
+        try:
+            name_tmpl.format(stem='stem', name='name')
+
+        except (KeyError, IndexError, ValueError) as exc:
+            raise AssertionError(
+                f'Invalid name_tmpl ({name_tmpl}): {exc!r}!')
+
+        self._gtcb_nc_dir = nc_dir
+        self._gtcb_name_tmpl = name_tmpl
+        return
+
+    def verify(self):
+
+        '''
+        Verify that all the inputs have been set correctly.
+        '''
+
+        if self._vb:
+            print_sl()
+
+            print('Verifying batch conversion inputs...')
+
+        assert self._gtcb_paths_to_grib is not None, (
+            f'Call set_inputs first!')
+
+        assert self._gtcb_nc_dir is not None, f'Call set_outputs first!'
+
+        assert 'set_nc_crs' in self._gtsa_nc_args, (
+            f'Call set_nc_settings first!')
+
+        paths_to_nc = [
+            self._gtcb_get_nc_path(path_to_grib)
+            for path_to_grib in self._gtcb_paths_to_grib]
+
+        assert len(set(paths_to_nc)) == len(paths_to_nc), (
+            f'name_tmpl gives the same output name to many inputs!')
+
+        assert not (
+            set(paths_to_nc) & set(self._gtcb_paths_to_grib)), (
+                f'An output would overwrite an input!')
+
+        self._gtcb_verify_flag = True
+
+        if self._vb:
+            print(f'Number of files: {len(self._gtcb_paths_to_grib)}')
+
+            print('Batch conversion inputs OK.')
+
+            print_el()
+
+        return
+
+    def convert(self, overwrite_flag=False, n_cpus=1):
+
+        '''
+        Convert all the GRIB files. Failures of single files are recorded
+        and do not stop the others.
+
+        Parameters
+        ----------
+        overwrite_flag : bool
+            Whether to overwrite existing outputs. Unsuccessful outputs
+            are overwritten regardless.
+        n_cpus : int
+            The number of processes.
+
+        Returns
+        -------
+        A list of namedtuples, one for each GRIB file in the order of
+        completion, with the attributes: path_to_grib, path_to_nc, status
+        ("converted", "skipped" or "failed"), secs (time taken) and error
+        (None or the error message).
+        '''
+
+        if self._vb:
+            print_sl()
+
+            print('Converting GRIB files in batch...')
+
+        assert self._gtcb_verify_flag, f'Call verify first!'
+
+        assert isinstance(overwrite_flag, bool), (
+            f'overwrite_flag not of the boolean data type!')
+
+        assert isinstance(n_cpus, int), f'n_cpus not an integer!'
+
+        assert n_cpus > 0, f'n_cpus must be greater than zero!'
+
+        beg_time = timeit.default_timer()
+
+        results = []
+        mp_args = []
+        for path_to_grib in self._gtcb_paths_to_grib:
+            path_to_nc = self._gtcb_get_nc_path(path_to_grib)
+
+            temp_file_path = path_to_nc.parents[0] / (
+                f'{path_to_nc.name}.tmp')
+
+            if ((not overwrite_flag) and
+                path_to_nc.exists() and
+                (not temp_file_path.exists())):
+
+                results.append(_GTCBatchRes(
+                    path_to_grib, path_to_nc, 'skipped', 0.0, None))
+
+                continue
+
+            mp_args.append((
+                path_to_grib,
+                path_to_nc,
+                self._gtsa_nc_args,
+                overwrite_flag))
+
+        # Largest first.
+        mp_args.sort(key=lambda mp_arg: mp_arg[0].stat().st_size, reverse=True)
+
+        if self._vb:
+            print(
+                f'{len(results)} files skipped, {len(mp_args)} to convert '
+                f'using {n_cpus} processes.')
+
+        if mp_args:
+            with ProcessPoolExecutor(max_workers=n_cpus) as mp_pool:
+                futures = [
+                    mp_pool.submit(_convert_batch_file, mp_arg)
+                    for mp_arg in mp_args]
+
+                for future in as_completed(futures):
+                    result = _GTCBatchRes(*future.result())
+
+                    results.append(result)
+
+                    if (result.status == 'failed') and self._vb:
+                        print(
+                            f'WARNING: Could not convert '
+                            f'{result.path_to_grib}: {result.error}')
+
+        if self._vb:
+            tot_secs = timeit.default_timer() - beg_time
+
+            for status in ('converted', 'skipped', 'failed'):
+                print(
+                    f'{status.capitalize()}:',
+                    sum([result.status == status for result in results]))
+
+            cnvt_secs = [
+                result.secs for result in results
+                if result.status == 'converted']
+
+            if cnvt_secs:
+                print(
+                    f'Seconds per converted file (min, mean, max): '
+                    f'{min(cnvt_secs):0.2f}, '
+                    f'{sum(cnvt_secs) / len(cnvt_secs):0.2f}, '
+                    f'{max(cnvt_secs):0.2f}')
+
+            print(f'Took {tot_secs:0.1f} seconds in total.')
+
+            print_el()
+
+        return results
+
+    def _gtcb_get_nc_path(self, path_to_grib):
+
+        '''
+        Supposed to be called internally only.
+        '''
+
+        return self._gtcb_nc_dir / self._gtcb_name_tmpl.format(
+            stem=path_to_grib.stem, name=path_to_grib.name)
+
+
+def _convert_batch_file(args):
+
+    '''
+    Convert a single GRIB file of a batch.
+
+    Supposed to be called internally only, in a separate process.
+    '''
+
+    (path_to_grib,
+     path_to_nc,
+     nc_args,
+     overwrite_flag) = args
+
+    beg_time = timeit.default_timer()
+
+    try:
+        cnvt_cls = GTCConvert(False)
+
+        cnvt_cls.set_path_to_grib(path_to_grib)
+
+        cnvt_cls.set_path_to_nc(path_to_nc)
+
+        _apply_nc_args(cnvt_cls, nc_args)
+
+        cnvt_cls.verify()
+
+        # Bands are decoded and written one at a time.
+        cnvt_cls.read_grib(data_flag=False)
+
+        cnvt_cls.convert_to_nc(overwrite_flag)
+
+        cnvt_cls.close_grib()
+
+        status = 'converted'
+        error = None
+
+    except Exception as exc:
+        status = 'failed'
+        error = repr(exc)
+
+    return (
+        path_to_grib,
+        path_to_nc,
+        status,
+        timeit.default_timer() - beg_time,
+        error)
@@ -5,13 +5,72 @@ Sep 16, 2021
 
 10:09:50 AM
 '''
+import os
+import json
+import shutil
+import timeit
+import zipfile
+import hashlib
+import threading
+import contextlib
+from pathlib import Path
+from collections import namedtuple, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
 import pyproj
 import numpy as np
 import netCDF4 as nc
 
 from ..grib import GRead as GR
+from ..grib import GSparseBands as GSB
 from ..misc import print_sl, print_el
-from .settings import GTCSettings as GTCS
+from .settings import GTCSettings as GTCS, _check_nc_compression
+from .regrid import (
+    _get_regrid_wts,
+    _apply_regrid_wts,
+    _load_regrid_wts,
+    _save_regrid_wts)
+from .store import (
+    _store_format,
+    _store_format_version,
+    _store_header_name,
+    _store_chunks_dir_name,
+    _write_store_chunk)
+
+# A namedtuple object to hold the measurements of a trial configuration
+# of the auto-tuner. The secs of reads are the mean of a single read.
+_GTCTuneRes = namedtuple(
+    'GTCTuneRes',
+    ['chunk_shape',
+     'codec',
+     'comp_level',
+     'shuffle_flag',
+     'write_secs',
+     'n_bytes',
+     'ts_read_secs',
+     'map_read_secs'])
+
+# Transformed cell corners of the recently converted grids, in this
+# process, with the least recently used first.
+_crnr_tfmd_crds_cache = OrderedDict()
+_crnr_tfmd_crds_cache_size = 4
+
+# Regridding weights of the recently converted grids, in this process,
+# with the least recently used first. Weights can be large, so their
+# total size is bounded as well. The most recent ones are always kept.
+_regrid_wts_cache = OrderedDict()
+_regrid_wts_cache_size = 4
+_regrid_wts_cache_max_bytes = 1024 ** 3
+
+# Transformers for the recently used pairs of source and target
+# coordinate systems, with the least recently used first. Creating one is
+# slow. pyproj keeps a copy of a transformer for each thread that uses it,
+# which is slow to create as well. Therefore, the threads that transform
+# are kept alive for a whole conversion, see
+# GTCConvert._gtcc_hold_thread_pools.
+_tfmrs = OrderedDict()
+_tfmrs_size = 8
+_tfm_lock = threading.Lock()
 
 
 class GTCConvert(GR, GTCS):
@@ -35,7 +94,8 @@ class GTCConvert(GR, GTCS):
     The attribute "shortname" is the value of GRIB_SHORT_NAME.
 
     2. The time variable is called "time". It has the supplied calendar
-    and time units.
+    and time units. The time dimension is unlimited so that the bands of
+    later GRIB files can be appended (see convert_to_nc).
 
     3. The cell center X and Y coordinates in the GRIB coordinates system
     are kept as 1D arrays in the variables "rX" and "rY" respectively.
@@ -50,7 +110,12 @@ class GTCConvert(GR, GTCS):
     transformed coordinate system will have a different area.
     Most probably.
 
-    Last updated on: 2021-Sep-23
+    5. If regridding is set (see set_nc_regrid), the data is on the
+    target grid instead. Its cell center X and Y coordinates are kept as
+    1D arrays in the variables "tX" and "tY", with the dimensions of the
+    same names. The variables "X" and "Y" do not exist then.
+
+    Last updated on: 2026-Oct-19
     '''
 
     # For 1D variables, having the same name for a netcdf dimension and
@@ -71,11 +136,52 @@ class GTCConvert(GR, GTCS):
 
     _sett_nc_time_lab = 'time'
 
+    # Cell centers of the target grid of regridding, as dimensions and
+    # variables.
+    _sett_nc_x_tgt_lab = 'tX'
+    _sett_nc_y_tgt_lab = 'tY'
+
+    # Goals of the auto-tuner and the measurements that they minimize.
+    _gtcc_tune_goals = {
+        'write': 'write_secs',
+        'size': 'n_bytes',
+        'ts_read': 'ts_read_secs',
+        'map_read': 'map_read_secs',
+        }
+
+    # Codec, level and shuffle candidates of the auto-tuner. Those not
+    # available in the netCDF4 build are skipped.
+    _gtcc_tune_codecs = (
+        (None, 0, False),
+        ('zlib', 1, False),
+        ('zlib', 1, True),
+        ('zlib', 6, True),
+        ('zstd', 3, True),
+        ('blosc_lz4', 5, False),
+        )
+
+    # Number of time series and maps read to time the reads.
+    _gtcc_tune_n_reads = 16
+
+    # Number of cell corners in a block of rows that a thread transforms.
+    _gtcc_tfm_blk_n_crnrs = 2 ** 20
+
+    # Number of bands to compute the real information of the bits with,
+    # for the "keep_info" precision.
+    _gtcc_info_n_sample_bands = 8
+
     def __init__(self, verbose=True):
 
         GR.__init__(self, verbose)
         GTCS.__init__(self, verbose)
 
+        # The "keep_info" fraction and the bits that keep it.
+        self._gtcc_keep_bits = None
+
+        # Pools of threads that transform and regrid, for each number of
+        # threads. Only exist during a conversion.
+        self._gtcc_thread_pools = None
+
         self._gtcc_verify_flag = False
         return
 
@@ -105,15 +211,45 @@ class GTCConvert(GR, GTCS):
 
         return
 
-    def convert_to_nc(self, overwrite_flag=False):
+    def convert_to_nc(
+            self,
+            overwrite_flag=False,
+            append_flag=False,
+            overlap_mode='skip'):
 
         '''
         Convert the GRIB file to netCDF4. Should be called after all the
         get_* methods are called and the grib is read by calling the
-        read_grib method. A temporary file is used to if the last file
-        creation attempt was successful, if made. This function has
-        two return statements. The format of the output netCDF4 is
-        described in the documentation of this class.
+        read_grib method.
+
+        If read_grib was called with data_flag set to False, the layout
+        of the netCDF4 is created from the metadata only and the bands are
+        decoded and written one time chunk at a time from the open handle.
+        The peak memory then does not depend on the number of time steps.
+        close_grib should be called after this method in that case.
+
+        A temporary file is used to if the last file creation attempt
+        was successful, if made. This function has three return statements.
+        The format of the output netCDF4 is described in the documentation
+        of this class.
+
+        The chunking and the compression of the data variable are the ones
+        set by set_nc_compression or tune_nc_compression. Its precision is
+        the one set by set_nc_precision.
+
+        If append_flag is True and the output exists, the bands are
+        appended to it along its unlimited time dimension instead. The
+        grid, the coordinate systems, the data variable and the time units
+        and calendar of the output have to match the ones of the GRIB.
+        Only the bands whose time stamps are not in the output are written
+        and they have to come after the last time stamp of the output.
+        An unsuccessful append is detected by the temporary file as well
+        and is done again from the same time step.
+
+        The time dimension of a new output is unlimited only if
+        append_flag is True, so that bands can be appended to it later.
+        Otherwise, it has the fixed length of the number of bands, which
+        is faster to read.
 
         Parameters
         ----------
@@ -121,7 +257,17 @@ class GTCConvert(GR, GTCS):
             Whether to overwrite an existing output file. Should be of the
             boolean data type. If a previous attempt was made that was
             unsuccessful, then the flag is force set to True and a new file
-            is created and written to.
+            is created and written to. This is not done if an append was
+            unsuccessful. An AssertionError is raised then, unless
+            append_flag or overwrite_flag is True.
+        append_flag : bool
+            Whether to append to an existing output file. If the output
+            does not exist or if overwrite_flag is True, a new output is
+            created that can be appended to.
+        overlap_mode : str
+            What to do with the bands whose time stamps are in the output
+            already while appending. Either "skip" (not written) or
+            "reject" (an AssertionError is raised).
         '''
 
         if self._vb:
@@ -132,15 +278,69 @@ class GTCConvert(GR, GTCS):
         assert self._sett_verify_flag, f'Call verify first!'
         assert self._gtcc_verify_flag, f'Call verify first!'
 
+        assert (self._gread_data is not None) or (
+            self._gread_handle is not None), (
+                f'No data was read and the handle to the GRIB file is '
+                f'closed. Call close_grib after convert_to_nc!')
+
         assert isinstance(overwrite_flag, bool), (
             f'overwrite_flag not of the boolen data type!')
+
+        assert isinstance(append_flag, bool), (
+            f'append_flag not of the boolen data type!')
+
+        assert overlap_mode in ('skip', 'reject'), (
+            f'overlap_mode can only be "skip" or "reject"!')
         #======================================================================
 
         # Used to determine if the file was converted correctly.
+        # While appending, it holds the time length of the output from
+        # before the append.
         temp_file_path = self._sett_path_to_nc.parents[0] / (
             f'{self._sett_path_to_nc.name}.tmp')
 
         if temp_file_path.exists():
+            temp_text = temp_file_path.read_text().strip()
+
+        else:
+            temp_text = None
+
+        if (append_flag and
+            (not overwrite_flag) and
+            self._sett_path_to_nc.exists() and
+            ((temp_text is None) or temp_text.isdigit())):
+
+            if temp_text is None:
+                n_steps_old = None
+
+            else:
+                n_steps_old = int(temp_text)
+
+                if self._vb:
+                    print(
+                        f'Previous append was unsuccessful. Appending '
+                        f'again from time step {n_steps_old}.')
+
+            with self._gtcc_hold_thread_pools():
+                n_steps_new = self._gtcc_append_to_nc(
+                    temp_file_path, n_steps_old, overlap_mode)
+
+            if temp_file_path.exists():
+                temp_file_path.unlink()
+
+            if self._vb:
+                print(f'Appended {n_steps_new} time steps successfully.')
+                print_el()
+
+            return
+
+        if temp_text is not None:
+            # The previous output would be lost otherwise.
+            assert overwrite_flag or (not temp_text.isdigit()), (
+                f'Previous append to the output was unsuccessful! Call '
+                f'again with append_flag set to True to finish it or with '
+                f'overwrite_flag set to True to replace the output.')
+
             overwrite_flag = True
 
         else:
@@ -160,163 +360,1534 @@ class GTCConvert(GR, GTCS):
         nc_hdl = nc.Dataset(str(self._sett_path_to_nc), mode='w')
 
         nc_hdl.set_auto_mask(False)
-        #======================================================================
 
-        nc_hdl.createDimension(
-            self._sett_nc_x_cntrs_dim_lab, self._gread_x_crds_cntrs.shape[0])
+        with self._gtcc_hold_thread_pools():
+            nc_var = self._gtcc_create_nc_layout(nc_hdl, append_flag)
 
-        nc_hdl.createDimension(
-            self._sett_nc_y_cntrs_dim_lab, self._gread_y_crds_cntrs.shape[0])
+            self._gtcc_write_nc_data(nc_var)
 
-        x_coords_grib = nc_hdl.createVariable(
-            self._sett_nc_x_cntrs_var_lab,
-            self._gread_x_crds_cntrs.dtype,
-            dimensions=(self._sett_nc_x_cntrs_dim_lab),
-            zlib=True)
+        nc_hdl.Source = str(self._gread_path_to_grib)
+        nc_hdl.close()
+        #======================================================================
 
-        y_coords_grib = nc_hdl.createVariable(
-            self._sett_nc_y_cntrs_var_lab,
-            self._gread_y_crds_cntrs.dtype,
-            dimensions=(self._sett_nc_y_cntrs_dim_lab),
-            zlib=True)
+        temp_file_path.unlink()
 
-        x_coords_grib[:] = self._gread_x_crds_cntrs
-        y_coords_grib[:] = self._gread_y_crds_cntrs
+        if self._vb:
+            print('Converted to netCDF4 successfully.')
+            print_el()
 
-        x_coords_grib.description = (
-            'Original GRIB X coordinates for cell centers.')
+        return
 
-        x_coords_grib.crs = self._gread_crs.ExportToWkt()
+    def convert_to_store(
+            self,
+            path_to_store,
+            chunk_shape=None,
+            comp_level=1,
+            n_threads=1,
+            overwrite_flag=False):
 
-        y_coords_grib.description = (
-            'Original GRIB Y coordinates for cell centers.')
+        '''
+        Convert the GRIB file to a chunked directory store, instead of a
+        netCDF4. See GTCStore for the format and for reading it. Should be
+        called after verify and read_grib. The netCDF4 settings for the
+        coordinate systems and the time apply, path_to_nc is not used.
 
-        y_coords_grib.crs = x_coords_grib.crs
-        #======================================================================
+        The bands are taken one time chunk at a time (decoded from the open
+        handle, if read_grib was called with data_flag set to False). The
+        chunks are compressed and written by n_threads threads, while the
+        next bands are taken. Only a few time chunks are in memory then.
 
-        nc_hdl.createDimension(
-            self._sett_nc_x_crnrs_dim_lab, self._gread_x_crds_crnrs.shape[0])
+        A temporary file next to the store is used to determine if the
+        last attempt was successful, the same way as in convert_to_nc.
 
-        nc_hdl.createDimension(
-            self._sett_nc_y_crnrs_dim_lab, self._gread_y_crds_crnrs.shape[0])
+        Parameters
+        ----------
+        path_to_store : str or Path
+            The path to the directory of the store. Its parent directory
+            must exist.
+        chunk_shape : tuple or None
+            The chunk shape as a tuple of three integers: (time, y, x).
+            Values larger than the dimensions are clipped to them. If None,
+            it is (1, number of rows, number of columns).
+        comp_level : int
+            The zlib compression level, from 0 to 9.
+        n_threads : int
+            The number of threads that compress and write the chunks.
+        overwrite_flag : bool
+            Whether to overwrite an existing store.
+        '''
 
-        x_coords_nc = nc_hdl.createVariable(
-            self._sett_nc_x_crnrs_var_lab,
-            self._gread_x_crds_crnrs.dtype,
-            zlib=True,
-            dimensions=(
-                self._sett_nc_y_crnrs_dim_lab, self._sett_nc_x_crnrs_dim_lab))
+        if self._vb:
+            print_sl()
+            print('Converting GRIB to chunked directory store...')
 
-        y_coords_nc = nc_hdl.createVariable(
-            self._sett_nc_y_crnrs_var_lab,
-            self._gread_y_crds_crnrs.dtype,
-            zlib=True,
-            dimensions=(
-                self._sett_nc_y_crnrs_dim_lab, self._sett_nc_x_crnrs_dim_lab))
+        assert self._gread_read_flag, f'Call read_grib first!'
+        assert self._sett_verify_flag, f'Call verify first!'
+        assert self._gtcc_verify_flag, f'Call verify first!'
 
-        tfmd_crds = self._get_crnr_tfmd_crds()
+        assert (self._gread_data is not None) or (
+            self._gread_handle is not None), (
+                f'No data was read and the handle to the GRIB file is '
+                f'closed. Call close_grib after convert_to_store!')
 
-        x_coords_nc[:,:] = tfmd_crds[0]
-        y_coords_nc[:,:] = tfmd_crds[1]
+        assert isinstance(path_to_store, (str, Path)), (
+            f'path_to_store not of the string or Path data type!')
 
-        del tfmd_crds
+        path_to_store = Path(path_to_store)
 
-        x_coords_nc.description = (
-            'Transformed GRIB X coordinates for cell corners.')
+        assert path_to_store.parents[0].exists(), (
+            f'Parent directory of path_to_store does not exist!')
 
-        x_coords_nc.crs = self._sett_nc_crs.ExportToWkt()
+        _check_nc_compression(chunk_shape, 'zlib', comp_level, False)
 
-        y_coords_nc.description = (
-            'Transformed GRIB Y coordinates for cell corners.')
+        assert isinstance(n_threads, int), f'n_threads not an integer!'
 
-        y_coords_nc.crs = x_coords_nc.crs
-        #======================================================================
+        assert n_threads > 0, f'n_threads must be greater than zero!'
 
-        nc_hdl.createDimension(
-            self._sett_nc_time_lab, self._gread_sp_props_orig.band_count)
+        assert isinstance(overwrite_flag, bool), (
+            f'overwrite_flag not of the boolen data type!')
+        #======================================================================
 
-        time_nc = nc_hdl.createVariable(
-            self._sett_nc_time_lab,
-            'i8',
-            dimensions=self._sett_nc_time_lab,
-            zlib=True)
+        temp_file_path = path_to_store.parents[0] / (
+            f'{path_to_store.name}.tmp')
 
-        time_nc[:] = nc.date2num(
-            self._gread_time_stamps,
-            units=self._sett_nc_units,
-            calendar=self._sett_nc_calendar)
+        if temp_file_path.exists():
+            overwrite_flag = True
 
-        time_nc.units = self._sett_nc_units
-        time_nc.calendar = self._sett_nc_calendar
-        #======================================================================
+        elif path_to_store.exists() and (not overwrite_flag):
+            if self._vb:
+                print('Output exists already.')
+                print_el()
 
-        keys_to_chk = [
-            'GRIB_ELEMENT', 'GRIB_UNIT', 'GRIB_COMMENT', 'GRIB_SHORT_NAME']
+            return
 
-        for key in keys_to_chk:
-            assert all([
-                key in meta_data
-                for meta_data in self._gread_meta_data]), (
-                    f'The key "{key}" missing in at least one '
-                    f'of the time steps in GRIB meta data!')
-        #======================================================================
+        if path_to_store.exists():
+            assert temp_file_path.exists() or (
+                path_to_store / _store_header_name).exists(), (
+                    f'path_to_store exists and is not a store!')
 
-        comp_level = 1
-        nc_var = nc_hdl.createVariable(
-            self._gread_meta_data[0]['GRIB_ELEMENT'],
-            self._gread_dtype,
-            fill_value=False,
-            compression='zlib',
-            complevel=comp_level,
-            chunksizes=(1,
-                        x_coords_nc.shape[0],
-                        x_coords_nc.shape[1]))
+        open(temp_file_path, 'w')
 
-        nc_var.units = self._gread_meta_data[0]['GRIB_UNIT']
-        nc_var.standard_name = self._gread_meta_data[0]['GRIB_COMMENT']
-        nc_var.short_name = self._gread_meta_data[0]['GRIB_SHORT_NAME']
+        if path_to_store.exists():
+            shutil.rmtree(path_to_store)
 
-        nc_var[:,:,:] = self._gread_data
+        (path_to_store / _store_chunks_dir_name).mkdir(parents=True)
         #======================================================================
 
-        nc_hdl.Source = str(self._gread_path_to_grib)
-        nc_hdl.close()
+        n_bands = self._gread_sp_props_orig.band_count
+        n_rows, n_cols = self._gtcc_get_out_grid_shape()
+
+        chunk_shape = self._gtcc_get_chunk_shape(chunk_shape, n_bands)
+
+        if self._sett_nc_regrid_method is None:
+            with self._gtcc_hold_thread_pools():
+                tfmd_crds = self._get_crnr_tfmd_crds()
+
+            np.save(path_to_store / 'X.npy', tfmd_crds[0])
+            np.save(path_to_store / 'Y.npy', tfmd_crds[1])
+
+            del tfmd_crds
+
+        # Chunks being compressed and written. Bounded, so that only a few
+        # time chunks are in memory.
+        futures = deque()
+        with self._gtcc_hold_thread_pools(), ThreadPoolExecutor(
+            max_workers=n_threads) as thread_pool:
+
+            for time_beg in range(0, n_bands, chunk_shape[0]):
+                bands = self._gtcc_get_bands(range(
+                    time_beg, min(time_beg + chunk_shape[0], n_bands)))
+
+                for row_beg in range(0, n_rows, chunk_shape[1]):
+                    for col_beg in range(0, n_cols, chunk_shape[2]):
+                        futures.append(thread_pool.submit(
+                            _write_store_chunk,
+                            (path_to_store,
+                             (time_beg // chunk_shape[0],
+                              row_beg // chunk_shape[1],
+                              col_beg // chunk_shape[2]),
+                             bands[:,
+                                   row_beg:row_beg + chunk_shape[1],
+                                   col_beg:col_beg + chunk_shape[2]],
+                             comp_level)))
+
+                        while len(futures) > (2 * n_threads):
+                            futures.popleft().result()
+
+                del bands
+
+            while futures:
+                futures.popleft().result()
+
+        meta_data = self._gread_meta_data[0]
+
+        header = {
+            'format': _store_format,
+            'format_version': _store_format_version,
+            'shape': [n_bands, n_rows, n_cols],
+            'dtype': self._gtcc_get_out_dtype().str,
+            'chunk_shape': list(chunk_shape),
+            'codec': 'zlib',
+            'comp_level': comp_level,
+            'var_name': meta_data['GRIB_ELEMENT'],
+            'units': meta_data['GRIB_UNIT'],
+            'standard_name': meta_data['GRIB_COMMENT'],
+            'short_name': meta_data['GRIB_SHORT_NAME'],
+            self._sett_nc_x_cntrs_var_lab: (
+                self._gread_x_crds_cntrs.tolist()),
+            self._sett_nc_y_cntrs_var_lab: (
+                self._gread_y_crds_cntrs.tolist()),
+            'crs': self._gread_crs.ExportToWkt(),
+            'nc_crs': self._sett_nc_crs.ExportToWkt(),
+            'time_units': self._sett_nc_units,
+            'time_calendar': self._sett_nc_calendar,
+            'time_values': np.asarray(nc.date2num(
+                self._gread_time_stamps,
+                units=self._sett_nc_units,
+                calendar=self._sett_nc_calendar)).tolist(),
+            'source': str(self._gread_path_to_grib),
+            }
+
+        fill_value = self._gtcc_get_out_fill_value()
+
+        if fill_value is not None:
+            header['fill_value'] = fill_value.item()
+
+        if self._sett_nc_regrid_method is not None:
+            header[self._sett_nc_x_tgt_lab] = (
+                self._sett_nc_regrid_x_crds.tolist())
+
+            header[self._sett_nc_y_tgt_lab] = (
+                self._sett_nc_regrid_y_crds.tolist())
+
+            header['regrid_method'] = self._sett_nc_regrid_method
+
+        # Written last. A store without a header is not complete.
+        with open(path_to_store / _store_header_name, 'w') as json_hdl:
+            json.dump(header, json_hdl, indent=1)
         #======================================================================
 
         temp_file_path.unlink()
 
         if self._vb:
-            print('Converted to netCDF4 successfully.')
+            print('Converted to chunked directory store successfully.')
             print_el()
 
         return
 
-    def _get_crnr_tfmd_crds(self):
+    def tune_nc_compression(self, goal, n_sample_bands=24):
 
         '''
-        Supposed to be called internally only.
+        Find the chunking and the compression that suit a goal best, by
+        trying candidate configurations on a sample of the bands, and set
+        it by calling set_nc_compression. Should be called after verify
+        and read_grib and before convert_to_nc.
+
+        The sample is a block of consecutive bands from the middle of the
+        file. Each candidate is a combination of a chunk shape (one time
+        step with the whole grid, all sample time steps with small tiles
+        or something in between) and a codec, level and shuffle from the
+        class variable _gtcc_tune_codecs. The sample is written to a
+        temporary netCDF4 next to the output for each one and the write
+        time, the file size and the mean times to read the time series of
+        a cell and a map are measured.
+
+        Parameters
+        ----------
+        goal : str
+            One of "write" (write time), "size" (file size), "ts_read"
+            (read time of the time series of a cell) and "map_read" (read
+            time of a map).
+        n_sample_bands : int
+            The number of bands to try the configurations on. Also the
+            time length of the chunks that span many time steps.
+
+        Returns
+        -------
+        A list of namedtuples, one for each candidate that could be tried,
+        sorted by the measurement of the goal with the best first. The
+        attributes are: chunk_shape, codec, comp_level, shuffle_flag,
+        write_secs, n_bytes, ts_read_secs and map_read_secs.
         '''
 
-        assert self._gread_read_flag, f'Call read_grib first'
+        if self._vb:
+            print_sl()
+
+            print('Tuning netCDF4 chunking and compression...')
+
+        assert self._gread_read_flag, f'Call read_grib first!'
         assert self._sett_verify_flag, f'Call verify first!'
         assert self._gtcc_verify_flag, f'Call verify first!'
 
-        x_crds_mesh_grib, y_crds_mesh_grib = np.meshgrid(
-            self._gread_x_crds_crnrs, self._gread_y_crds_crnrs)
+        assert goal in self._gtcc_tune_goals, (
+            f'goal not among the valid ones: '
+            f'{tuple(self._gtcc_tune_goals)}!')
 
-        tfmr = pyproj.Transformer.from_crs(
-            self._gread_crs.ExportToWkt(),
-            self._sett_nc_crs.ExportToWkt(),
-            always_xy=True)
+        assert isinstance(n_sample_bands, int), (
+            f'n_sample_bands not an integer!')
 
-        x_crds_mesh_nc, y_crds_mesh_nc = tfmr.transform(
-            x_crds_mesh_grib, y_crds_mesh_grib)
+        assert n_sample_bands > 0, (
+            f'n_sample_bands must be greater than zero!')
 
-        assert (
-            np.all(np.isfinite(x_crds_mesh_nc)) and
-            np.all(np.isfinite(y_crds_mesh_nc))), (
-                f'Invalid transformed coordinates!')
+        n_bands = self._gread_sp_props_orig.band_count
 
-        return x_crds_mesh_nc, y_crds_mesh_nc
+        n_sample_bands = min(n_sample_bands, n_bands)
 
-    __verify = verify
+        beg = (n_bands - n_sample_bands) // 2
+
+        n_rows, n_cols = self._gtcc_get_out_grid_shape()
+
+        chunk_shapes = (
+            (1, n_rows, n_cols),
+            (n_sample_bands, min(n_rows, 16), min(n_cols, 16)),
+            (min(n_sample_bands, 8),
+             max(1, -(-n_rows // 4)),
+             max(1, -(-n_cols // 4))),
+            )
+
+        path_to_trial = self._sett_path_to_nc.parents[0] / (
+            f'{self._sett_path_to_nc.name}.tune.nc')
+
+        rng = np.random.default_rng(0)
+
+        n_reads = self._gtcc_tune_n_reads
+
+        read_cells = list(zip(
+            rng.integers(0, n_rows, n_reads).tolist(),
+            rng.integers(0, n_cols, n_reads).tolist()))
+
+        read_steps = rng.integers(0, n_sample_bands, n_reads).tolist()
+
+        tune_ress = []
+        with self._gtcc_hold_thread_pools():
+            sample = self._gtcc_get_bands(range(beg, beg + n_sample_bands))
+
+            for chunk_shape in dict.fromkeys(chunk_shapes):
+                for codec, comp_level, shuffle_flag in self._gtcc_tune_codecs:
+                    try:
+                        tune_ress.append(self._gtcc_try_nc_config(
+                            path_to_trial,
+                            sample,
+                            chunk_shape,
+                            codec,
+                            comp_level,
+                            shuffle_flag,
+                            read_cells,
+                            read_steps))
+
+                    except (RuntimeError, ValueError) as exc:
+                        if self._vb:
+                            print(
+                                f'Could not try codec {codec}, skipping it: '
+                                f'{exc!r}')
+
+                    finally:
+                        if path_to_trial.exists():
+                            os.remove(path_to_trial)
+
+        assert len(tune_ress), f'Could not try any configuration!'
+
+        goal_attr = self._gtcc_tune_goals[goal]
+
+        tune_ress.sort(key=lambda tune_res: getattr(tune_res, goal_attr))
+
+        best_res = tune_ress[0]
+
+        self.set_nc_compression(
+            best_res.chunk_shape,
+            best_res.codec,
+            best_res.comp_level,
+            best_res.shuffle_flag)
+
+        if self._vb:
+            print(f'Goal: {goal}')
+            print(f'Sample: {n_sample_bands} bands from band {beg}')
+
+            print(
+                f'{"chunk_shape":>20s} {"codec":>10s} {"lvl":>3s} '
+                f'{"shfl":>4s} {"write_s":>8s} {"MiB":>8s} '
+                f'{"ts_ms":>8s} {"map_ms":>8s}')
+
+            for tune_res in tune_ress:
+                print(
+                    f'{str(tune_res.chunk_shape):>20s} '
+                    f'{str(tune_res.codec):>10s} '
+                    f'{tune_res.comp_level:>3d} '
+                    f'{str(tune_res.shuffle_flag)[0]:>4s} '
+                    f'{tune_res.write_secs:>8.3f} '
+                    f'{tune_res.n_bytes / 1024 ** 2:>8.2f} '
+                    f'{tune_res.ts_read_secs * 1e3:>8.2f} '
+                    f'{tune_res.map_read_secs * 1e3:>8.2f}')
+
+            print(
+                f'Set: chunk_shape={best_res.chunk_shape}, '
+                f'codec={best_res.codec}, '
+                f'comp_level={best_res.comp_level}, '
+                f'shuffle_flag={best_res.shuffle_flag}')
+
+            print_el()
+
+        return tune_ress
+
+    def _gtcc_try_nc_config(
+            self,
+            path_to_trial,
+            sample,
+            chunk_shape,
+            codec,
+            comp_level,
+            shuffle_flag,
+            read_cells,
+            read_steps):
+
+        '''
+        Write sample to path_to_trial with a configuration and measure it.
+
+        Supposed to be called internally only.
+        '''
+
+        beg_time = timeit.default_timer()
+
+        with nc.Dataset(str(path_to_trial), mode='w') as nc_hdl:
+            for dim_lab, dim_len in zip(
+                (self._sett_nc_time_lab,
+                 self._sett_nc_y_cntrs_dim_lab,
+                 self._sett_nc_x_cntrs_dim_lab),
+                sample.shape):
+
+                nc_hdl.createDimension(dim_lab, dim_len)
+
+            nc_var = nc_hdl.createVariable(
+                'data',
+                sample.dtype,
+                dimensions=(
+                    self._sett_nc_time_lab,
+                    self._sett_nc_y_cntrs_dim_lab,
+                    self._sett_nc_x_cntrs_dim_lab),
+                fill_value=False,
+                compression=codec,
+                complevel=comp_level,
+                shuffle=shuffle_flag,
+                chunksizes=chunk_shape,
+                **self._gtcc_get_nc_precision_args())
+
+            nc_var[:,:,:] = sample
+
+        write_secs = timeit.default_timer() - beg_time
+
+        n_bytes = path_to_trial.stat().st_size
+
+        # Opened again for each kind so that no chunk is in the cache
+        # from before.
+        with nc.Dataset(str(path_to_trial), mode='r') as nc_hdl:
+            nc_var = nc_hdl['data']
+
+            beg_time = timeit.default_timer()
+
+            for row, col in read_cells:
+                nc_var[:, row, col]
+
+            ts_read_secs = (
+                (timeit.default_timer() - beg_time) / len(read_cells))
+
+        with nc.Dataset(str(path_to_trial), mode='r') as nc_hdl:
+            nc_var = nc_hdl['data']
+
+            beg_time = timeit.default_timer()
+
+            for step in read_steps:
+                nc_var[step,:,:]
+
+            map_read_secs = (
+                (timeit.default_timer() - beg_time) / len(read_steps))
+
+        return _GTCTuneRes(
+            chunk_shape,
+            codec,
+            comp_level,
+            shuffle_flag,
+            write_secs,
+            n_bytes,
+            ts_read_secs,
+            map_read_secs)
+
+    def _gtcc_get_bands(self, band_idxs):
+
+        '''
+        Get the bands at the indices band_idxs (a sequence of integers) as
+        a dense 3D array from what read_grib read or from the open handle.
+
+        Supposed to be called internally only.
+        '''
+
+        if self._sett_nc_regrid_method is not None:
+            regrid_wts = self._gtcc_get_regrid_wts()
+
+            thread_pool = self._gtcc_get_thread_pool(
+                self._sett_nc_regrid_n_threads)
+
+            nodata_value = self._gtcc_get_int_nodata_value()
+
+            bands = []
+            for i in band_idxs:
+                # One band is dense on the GRIB grid at a time.
+                band = self._gtcc_get_bands_grib([i])[0]
+
+                if nodata_value is not None:
+                    # NaNs, so that they are not taken as values.
+                    band = np.where(
+                        band == nodata_value,
+                        np.nan,
+                        band.astype(self._gtcc_get_out_dtype()))
+
+                bands.append(_apply_regrid_wts(
+                    band,
+                    regrid_wts,
+                    thread_pool,
+                    self._sett_nc_regrid_n_threads))
+
+            return np.stack(bands)
+
+        return self._gtcc_get_bands_grib(band_idxs)
+
+    def _gtcc_get_bands_grib(self, band_idxs):
+
+        '''
+        Get the bands at the indices band_idxs on the GRIB grid.
+
+        Supposed to be called internally only.
+        '''
+
+        if isinstance(self._gread_data, GSB):
+            return np.stack(
+                [self._gread_data.get_band(i) for i in band_idxs])
+
+        elif self._gread_data is not None:
+            band_idxs = list(band_idxs)
+
+            # A view, if the bands are consecutive.
+            if np.all(np.diff(band_idxs) == 1):
+                return np.asarray(
+                    self._gread_data[band_idxs[0]:band_idxs[-1] + 1])
+
+            return np.asarray(self._gread_data[band_idxs])
+
+        return np.stack([self.read_band_grib(i) for i in band_idxs])
+
+    def _gtcc_get_out_grid_shape(self):
+
+        '''
+        Get the grid shape of the output i.e. that of the target grid if
+        regridding and that of the GRIB otherwise.
+
+        Supposed to be called internally only.
+        '''
+
+        if self._sett_nc_regrid_method is None:
+            return self._gread_grid_shape
+
+        return (
+            self._sett_nc_regrid_y_crds.shape[0],
+            self._sett_nc_regrid_x_crds.shape[0])
+
+    def _gtcc_get_out_dtype(self):
+
+        '''
+        Get the data type of the output. Regridded data is floating point.
+
+        Supposed to be called internally only.
+        '''
+
+        if self._sett_nc_regrid_method is None:
+            return self._gread_dtype
+
+        return np.result_type(self._gread_dtype, np.float32)
+
+    def _gtcc_get_int_nodata_value(self):
+
+        '''
+        Get the NoData value of the GRIB bands if they are of an integer
+        data type. Their NoData cells have it instead of NaNs. None is
+        returned for floating point data or if there is no NoData value.
+
+        Supposed to be called internally only.
+        '''
+
+        if self._gread_dtype.kind == 'f':
+            return None
+
+        nodata_values = set([
+            nodata_value
+            for nodata_value in self._gread_nodata_values
+            if nodata_value is not None])
+
+        if not nodata_values:
+            return None
+
+        assert len(nodata_values) == 1, (
+            f'Bands of the GRIB have different NoData values '
+            f'({sorted(nodata_values)})!')
+
+        nodata_value = nodata_values.pop()
+
+        assert np.array(nodata_value).astype(
+            self._gread_dtype) == nodata_value, (
+                f'NoData value ({nodata_value}) not representable in the '
+                f'data type of the GRIB ({self._gread_dtype})!')
+
+        return self._gread_dtype.type(nodata_value)
+
+    def _gtcc_get_out_fill_value(self):
+
+        '''
+        Get the fill value of the data variable of the output. It is the
+        NoData value of integer data that is not regridded. None is
+        returned otherwise, NoData cells are NaNs then.
+
+        Supposed to be called internally only.
+        '''
+
+        if self._sett_nc_regrid_method is not None:
+            return None
+
+        return self._gtcc_get_int_nodata_value()
+
+    def _gtcc_get_out_dim_labs(self):
+
+        '''
+        Get the Y and X dimensions of the data variable of the output.
+
+        Supposed to be called internally only.
+        '''
+
+        if self._sett_nc_regrid_method is None:
+            return (
+                self._sett_nc_y_cntrs_dim_lab, self._sett_nc_x_cntrs_dim_lab)
+
+        return (self._sett_nc_y_tgt_lab, self._sett_nc_x_tgt_lab)
+
+    def _gtcc_get_regrid_wts(self):
+
+        '''
+        Get the weights of regridding from the GRIB grid to the target
+        grid. They are cached in the process and on disk if a directory
+        was set by set_nc_regrid.
+
+        The target cell centers (or the points of the target cells, for
+        the conservative method) are transformed to the GRIB coordinate
+        system the same way as the cell corners.
+
+        Supposed to be called internally only.
+        '''
+
+        src_wkt = self._gread_crs.ExportToWkt()
+        tgt_wkt = self._sett_nc_crs.ExportToWkt()
+
+        method = self._sett_nc_regrid_method
+
+        n_sub = self._sett_nc_regrid_n_sub if method == 'conservative' else 1
+
+        src_x_crds = self._gread_x_crds_cntrs.astype(np.float64)
+        src_y_crds = self._gread_y_crds_cntrs.astype(np.float64)
+
+        tgt_x_crds = self._sett_nc_regrid_x_crds
+        tgt_y_crds = self._sett_nc_regrid_y_crds
+
+        hash_hdl = hashlib.sha256()
+        for part in (
+            src_wkt.encode(),
+            tgt_wkt.encode(),
+            f'{method} {n_sub}'.encode(),
+            str((src_x_crds.shape, src_y_crds.shape)).encode(),
+            src_x_crds,
+            src_y_crds,
+            str((tgt_x_crds.shape, tgt_y_crds.shape)).encode(),
+            tgt_x_crds,
+            tgt_y_crds):
+
+            hash_hdl.update(part)
+
+        cache_key = hash_hdl.hexdigest()
+
+        tgt_shape = (tgt_y_crds.shape[0], tgt_x_crds.shape[0])
+        n_src = src_x_crds.shape[0] * src_y_crds.shape[0]
+
+        if cache_key in _regrid_wts_cache:
+            _regrid_wts_cache.move_to_end(cache_key)
+
+            return _regrid_wts_cache[cache_key]
+
+        regrid_wts = None
+
+        if self._sett_nc_regrid_wts_dir is not None:
+            path_to_wts = self._sett_nc_regrid_wts_dir / (
+                f'regrid_wts_{cache_key}.npz')
+
+            regrid_wts = _load_regrid_wts(path_to_wts, tgt_shape, n_src)
+
+            if (regrid_wts is not None) and self._vb:
+                print(f'Read regridding weights from {path_to_wts}.')
+
+        if regrid_wts is None:
+            pts_x_crds = tgt_x_crds
+            pts_y_crds = tgt_y_crds
+
+            if n_sub > 1:
+                # Points at the centers of n_sub by n_sub parts of a cell.
+                sub_offs = (((np.arange(n_sub) + 0.5) / n_sub) - 0.5)
+
+                pts_x_crds = (tgt_x_crds[:, None] + (
+                    sub_offs[None,:] * (tgt_x_crds[1] - tgt_x_crds[0]))
+                    ).ravel()
+
+                pts_y_crds = (tgt_y_crds[:, None] + (
+                    sub_offs[None,:] * (tgt_y_crds[1] - tgt_y_crds[0]))
+                    ).ravel()
+
+            pts_x_crds, pts_y_crds = self._gtcc_tfm_crnr_crds(
+                tgt_wkt, src_wkt, pts_x_crds, pts_y_crds)
+
+            regrid_wts = _get_regrid_wts(
+                src_x_crds, src_y_crds, pts_x_crds, pts_y_crds, method, n_sub)
+
+            del pts_x_crds, pts_y_crds
+
+            if self._sett_nc_regrid_wts_dir is not None:
+                _save_regrid_wts(path_to_wts, regrid_wts)
+
+            if self._vb:
+                print(
+                    f'Computed {regrid_wts.cols.size} {method} regridding '
+                    f'weights for {tgt_shape} target cells.')
+
+        _regrid_wts_cache[cache_key] = regrid_wts
+
+        while (len(_regrid_wts_cache) > 1) and (
+            (len(_regrid_wts_cache) > _regrid_wts_cache_size) or
+            (sum([
+                _get_regrid_wts_n_bytes(cached_wts)
+                for cached_wts in _regrid_wts_cache.values()]) >
+             _regrid_wts_cache_max_bytes)):
+
+            _regrid_wts_cache.popitem(last=False)
+
+        return regrid_wts
+
+    def _gtcc_get_chunk_shape(self, chunk_shape, n_steps):
+
+        '''
+        Get the chunk shape of the data variable, for n_steps time steps,
+        with the values clipped to the dimensions.
+
+        Supposed to be called internally only.
+        '''
+
+        n_rows, n_cols = self._gtcc_get_out_grid_shape()
+
+        if chunk_shape is None:
+            return (1, n_rows, n_cols)
+
+        return (
+            min(chunk_shape[0], max(1, n_steps)),
+            min(chunk_shape[1], n_rows),
+            min(chunk_shape[2], n_cols))
+
+    def _gtcc_create_nc_layout(self, nc_hdl, unlimited_flag):
+
+        '''
+        Create the dimensions, the coordinates, the time and the data
+        variable in nc_hdl using the spatial properties, the metadata and
+        the time stamps only. No band data is needed. The time dimension
+        is unlimited if unlimited_flag is True.
+
+        Supposed to be called internally only.
+
+        Returns
+        -------
+        The data variable.
+        '''
+
+        nc_hdl.createDimension(
+            self._sett_nc_x_cntrs_dim_lab, self._gread_x_crds_cntrs.shape[0])
+
+        nc_hdl.createDimension(
+            self._sett_nc_y_cntrs_dim_lab, self._gread_y_crds_cntrs.shape[0])
+
+        x_coords_grib = nc_hdl.createVariable(
+            self._sett_nc_x_cntrs_var_lab,
+            self._gread_x_crds_cntrs.dtype,
+            dimensions=(self._sett_nc_x_cntrs_dim_lab),
+            zlib=True)
+
+        y_coords_grib = nc_hdl.createVariable(
+            self._sett_nc_y_cntrs_var_lab,
+            self._gread_y_crds_cntrs.dtype,
+            dimensions=(self._sett_nc_y_cntrs_dim_lab),
+            zlib=True)
+
+        x_coords_grib[:] = self._gread_x_crds_cntrs
+        y_coords_grib[:] = self._gread_y_crds_cntrs
+
+        x_coords_grib.description = (
+            'Original GRIB X coordinates for cell centers.')
+
+        x_coords_grib.crs = self._gread_crs.ExportToWkt()
+
+        y_coords_grib.description = (
+            'Original GRIB Y coordinates for cell centers.')
+
+        y_coords_grib.crs = x_coords_grib.crs
+        #======================================================================
+
+        if self._sett_nc_regrid_method is None:
+            nc_hdl.createDimension(
+                self._sett_nc_x_crnrs_dim_lab,
+                self._gread_x_crds_crnrs.shape[0])
+
+            nc_hdl.createDimension(
+                self._sett_nc_y_crnrs_dim_lab,
+                self._gread_y_crds_crnrs.shape[0])
+
+            x_coords_nc = nc_hdl.createVariable(
+                self._sett_nc_x_crnrs_var_lab,
+                self._gread_x_crds_crnrs.dtype,
+                zlib=True,
+                dimensions=(
+                    self._sett_nc_y_crnrs_dim_lab,
+                    self._sett_nc_x_crnrs_dim_lab))
+
+            y_coords_nc = nc_hdl.createVariable(
+                self._sett_nc_y_crnrs_var_lab,
+                self._gread_y_crds_crnrs.dtype,
+                zlib=True,
+                dimensions=(
+                    self._sett_nc_y_crnrs_dim_lab,
+                    self._sett_nc_x_crnrs_dim_lab))
+
+            tfmd_crds = self._get_crnr_tfmd_crds()
+
+            x_coords_nc[:,:] = tfmd_crds[0]
+            y_coords_nc[:,:] = tfmd_crds[1]
+
+            del tfmd_crds
+
+            x_coords_nc.description = (
+                'Transformed GRIB X coordinates for cell corners.')
+
+            x_coords_nc.crs = self._sett_nc_crs.ExportToWkt()
+
+            y_coords_nc.description = (
+                'Transformed GRIB Y coordinates for cell corners.')
+
+            y_coords_nc.crs = x_coords_nc.crs
+
+        else:
+            # Cell centers of the target grid, 1D. The cell corners of the
+            # GRIB grid do not apply.
+            for dim_lab, crds, axis_lab in (
+                (self._sett_nc_x_tgt_lab, self._sett_nc_regrid_x_crds, 'X'),
+                (self._sett_nc_y_tgt_lab, self._sett_nc_regrid_y_crds, 'Y')):
+
+                nc_hdl.createDimension(dim_lab, crds.shape[0])
+
+                coords_tgt = nc_hdl.createVariable(
+                    dim_lab, crds.dtype, dimensions=(dim_lab), zlib=True)
+
+                coords_tgt[:] = crds
+
+                coords_tgt.description = (
+                    f'Regridded {axis_lab} coordinates for cell centers.')
+
+                coords_tgt.crs = self._sett_nc_crs.ExportToWkt()
+                coords_tgt.regrid_method = self._sett_nc_regrid_method
+        #======================================================================
+
+        if unlimited_flag:
+            # So that bands can be appended later.
+            nc_hdl.createDimension(self._sett_nc_time_lab, None)
+
+        else:
+            nc_hdl.createDimension(
+                self._sett_nc_time_lab, self._gread_sp_props_orig.band_count)
+
+        time_nc = nc_hdl.createVariable(
+            self._sett_nc_time_lab,
+            'i8',
+            dimensions=self._sett_nc_time_lab,
+            zlib=True)
+
+        time_nc[:self._gread_sp_props_orig.band_count] = nc.date2num(
+            self._gread_time_stamps,
+            units=self._sett_nc_units,
+            calendar=self._sett_nc_calendar)
+
+        time_nc.units = self._sett_nc_units
+        time_nc.calendar = self._sett_nc_calendar
+        #======================================================================
+
+        keys_to_chk = [
+            'GRIB_ELEMENT', 'GRIB_UNIT', 'GRIB_COMMENT', 'GRIB_SHORT_NAME']
+
+        for key in keys_to_chk:
+            assert all([
+                key in meta_data
+                for meta_data in self._gread_meta_data]), (
+                    f'The key "{key}" missing in at least one '
+                    f'of the time steps in GRIB meta data!')
+        #======================================================================
+
+        fill_value = self._gtcc_get_out_fill_value()
+
+        nc_var = nc_hdl.createVariable(
+            self._gread_meta_data[0]['GRIB_ELEMENT'],
+            self._gtcc_get_out_dtype(),
+            dimensions=(
+                (self._sett_nc_time_lab,) + self._gtcc_get_out_dim_labs()),
+            # NoData cells of integer data have it, so that they are
+            # masked when read.
+            fill_value=False if fill_value is None else fill_value,
+            compression=self._sett_nc_codec,
+            complevel=self._sett_nc_comp_level,
+            shuffle=self._sett_nc_shuffle_flag,
+            chunksizes=self._gtcc_get_chunk_shape(
+                self._sett_nc_chunk_shape,
+                self._gread_sp_props_orig.band_count),
+            **self._gtcc_get_nc_precision_args())
+
+        nc_var.units = self._gread_meta_data[0]['GRIB_UNIT']
+        nc_var.standard_name = self._gread_meta_data[0]['GRIB_COMMENT']
+        nc_var.short_name = self._gread_meta_data[0]['GRIB_SHORT_NAME']
+
+        if self._sett_nc_precision_mode is not None:
+            nc_var.precision_mode = self._sett_nc_precision_mode
+            nc_var.precision_value = self._sett_nc_precision_value
+
+            if self._sett_nc_precision_mode == 'keep_info':
+                nc_var.precision_n_bits = self._gtcc_keep_bits[1]
+
+        return nc_var
+
+    def _gtcc_get_nc_precision_args(self):
+
+        '''
+        Get the arguments of createVariable for the precision set by
+        set_nc_precision. For "keep_info", the bits to keep are computed
+        from a sample of bands from the middle of the file, once.
+
+        Supposed to be called internally only.
+        '''
+
+        mode = self._sett_nc_precision_mode
+        value = self._sett_nc_precision_value
+
+        if mode is None:
+            return {}
+
+        assert self._gtcc_get_out_dtype().kind == 'f', (
+            f'Precision can be set for floating point data only!')
+
+        if mode == 'lsd':
+            return {'least_significant_digit': value}
+
+        elif mode != 'keep_info':
+            return {'significant_digits': value, 'quantize_mode': mode}
+
+        if (self._gtcc_keep_bits is None) or (
+            self._gtcc_keep_bits[0] != value):
+
+            n_bands = self._gread_sp_props_orig.band_count
+
+            n_sample_bands = min(self._gtcc_info_n_sample_bands, n_bands)
+
+            beg = (n_bands - n_sample_bands) // 2
+
+            self._gtcc_keep_bits = (value, _get_keep_bits(
+                self._gtcc_get_bands(range(beg, beg + n_sample_bands)),
+                value))
+
+            if self._vb:
+                print(
+                    f'Mantissa bits that keep {value} of the real '
+                    f'information: {self._gtcc_keep_bits[1]}')
+
+        return {
+            'significant_digits': self._gtcc_keep_bits[1],
+            'quantize_mode': 'BitRound'}
+
+    def _gtcc_append_to_nc(self, temp_file_path, n_steps_old, overlap_mode):
+
+        '''
+        Append the bands whose time stamps are not in the existing output
+        to it. n_steps_old is the time length of the output before an
+        unsuccessful append, if any. It is written to temp_file_path
+        before anything is written to the output.
+
+        Supposed to be called internally only.
+
+        Returns
+        -------
+        The number of appended time steps.
+        '''
+
+        nc_hdl = nc.Dataset(str(self._sett_path_to_nc), mode='a')
+
+        try:
+            nc_hdl.set_auto_mask(False)
+
+            nc_var = self._gtcc_check_nc_append(nc_hdl)
+
+            time_nc = nc_hdl[self._sett_nc_time_lab]
+
+            if n_steps_old is None:
+                n_steps_old = time_nc.shape[0]
+
+            assert n_steps_old <= time_nc.shape[0], (
+                f'Time length in the temporary file greater than the '
+                f'one of the output!')
+
+            times_old = np.asarray(time_nc[:n_steps_old])
+
+            times_grib = np.asarray(nc.date2num(
+                self._gread_time_stamps,
+                units=self._sett_nc_units,
+                calendar=self._sett_nc_calendar))
+
+            ovlp_flags = np.isin(times_grib, times_old)
+
+            if ovlp_flags.any():
+                assert overlap_mode == 'skip', (
+                    f'{ovlp_flags.sum()} time steps of the GRIB are in the '
+                    f'output already!')
+
+                if self._vb:
+                    print(
+                        f'Skipping {ovlp_flags.sum()} time steps that are '
+                        f'in the output already.')
+
+            band_idxs = np.where(~ovlp_flags)[0]
+
+            if not band_idxs.size:
+                return 0
+
+            times_new = times_grib[band_idxs]
+
+            assert np.all(times_new[1:] > times_new[:-1]), (
+                f'Time stamps of the GRIB to append not increasing!')
+
+            if n_steps_old:
+                assert times_new[0] > times_old[-1], (
+                    f'Time stamps of the GRIB to append not after the last '
+                    f'one of the output!')
+
+            temp_file_path.write_text(str(n_steps_old))
+
+            time_nc[n_steps_old:n_steps_old + band_idxs.size] = times_new
+
+            self._gtcc_write_nc_data(nc_var, band_idxs.tolist(), n_steps_old)
+
+            # Longer, if an unsuccessful append had more time steps.
+            assert time_nc.shape[0] == (n_steps_old + band_idxs.size), (
+                f'Output has more time steps than expected after the '
+                f'append! Convert again with overwrite_flag set to True.')
+
+            nc_hdl.Source = (
+                f'{nc_hdl.Source}\n{self._gread_path_to_grib}'
+                if 'Source' in nc_hdl.ncattrs()
+                else str(self._gread_path_to_grib))
+
+        finally:
+            nc_hdl.close()
+
+        return band_idxs.size
+
+    def _gtcc_check_nc_append(self, nc_hdl):
+
+        '''
+        Check that the GRIB can be appended to the existing output in
+        nc_hdl i.e. the time dimension is unlimited and the grid, the
+        coordinate systems, the data variable and the time units and
+        calendar are the same.
+
+        Supposed to be called internally only.
+
+        Returns
+        -------
+        The data variable.
+        '''
+
+        assert self._sett_nc_time_lab in nc_hdl.dimensions, (
+            f'Time dimension not in the output!')
+
+        assert nc_hdl.dimensions[self._sett_nc_time_lab].isunlimited(), (
+            f'Time dimension of the output not unlimited! It was not '
+            f'created with append_flag set to True. Convert again with '
+            f'overwrite_flag and append_flag set to True.')
+
+        for var_lab, crds in (
+            (self._sett_nc_x_cntrs_var_lab, self._gread_x_crds_cntrs),
+            (self._sett_nc_y_cntrs_var_lab, self._gread_y_crds_cntrs)):
+
+            assert var_lab in nc_hdl.variables, (
+                f'Variable {var_lab} not in the output!')
+
+            crds_nc = np.asarray(nc_hdl[var_lab][:])
+
+            assert crds_nc.shape == crds.shape, (
+                f'Shape of {var_lab} in the output not the same as that '
+                f'of the GRIB!')
+
+            assert np.allclose(crds_nc, crds), (
+                f'Values of {var_lab} in the output not the same as those '
+                f'of the GRIB!')
+
+        assert nc_hdl[self._sett_nc_x_cntrs_var_lab].crs == (
+            self._gread_crs.ExportToWkt()), (
+                f'Coordinate system of the output not the same as that of '
+                f'the GRIB!')
+
+        if self._sett_nc_regrid_method is None:
+            assert nc_hdl[self._sett_nc_x_crnrs_var_lab].crs == (
+                self._sett_nc_crs.ExportToWkt()), (
+                    f'Transformed coordinate system of the output not the '
+                    f'same as the one set!')
+
+        else:
+            for var_lab, crds in (
+                (self._sett_nc_x_tgt_lab, self._sett_nc_regrid_x_crds),
+                (self._sett_nc_y_tgt_lab, self._sett_nc_regrid_y_crds)):
+
+                assert var_lab in nc_hdl.variables, (
+                    f'Variable {var_lab} not in the output!')
+
+                crds_nc = np.asarray(nc_hdl[var_lab][:])
+
+                assert (crds_nc.shape == crds.shape) and np.allclose(
+                    crds_nc, crds), (
+                        f'Values of {var_lab} in the output not the same '
+                        f'as those of the target grid!')
+
+                assert (nc_hdl[var_lab].crs == (
+                    self._sett_nc_crs.ExportToWkt())) and (
+                    nc_hdl[var_lab].regrid_method ==
+                    self._sett_nc_regrid_method), (
+                        f'Coordinate system or regridding method of the '
+                        f'output not the same as the ones set!')
+
+        time_nc = nc_hdl[self._sett_nc_time_lab]
+
+        assert (time_nc.units == self._sett_nc_units) and (
+            time_nc.calendar == self._sett_nc_calendar), (
+                f'Time units or calendar of the output not the same as the '
+                f'ones set!')
+
+        var_lab = self._gread_meta_data[0]['GRIB_ELEMENT']
+
+        assert var_lab in nc_hdl.variables, (
+            f'Variable {var_lab} not in the output!')
+
+        nc_var = nc_hdl[var_lab]
+
+        assert nc_var.dimensions == (
+            (self._sett_nc_time_lab,) + self._gtcc_get_out_dim_labs()), (
+                f'Dimensions of {var_lab} in the output not as expected!')
+
+        assert nc_var.dtype == self._gtcc_get_out_dtype(), (
+            f'Data type of {var_lab} in the output not the same as that '
+            f'of the GRIB!')
+
+        assert nc_var.units == self._gread_meta_data[0]['GRIB_UNIT'], (
+            f'Units of {var_lab} in the output not the same as those of '
+            f'the GRIB!')
+
+        assert nc_var.__dict__.get('_FillValue', None) == (
+            self._gtcc_get_out_fill_value()), (
+                f'Fill value of {var_lab} in the output not the same as the '
+                f'NoData value of the GRIB!')
+
+        return nc_var
+
+    def _gtcc_write_nc_data(self, nc_var, band_idxs=None, nc_beg=0):
+
+        '''
+        Write the data of the bands at the indices band_idxs (all if None)
+        to nc_var, from the time step nc_beg onwards. Bands are taken and
+        written one time chunk of nc_var at a time, so that sparse bands
+        or bands not read by read_grib are never all dense in memory.
+
+        Supposed to be called internally only.
+        '''
+
+        if band_idxs is None:
+            band_idxs = range(self._gread_sp_props_orig.band_count)
+
+        band_idxs = list(band_idxs)
+
+        if (self._gread_data is not None) and (
+            not isinstance(self._gread_data, GSB)):
+
+            # Dense already. Written in one go.
+            n_time_chunk = max(1, len(band_idxs))
+
+        else:
+            chunking = nc_var.chunking()
+
+            if chunking == 'contiguous':
+                n_time_chunk = 1
+
+            else:
+                n_time_chunk = chunking[0]
+
+        for beg in range(0, len(band_idxs), n_time_chunk):
+            chunk_idxs = band_idxs[beg:beg + n_time_chunk]
+
+            nc_var[nc_beg + beg:nc_beg + beg + len(chunk_idxs),:,:] = (
+                self._gtcc_get_bands(chunk_idxs))
+
+        return
+
+    def _get_crnr_tfmd_crds(self):
+
+        '''
+        Transform the cell corners to the netCDF4 coordinate system.
+        The result is cached in the process, so that the many files of
+        the same grid (e.g. in a batch) are transformed only once, and on
+        disk if a directory was set by set_nc_crds_transform.
+
+        The corners are transformed in blocks of rows, in place, by
+        threads. No full mesh of the corners in the GRIB coordinates is
+        created.
+
+        Supposed to be called internally only.
+        '''
+
+        assert self._gread_read_flag, f'Call read_grib first'
+        assert self._sett_verify_flag, f'Call verify first!'
+        assert self._gtcc_verify_flag, f'Call verify first!'
+
+        src_wkt = self._gread_crs.ExportToWkt()
+        dst_wkt = self._sett_nc_crs.ExportToWkt()
+
+        x_crds = self._gread_x_crds_crnrs.astype(np.float64)
+        y_crds = self._gread_y_crds_crnrs.astype(np.float64)
+
+        # The grid signature and the coordinate systems.
+        hash_hdl = hashlib.sha256()
+        for part in (
+            src_wkt.encode(),
+            dst_wkt.encode(),
+            str((x_crds.shape, y_crds.shape)).encode(),
+            x_crds,
+            y_crds):
+
+            hash_hdl.update(part)
+
+        cache_key = hash_hdl.hexdigest()
+
+        if cache_key in _crnr_tfmd_crds_cache:
+            _crnr_tfmd_crds_cache.move_to_end(cache_key)
+
+            return _crnr_tfmd_crds_cache[cache_key]
+
+        tfmd_crds = None
+
+        if self._sett_nc_crds_cache_dir is not None:
+            path_to_cache = self._sett_nc_crds_cache_dir / (
+                f'crnr_tfmd_crds_{cache_key}.npz')
+
+            tfmd_crds = _load_crnr_tfmd_crds(
+                path_to_cache, (y_crds.shape[0], x_crds.shape[0]))
+
+            if (tfmd_crds is not None) and self._vb:
+                print(f'Read transformed cell corners from {path_to_cache}.')
+
+        if tfmd_crds is None:
+            tfmd_crds = self._gtcc_tfm_crnr_crds(
+                src_wkt, dst_wkt, x_crds, y_crds)
+
+            if self._sett_nc_crds_cache_dir is not None:
+                _save_crnr_tfmd_crds(path_to_cache, tfmd_crds)
+
+        _crnr_tfmd_crds_cache[cache_key] = tfmd_crds
+
+        while len(_crnr_tfmd_crds_cache) > _crnr_tfmd_crds_cache_size:
+            _crnr_tfmd_crds_cache.popitem(last=False)
+
+        return tfmd_crds
+
+    def _gtcc_tfm_crnr_crds(self, src_wkt, dst_wkt, x_crds, y_crds):
+
+        '''
+        Transform the cell corners from src_wkt to dst_wkt, a block of rows
+        at a time.
+
+        Supposed to be called internally only.
+        '''
+
+        shape = (y_crds.shape[0], x_crds.shape[0])
+
+        x_crds_tfmd = np.empty(shape, dtype=np.float64)
+        y_crds_tfmd = np.empty(shape, dtype=np.float64)
+
+        n_blk_rows = max(1, self._gtcc_tfm_blk_n_crnrs // shape[1])
+
+        tfm_args = [
+            (src_wkt,
+             dst_wkt,
+             x_crds,
+             y_crds,
+             x_crds_tfmd,
+             y_crds_tfmd,
+             beg,
+             min(beg + n_blk_rows, shape[0]))
+            for beg in range(0, shape[0], n_blk_rows)]
+
+        n_threads = self._sett_nc_crds_n_threads
+
+        if (n_threads > 1) and (len(tfm_args) > 1):
+            list(self._gtcc_get_thread_pool(n_threads).map(
+                _tfm_crnr_rows, tfm_args))
+
+        else:
+            for tfm_arg in tfm_args:
+                _tfm_crnr_rows(tfm_arg)
+
+        assert (
+            np.all(np.isfinite(x_crds_tfmd)) and
+            np.all(np.isfinite(y_crds_tfmd))), (
+                f'Invalid transformed coordinates!')
+
+        return x_crds_tfmd, y_crds_tfmd
+
+    @contextlib.contextmanager
+    def _gtcc_hold_thread_pools(self):
+
+        '''
+        A context manager that keeps the thread pools that
+        _gtcc_get_thread_pool creates alive till its end and then shuts
+        them down. Use it around a whole conversion so that the threads
+        (and their copies of the transformers) are reused by all of its
+        bands.
+
+        Supposed to be called internally only.
+        '''
+
+        assert self._gtcc_thread_pools is None, (
+            f'Thread pools held already!')
+
+        self._gtcc_thread_pools = {}
+
+        try:
+            yield
+
+        finally:
+            thread_pools = self._gtcc_thread_pools
+
+            self._gtcc_thread_pools = None
+
+            for thread_pool in thread_pools.values():
+                thread_pool.shutdown()
+
+        return
+
+    def _gtcc_get_thread_pool(self, n_threads):
+
+        '''
+        Get the pool of n_threads threads. Created once in a
+        _gtcc_hold_thread_pools block. None is returned if n_threads is
+        one.
+
+        Supposed to be called internally only.
+        '''
+
+        assert self._gtcc_thread_pools is not None, (
+            f'Thread pools not held!')
+
+        if n_threads == 1:
+            return None
+
+        if n_threads not in self._gtcc_thread_pools:
+            self._gtcc_thread_pools[n_threads] = ThreadPoolExecutor(
+                max_workers=n_threads)
+
+        return self._gtcc_thread_pools[n_threads]
+
+    __verify = verify
+
+
+def _get_tfmr(src_wkt, dst_wkt):
+
+    '''
+    Get the transformer from src_wkt to dst_wkt. Created once, while it
+    is among the recently used ones.
+
+    Supposed to be called internally only.
+    '''
+
+    with _tfm_lock:
+        if (src_wkt, dst_wkt) not in _tfmrs:
+            _tfmrs[(src_wkt, dst_wkt)] = pyproj.Transformer.from_crs(
+                src_wkt, dst_wkt, always_xy=True)
+
+            while len(_tfmrs) > _tfmrs_size:
+                _tfmrs.popitem(last=False)
+
+        _tfmrs.move_to_end((src_wkt, dst_wkt))
+
+        tfmr = _tfmrs[(src_wkt, dst_wkt)]
+
+    return tfmr
+
+
+def _get_regrid_wts_n_bytes(regrid_wts):
+
+    '''
+    Get the number of bytes of the arrays of regrid_wts.
+
+    Supposed to be called internally only.
+    '''
+
+    return sum([
+        field.nbytes
+        for field in regrid_wts
+        if isinstance(field, np.ndarray)])
+
+
+def _tfm_crnr_rows(args):
+
+    '''
+    Transform the cell corners of the rows from beg to end (exclusive).
+    They are filled in the outputs and transformed there, in place.
+
+    Supposed to be called internally only.
+    '''
+
+    (src_wkt,
+     dst_wkt,
+     x_crds,
+     y_crds,
+     x_crds_tfmd,
+     y_crds_tfmd,
+     beg,
+     end) = args
+
+    x_crds_tfmd[beg:end,:] = x_crds[None,:]
+    y_crds_tfmd[beg:end,:] = y_crds[beg:end, None]
+
+    _get_tfmr(src_wkt, dst_wkt).transform(
+        x_crds_tfmd[beg:end,:], y_crds_tfmd[beg:end,:], inplace=True)
+
+    return
+
+
+def _load_crnr_tfmd_crds(path_to_cache, shape):
+
+    '''
+    Read the transformed cell corners from path_to_cache. None is
+    returned if it does not exist or is not valid.
+
+    Supposed to be called internally only.
+    '''
+
+    if not path_to_cache.exists():
+        return None
+
+    try:
+        with np.load(path_to_cache) as npz_hdl:
+            x_crds_tfmd = npz_hdl['x']
+            y_crds_tfmd = npz_hdl['y']
+
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        return None
+
+    if (x_crds_tfmd.shape != shape) or (y_crds_tfmd.shape != shape):
+        return None
+
+    return x_crds_tfmd, y_crds_tfmd
+
+
+def _save_crnr_tfmd_crds(path_to_cache, tfmd_crds):
+
+    '''
+    Write the transformed cell corners to path_to_cache. A temporary file
+    is written first and then renamed so that other processes never read
+    an incomplete one.
+
+    Supposed to be called internally only.
+    '''
+
+    path_to_temp = path_to_cache.parents[0] / (
+        f'{path_to_cache.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+
+    try:
+        with open(path_to_temp, 'wb') as npz_hdl:
+            np.savez(npz_hdl, x=tfmd_crds[0], y=tfmd_crds[1])
+
+        os.replace(path_to_temp, path_to_cache)
+
+    finally:
+        if path_to_temp.exists():
+            os.remove(path_to_temp)
+
+    return
+
+
+def _get_keep_bits(data, keep_info):
+
+    '''
+    Get the number of mantissa bits of the floating point data that keep
+    the fraction keep_info of its real information i.e. the mutual
+    information of each bit of adjacent cells along the rows (Kloewer et
+    al., 2021). The information of a bit that is not significant at 99%
+    is taken as zero.
+
+    Supposed to be called internally only.
+    '''
+
+    n_bits = data.dtype.itemsize * 8
+    n_mant_bits = {32: 23, 64: 52}[n_bits]
+
+    uints = data.view(f'u{data.dtype.itemsize}')
+
+    fnt_flags = np.isfinite(data[..., :-1]) & np.isfinite(data[..., 1:])
+
+    uints_a = uints[..., :-1][fnt_flags]
+    uints_b = uints[..., 1:][fnt_flags]
+
+    n_pairs = uints_a.size
+
+    if not n_pairs:
+        return n_mant_bits
+
+    # Chi-squared with one degree of freedom at 99%.
+    info_min = 6.635 / (2 * n_pairs * np.log(2))
+
+    bits_info = np.zeros(n_bits)
+    for i in range(n_bits):
+        shift = uints.dtype.type(n_bits - 1 - i)
+
+        bits_a = ((uints_a >> shift) & 1).astype(np.int64)
+        bits_b = ((uints_b >> shift) & 1).astype(np.int64)
+
+        probs = np.bincount(
+            (2 * bits_a) + bits_b, minlength=4).reshape(2, 2) / n_pairs
+
+        probs_a = probs.sum(axis=1)
+        probs_b = probs.sum(axis=0)
+
+        nz_flags = probs > 0
+
+        bits_info[i] = (probs[nz_flags] * np.log2(
+            probs[nz_flags] /
+            np.outer(probs_a, probs_b)[nz_flags])).sum()
+
+    bits_info[bits_info < info_min] = 0.0
+
+    if bits_info.sum() == 0:
+        return 1
+
+    cum_info = np.cumsum(bits_info) / bits_info.sum()
+
+    # Index of the last bit needed.
+    last_bit = int(np.searchsorted(cum_info, keep_info - 1e-12))
+
+    return int(min(n_mant_bits, max(1, last_bit - (n_bits - n_mant_bits) + 1)))
@@ -0,0 +1,400 @@
+'''
+@author: Faizan3800X-Uni
+
+Oct 19, 2026
+
+8:12:37 PM
+'''
+import glob
+import timeit
+from pathlib import Path
+from datetime import timedelta
+from collections import namedtuple, Counter
+
+import numpy as np
+
+from ..grib import GRead
+from .convert import GTCConvert
+from .settings import (
+    GTCSettingsArgs, _apply_nc_args, _check_path_to_nc)
+from ..misc import print_sl, print_el
+
+# A namedtuple object to hold what merge found and did.
+_GTCMergeRes = namedtuple(
+    'GTCMergeRes',
+    ['n_steps',
+     'time_step',
+     'dup_time_stamps',
+     'missing_time_stamps'])
+
+
+class GTCMerge(GTCSettingsArgs):
+
+    '''
+    Merge many GRIB files of the same variable and grid into a single
+    netCDF4 with a continuous time series.
+
+    All the files are scanned for their grids and time stamps first,
+    without reading any band. The grids, coordinate systems, variables
+    and data types have to be the same. The files are then sorted by
+    their first time stamp. Time stamps that are in more than one file
+    (duplicates) and gaps in the time series (missing time stamps) are
+    detected and reported.
+
+    The first file is converted by GTCConvert. The coordinate variables
+    are computed and written then, once. The bands of the rest of the
+    files are appended to the time dimension one file at a time (see
+    the append_flag of GTCConvert.convert_to_nc), decoded and written
+    one time chunk at a time, so that never more than the bands of a
+    single file are in memory. The bands of the duplicates are written
+    only once, the first time that they are encountered.
+
+    A merge that was unsuccessful can be run again. Files whose bands
+    are in the output already are skipped then.
+
+    How-To-Use
+    ----------
+    After initiating a GTCMerge object (merge_cls = GTCMerge(verbose)),
+    call set_inputs, set_path_to_nc and set_nc_settings. Optionally call
+    set_nc_compression, set_nc_precision, set_nc_crds_transform and
+    set_nc_regrid. Call verify and then merge.
+
+    Last updated on: 2026-Oct-19
+    '''
+
+    def __init__(self, verbose=True):
+
+        assert isinstance(verbose, bool), (
+            f'verbose not of the boolean data type!')
+
+        GTCSettingsArgs.__init__(self, verbose)
+
+        self._gtcm_paths_to_grib = None
+
+        self._gtcm_path_to_nc = None
+
+        self._gtcm_verify_flag = False
+        return
+
+    def set_inputs(self, inputs):
+
+        '''
+        Set the GRIB files to merge.
+
+        Parameters
+        ----------
+        inputs : str or Path or list or tuple
+            A glob pattern of the GRIB files e.g.
+            "/data/TOT_PRECIP.2D.*.grb" or the paths to them. The order
+            does not matter.
+        '''
+
+        if isinstance(inputs, (list, tuple)):
+            assert all([isinstance(path, (str, Path)) for path in inputs]), (
+                f'Paths in inputs not of the data type string or Path!')
+
+            paths_to_grib = [Path(path) for path in inputs]
+
+            for path_to_grib in paths_to_grib:
+                assert path_to_grib.is_file(), (
+                    f'Input file {path_to_grib} does not exist!')
+
+        else:
+            assert isinstance(inputs, (str, Path)), (
+                f'inputs not of the data type string, Path, list or tuple!')
+
+            paths_to_grib = [
+                Path(path) for path in glob.glob(str(inputs))
+                if Path(path).is_file()]
+
+        assert len(paths_to_grib), f'No input files found for: {inputs}!'
+
+        assert len(set(paths_to_grib)) == len(paths_to_grib), (
+            f'Same file in inputs more than once!')
+
+        self._gtcm_paths_to_grib = tuple(sorted(paths_to_grib))
+        return
+
+    def set_path_to_nc(self, path_to_nc):
+
+        '''
+        Set the path to the output netCDF4. See GTCSettings.set_path_to_nc.
+        '''
+
+        self._gtcm_path_to_nc = _check_path_to_nc(path_to_nc)
+        return
+
+    def verify(self):
+
+        '''
+        Verify that all the inputs have been set correctly.
+        '''
+
+        if self._vb:
+            print_sl()
+
+            print('Verifying merge inputs...')
+
+        assert self._gtcm_paths_to_grib is not None, (
+            f'Call set_inputs first!')
+
+        assert self._gtcm_path_to_nc is not None, (
+            f'Call set_path_to_nc first!')
+
+        assert 'set_nc_crs' in self._gtsa_nc_args, (
+            f'Call set_nc_settings first!')
+
+        assert self._gtcm_path_to_nc not in self._gtcm_paths_to_grib, (
+            f'The output would overwrite an input!')
+
+        self._gtcm_verify_flag = True
+
+        if self._vb:
+            print(f'Number of files: {len(self._gtcm_paths_to_grib)}')
+
+            print('Merge inputs OK.')
+
+            print_el()
+
+        return
+
+    def merge(self, overwrite_flag=False, dups_mode='skip', time_step=None):
+
+        '''
+        Merge all the GRIB files into the output.
+
+        Parameters
+        ----------
+        overwrite_flag : bool
+            Whether to overwrite an existing output. If False, the bands
+            that are not in an existing output are appended to it.
+        dups_mode : str
+            What to do with duplicate time stamps. Either "skip" (written
+            once) or "reject" (an AssertionError is raised before anything
+            is written).
+        time_step : timedelta or None
+            The expected time step of the series, to detect gaps with. If
+            None, it is the most common difference between consecutive
+            time stamps.
+
+        Returns
+        -------
+        A namedtuple with the attributes: n_steps (number of time steps of
+        the series), time_step (the one used to detect gaps),
+        dup_time_stamps and missing_time_stamps (tuples of datetimes).
+        '''
+
+        if self._vb:
+            print_sl()
+
+            print('Merging GRIB files to netCDF4...')
+
+        assert self._gtcm_verify_flag, f'Call verify first!'
+
+        assert isinstance(overwrite_flag, bool), (
+            f'overwrite_flag not of the boolean data type!')
+
+        assert dups_mode in ('skip', 'reject'), (
+            f'dups_mode can only be "skip" or "reject"!')
+
+        if time_step is not None:
+            assert isinstance(time_step, timedelta), (
+                f'time_step not a timedelta object!')
+
+            assert time_step > timedelta(0), (
+                f'time_step must be greater than zero!')
+
+        beg_time = timeit.default_timer()
+
+        files_time_stamps = self._gtcm_scan_grids()
+
+        order = sorted(
+            range(len(self._gtcm_paths_to_grib)),
+            key=lambda i: min(files_time_stamps[i]))
+
+        paths_to_grib = [self._gtcm_paths_to_grib[i] for i in order]
+        files_time_stamps = [files_time_stamps[i] for i in order]
+
+        merge_res = self._gtcm_check_time_stamps(files_time_stamps, time_step)
+
+        if merge_res.dup_time_stamps:
+            assert dups_mode == 'skip', (
+                f'{len(merge_res.dup_time_stamps)} time stamps are in more '
+                f'than one file, the first one being '
+                f'{merge_res.dup_time_stamps[0]}!')
+
+        if self._vb:
+            print(f'Time steps: {merge_res.n_steps}')
+            print(f'Time step: {merge_res.time_step}')
+            print(f'Duplicate time stamps: {len(merge_res.dup_time_stamps)}')
+
+            print(
+                f'Missing time stamps: '
+                f'{len(merge_res.missing_time_stamps)}')
+
+            if merge_res.missing_time_stamps:
+                print(
+                    f'WARNING: The time series has gaps, the first one at '
+                    f'{merge_res.missing_time_stamps[0]}!')
+
+        for i, path_to_grib in enumerate(paths_to_grib):
+            if self._vb:
+                print(f'Merging {path_to_grib.name}...')
+
+            cnvt_cls = self._gtcm_get_cnvt_cls(path_to_grib)
+
+            # Bands are decoded and written one time chunk at a time.
+            cnvt_cls.read_grib(data_flag=False)
+
+            try:
+                cnvt_cls.convert_to_nc(
+                    overwrite_flag and (i == 0),
+                    append_flag=True,
+                    overlap_mode='skip')
+
+            finally:
+                cnvt_cls.close_grib()
+
+        if self._vb:
+            print(
+                f'Took {timeit.default_timer() - beg_time:0.1f} seconds '
+                f'to merge {len(paths_to_grib)} files.')
+
+            print_el()
+
+        return merge_res
+
+    def _gtcm_get_cnvt_cls(self, path_to_grib):
+
+        '''
+        Supposed to be called internally only.
+        '''
+
+        cnvt_cls = GTCConvert(False)
+
+        cnvt_cls.set_path_to_grib(path_to_grib)
+
+        cnvt_cls.set_path_to_nc(self._gtcm_path_to_nc)
+
+        _apply_nc_args(cnvt_cls, self._gtsa_nc_args)
+
+        cnvt_cls.verify()
+        return cnvt_cls
+
+    def _gtcm_scan_grids(self):
+
+        '''
+        Read the spatial properties, the metadata and the time stamps of
+        all the files, without the bands, and check that their grids are
+        the same.
+
+        Supposed to be called internally only.
+
+        Returns
+        -------
+        A list of the time stamps of each file.
+        '''
+
+        grid_ref = None
+        files_time_stamps = []
+        for path_to_grib in self._gtcm_paths_to_grib:
+            read_cls = GRead(False)
+
+            read_cls.set_path_to_grib(path_to_grib)
+            read_cls.verify()
+
+            read_cls.read_grib(data_flag=False)
+
+            try:
+                grid = (
+                    read_cls.get_x_coordinates_grib_cntrs(),
+                    read_cls.get_y_coordinates_grib_cntrs(),
+                    read_cls.get_crs_grib().ExportToWkt(),
+                    read_cls.get_meta_data_grib()[0]['GRIB_ELEMENT'],
+                    read_cls.get_dtype_grib())
+
+                files_time_stamps.append(read_cls.get_time_stamps_grib())
+
+            finally:
+                read_cls.close_grib()
+
+            assert len(files_time_stamps[-1]), (
+                f'No bands in {path_to_grib}!')
+
+            if grid_ref is None:
+                grid_ref = grid
+                continue
+
+            for i, lab in enumerate(('X coordinates', 'Y coordinates')):
+                assert (grid[i].shape == grid_ref[i].shape) and np.allclose(
+                    grid[i], grid_ref[i]), (
+                        f'{lab} of {path_to_grib} not the same as those of '
+                        f'{self._gtcm_paths_to_grib[0]}!')
+
+            for i, lab in zip(
+                (2, 3, 4),
+                ('Coordinate system', 'GRIB_ELEMENT', 'Data type')):
+
+                assert grid[i] == grid_ref[i], (
+                    f'{lab} of {path_to_grib} not the same as that of '
+                    f'{self._gtcm_paths_to_grib[0]}!')
+
+        return files_time_stamps
+
+    def _gtcm_check_time_stamps(self, files_time_stamps, time_step):
+
+        '''
+        Find the duplicate and the missing time stamps of the files, that
+        are sorted by their first time stamps already.
+
+        Supposed to be called internally only.
+        '''
+
+        dup_time_stamps = []
+        time_stamps = []
+        time_stamps_set = set()
+        for file_time_stamps in files_time_stamps:
+            new_time_stamps = []
+            for time_stamp in file_time_stamps:
+                if time_stamps and (time_stamp <= time_stamps[-1]):
+                    assert time_stamp in time_stamps_set, (
+                        f'Time stamp {time_stamp} falls between those of '
+                        f'another file! Files cannot be interleaved in '
+                        f'time.')
+
+                    dup_time_stamps.append(time_stamp)
+                    continue
+
+                new_time_stamps.append(time_stamp)
+
+            assert all([
+                new_time_stamps[i] < new_time_stamps[i + 1]
+                for i in range(len(new_time_stamps) - 1)]), (
+                    f'Time stamps of a file not increasing!')
+
+            time_stamps.extend(new_time_stamps)
+            time_stamps_set.update(new_time_stamps)
+
+        if time_step is None:
+            time_step_cts = Counter([
+                time_stamps[i + 1] - time_stamps[i]
+                for i in range(len(time_stamps) - 1)])
+
+            if time_step_cts:
+                time_step = time_step_cts.most_common(1)[0][0]
+
+        missing_time_stamps = []
+        if time_step is not None:
+            for i in range(len(time_stamps) - 1):
+                time_stamp = time_stamps[i] + time_step
+
+                while time_stamp < time_stamps[i + 1]:
+                    missing_time_stamps.append(time_stamp)
+
+                    time_stamp += time_step
+
+        return _GTCMergeRes(
+            len(time_stamps),
+            time_step,
+            tuple(sorted(set(dup_time_stamps))),
+            tuple(missing_time_stamps))
@@ -0,0 +1,312 @@
+'''
+@author: Faizan3800X-Uni
+
+Oct 19, 2026
+
+9:48:15 PM
+'''
+import os
+import zipfile
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+# A namedtuple object to hold the remapping weights as a sparse matrix in
+# the compressed sparse row (CSR) format, with a row for each target cell
+# and a column for each GRIB cell. wts_sums are the sums of the weights
+# of each row and nz_rows the rows that have weights.
+_GTCRegridWts = namedtuple(
+    'GTCRegridWts',
+    ['tgt_shape',
+     'indptr',
+     'cols',
+     'wts',
+     'wts_sums',
+     'nz_rows'])
+
+
+def _get_regrid_wts(src_x_crds, src_y_crds, pts_x_crds, pts_y_crds, method,
+                    n_sub):
+
+    '''
+    Compute the remapping weights from the GRIB grid, with the cell
+    centers src_x_crds and src_y_crds, to a target grid. pts_x_crds and
+    pts_y_crds are 2D arrays of the target cell centers in the GRIB
+    coordinate system. For the conservative method, they are the n_sub by
+    n_sub points of each target cell instead.
+
+    Supposed to be called internally only.
+    '''
+
+    for crds, lab in ((src_x_crds, 'X'), (src_y_crds, 'Y')):
+        crds_diffs = np.diff(crds)
+
+        assert np.allclose(crds_diffs, crds_diffs[0]), (
+            f'GRIB {lab} coordinates not regularly spaced!')
+
+    n_src_rows = src_y_crds.shape[0]
+    n_src_cols = src_x_crds.shape[0]
+
+    # Fractional indices of the points in the GRIB grid.
+    pts_cols = (pts_x_crds - src_x_crds[0]) / (src_x_crds[1] - src_x_crds[0])
+    pts_rows = (pts_y_crds - src_y_crds[0]) / (src_y_crds[1] - src_y_crds[0])
+
+    if method == 'conservative':
+        tgt_shape = (
+            pts_x_crds.shape[0] // n_sub, pts_x_crds.shape[1] // n_sub)
+
+    else:
+        tgt_shape = pts_x_crds.shape
+
+    # Target cell of each point.
+    pts_tgts = np.arange(tgt_shape[0] * tgt_shape[1]).reshape(tgt_shape)
+
+    if method == 'conservative':
+        pts_tgts = np.repeat(np.repeat(pts_tgts, n_sub, axis=0), n_sub, axis=1)
+
+    pts_tgts = pts_tgts.ravel()
+    pts_cols = pts_cols.ravel()
+    pts_rows = pts_rows.ravel()
+
+    if method in ('nearest', 'conservative'):
+        # The GRIB cell that has the point.
+        src_cols = np.rint(pts_cols)
+        src_rows = np.rint(pts_rows)
+
+        in_flags = (
+            (src_cols >= 0) & (src_cols < n_src_cols) &
+            (src_rows >= 0) & (src_rows < n_src_rows))
+
+        rows = pts_tgts[in_flags]
+
+        cols = (
+            (src_rows[in_flags].astype(np.int64) * n_src_cols) +
+            src_cols[in_flags].astype(np.int64))
+
+        wts = np.ones(rows.shape[0])
+
+    else:
+        assert method == 'bilinear', f'Unknown method: {method}!'
+
+        # Tolerance for the points on the edges.
+        tol = 1e-9
+
+        in_flags = (
+            (pts_cols >= -tol) & (pts_cols <= (n_src_cols - 1 + tol)) &
+            (pts_rows >= -tol) & (pts_rows <= (n_src_rows - 1 + tol)))
+
+        pts_tgts = pts_tgts[in_flags]
+        pts_cols = pts_cols[in_flags]
+        pts_rows = pts_rows[in_flags]
+
+        src_col_begs = np.clip(
+            np.floor(pts_cols), 0, max(0, n_src_cols - 2)).astype(np.int64)
+
+        src_row_begs = np.clip(
+            np.floor(pts_rows), 0, max(0, n_src_rows - 2)).astype(np.int64)
+
+        col_wts = np.clip(pts_cols - src_col_begs, 0, 1)
+        row_wts = np.clip(pts_rows - src_row_begs, 0, 1)
+
+        rows = []
+        cols = []
+        wts = []
+        for row_off, col_off, crnr_wts in (
+            (0, 0, (1 - row_wts) * (1 - col_wts)),
+            (0, 1, (1 - row_wts) * col_wts),
+            (1, 0, row_wts * (1 - col_wts)),
+            (1, 1, row_wts * col_wts)):
+
+            # Also drops the neighbors beyond the edges of grids with a
+            # single row or column.
+            nz_flags = crnr_wts > 0
+
+            rows.append(pts_tgts[nz_flags])
+
+            cols.append(
+                ((src_row_begs[nz_flags] + row_off) * n_src_cols) +
+                src_col_begs[nz_flags] + col_off)
+
+            wts.append(crnr_wts[nz_flags])
+
+        rows = np.concatenate(rows)
+        cols = np.concatenate(cols)
+        wts = np.concatenate(wts)
+
+    # Points in the same GRIB cell are combined, for the conservative
+    # method.
+    rows_cols, inv_idxs = np.unique(
+        (rows * (n_src_rows * n_src_cols)) + cols, return_inverse=True)
+
+    wts = np.bincount(inv_idxs.ravel(), weights=wts)
+
+    rows = rows_cols // (n_src_rows * n_src_cols)
+    cols = rows_cols % (n_src_rows * n_src_cols)
+
+    # Sorted by rows and then by columns already.
+    indptr = np.zeros((tgt_shape[0] * tgt_shape[1]) + 1, dtype=np.int64)
+
+    np.cumsum(
+        np.bincount(rows, minlength=tgt_shape[0] * tgt_shape[1]),
+        out=indptr[1:])
+
+    return _get_regrid_wts_tuple(tgt_shape, indptr, cols, wts)
+
+
+def _get_regrid_wts_tuple(tgt_shape, indptr, cols, wts):
+
+    '''
+    Supposed to be called internally only.
+    '''
+
+    wts_sums = np.zeros(indptr.shape[0] - 1)
+
+    nz_rows = np.flatnonzero(np.diff(indptr))
+
+    if nz_rows.size:
+        wts_sums[nz_rows] = np.add.reduceat(wts, indptr[nz_rows])
+
+    return _GTCRegridWts(
+        tuple(tgt_shape), indptr, cols, wts, wts_sums, nz_rows)
+
+
+def _apply_regrid_wts(band, regrid_wts, thread_pool, n_threads):
+
+    '''
+    Regrid a 2D band with the weights regrid_wts i.e. the sparse matrix
+    product of the weights and the band. Target cells without weights or
+    whose GRIB cells are all NaNs are NaNs. The weights of NaN cells are
+    not counted.
+
+    The rows of the matrix are split in n_threads blocks that are
+    computed by the threads of thread_pool. numpy releases the GIL for
+    the taking, multiplying and summing.
+
+    Supposed to be called internally only.
+    '''
+
+    src_vals = band.ravel()
+
+    nan_flags = None
+    if (band.dtype.kind == 'f') and (not np.all(np.isfinite(src_vals))):
+        nan_flags = ~np.isfinite(src_vals)
+
+        src_vals = np.where(nan_flags, 0, src_vals)
+
+    tgt_vals = np.full(
+        regrid_wts.wts_sums.shape[0],
+        np.nan,
+        dtype=np.result_type(band.dtype, np.float32))
+
+    nz_rows_blks = np.array_split(
+        regrid_wts.nz_rows, min(n_threads, max(1, regrid_wts.nz_rows.size)))
+
+    apply_args = [
+        (src_vals, nan_flags, regrid_wts, nz_rows, tgt_vals)
+        for nz_rows in nz_rows_blks if nz_rows.size]
+
+    if len(apply_args) > 1:
+        list(thread_pool.map(_apply_regrid_wts_rows, apply_args))
+
+    else:
+        for apply_arg in apply_args:
+            _apply_regrid_wts_rows(apply_arg)
+
+    return tgt_vals.reshape(regrid_wts.tgt_shape)
+
+
+def _apply_regrid_wts_rows(args):
+
+    '''
+    Compute the target cells of a block of consecutive rows, nz_rows, that
+    have weights.
+
+    Supposed to be called internally only.
+    '''
+
+    src_vals, nan_flags, regrid_wts, nz_rows, tgt_vals = args
+
+    beg = regrid_wts.indptr[nz_rows[0]]
+    end = regrid_wts.indptr[nz_rows[-1] + 1]
+
+    cols = regrid_wts.cols[beg:end]
+    wts = regrid_wts.wts[beg:end]
+
+    row_begs = regrid_wts.indptr[nz_rows] - beg
+
+    tgt_sums = np.add.reduceat(wts * src_vals.take(cols), row_begs)
+
+    if nan_flags is None:
+        wts_sums = regrid_wts.wts_sums[nz_rows]
+
+    else:
+        wts_sums = np.add.reduceat(
+            np.where(nan_flags.take(cols), 0.0, wts), row_begs)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        tgt_vals[nz_rows] = np.where(
+            wts_sums > 0, tgt_sums / wts_sums, np.nan)
+
+    return
+
+
+def _load_regrid_wts(path_to_wts, tgt_shape, n_src):
+
+    '''
+    Read the weights from path_to_wts. None is returned if it does not
+    exist or is not valid.
+
+    Supposed to be called internally only.
+    '''
+
+    if not path_to_wts.exists():
+        return None
+
+    try:
+        with np.load(path_to_wts) as npz_hdl:
+            indptr = npz_hdl['indptr']
+            cols = npz_hdl['cols']
+            wts = npz_hdl['wts']
+
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        return None
+
+    if ((indptr.shape[0] != ((tgt_shape[0] * tgt_shape[1]) + 1)) or
+        (cols.shape != wts.shape) or
+        (indptr[-1] != cols.shape[0]) or
+        (cols.size and (cols.max() >= n_src))):
+
+        return None
+
+    return _get_regrid_wts_tuple(tgt_shape, indptr, cols, wts)
+
+
+def _save_regrid_wts(path_to_wts, regrid_wts):
+
+    '''
+    Write the weights to path_to_wts. A temporary file is written first
+    and then renamed so that other processes never read an incomplete
+    one.
+
+    Supposed to be called internally only.
+    '''
+
+    path_to_temp = path_to_wts.parents[0] / (
+        f'{path_to_wts.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+
+    try:
+        with open(path_to_temp, 'wb') as npz_hdl:
+            np.savez(
+                npz_hdl,
+                indptr=regrid_wts.indptr,
+                cols=regrid_wts.cols,
+                wts=regrid_wts.wts)
+
+        os.replace(path_to_temp, path_to_wts)
+
+    finally:
+        if path_to_temp.exists():
+            os.remove(path_to_temp)
+
+    return
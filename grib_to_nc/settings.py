@@ -10,6 +10,7 @@ from pathlib import Path
 from datetime import datetime
 
 import parse
+import numpy as np
 from osgeo import osr
 
 
@@ -21,7 +22,7 @@ class GTCSettings:
 
     This class is supposed to be inherited so some things may no make sense.
 
-    Last updated on: 2021-Sep-21
+    Last updated on: 2026-Oct-19
     '''
 
     # String case matters. It has to match that of the osr module.
@@ -58,6 +59,40 @@ class GTCSettings:
         'milliseconds',
         'microseconds')
 
+    # None means no compression. Availability of the others, besides zlib,
+    # depends on how netCDF4 was built.
+    _sett_nc_codecs = (
+        None,
+        'zlib',
+        'zstd',
+        'bzip2',
+        'szip',
+        'blosc_lz',
+        'blosc_lz4',
+        'blosc_lz4hc',
+        'blosc_zlib',
+        'blosc_zstd')
+
+    # Lossy precision modes. None means lossless. "lsd" keeps a number of
+    # decimal digits after the decimal point. "BitGroom" and
+    # "GranularBitRound" keep a number of significant decimal digits.
+    # "BitRound" keeps a number of significant bits. "keep_info" is
+    # "BitRound" with the number of bits that keep a given fraction of
+    # the real information in the data.
+    _sett_nc_precision_modes = (
+        None,
+        'lsd',
+        'BitGroom',
+        'GranularBitRound',
+        'BitRound',
+        'keep_info')
+
+    # Methods to compute the weights of regridding with.
+    _sett_nc_regrid_methods = (
+        'nearest',
+        'bilinear',
+        'conservative')
+
     def __init__(self, verbose=True):
 
         assert isinstance(verbose, bool)
@@ -73,6 +108,27 @@ class GTCSettings:
         self._sett_nc_units = None
         self._sett_nc_calendar = None
 
+        # Chunks of one time step and the whole grid i.e. fast to write
+        # and to read maps.
+        self._sett_nc_chunk_shape = None
+        self._sett_nc_codec = 'zlib'
+        self._sett_nc_comp_level = 1
+        self._sett_nc_shuffle_flag = False
+
+        self._sett_nc_precision_mode = None
+        self._sett_nc_precision_value = None
+
+        self._sett_nc_crds_cache_dir = None
+        self._sett_nc_crds_n_threads = 1
+
+        # None means no regridding.
+        self._sett_nc_regrid_x_crds = None
+        self._sett_nc_regrid_y_crds = None
+        self._sett_nc_regrid_method = None
+        self._sett_nc_regrid_n_sub = None
+        self._sett_nc_regrid_wts_dir = None
+        self._sett_nc_regrid_n_threads = None
+
         self._sett_verify_flag = False
         return
 
@@ -90,15 +146,7 @@ class GTCSettings:
             overwrite flag that is set in another class.
         '''
 
-        assert isinstance(path_to_nc, (str, Path)), (
-            f'path_to_nc not of the string or Path data type!')
-
-        path_to_nc = Path(path_to_nc)
-
-        assert path_to_nc.parents[0].exists(), (
-            f'Parent directory of path_to_nc does not exist!')
-
-        self._sett_path_to_nc = path_to_nc
+        self._sett_path_to_nc = _check_path_to_nc(path_to_nc)
         return
 
     def set_nc_crs(self, crs_kind, crs):
@@ -130,20 +178,8 @@ class GTCSettings:
             upon importing the projection from the relevant coordinate system.
         '''
 
-        assert isinstance(crs_kind, str), f'crs_kind is not a string!'
-
-        assert crs_kind in self._sett_nc_crs_kinds, (
-            f'crs_kind is not among the allowed kinds: '
-            f'{self._sett_nc_crs_kinds}!')
-
-        nc_crs = osr.SpatialReference()
-
-        return_code = getattr(nc_crs, f'ImportFrom{crs_kind}')(crs)
-
-        assert return_code == 0, 'Invalid crs or GDAL is misconfigured!'
-
+        self._sett_nc_crs = _check_nc_crs(crs_kind, crs)
         self._sett_nc_crs_kind = crs_kind
-        self._sett_nc_crs = nc_crs
         return
 
     def set_nc_time(self, calendar, units):
@@ -167,27 +203,168 @@ class GTCSettings:
             the allowed ones are shown and an AssertionError is raised.
         '''
 
-        assert isinstance(calendar, str), (
-            f'calendar not of the data type string!')
+        _check_nc_time(calendar, units)
+
+        self._sett_nc_calendar = calendar
+        self._sett_nc_units = units
+        return
+
+    def set_nc_compression(
+            self,
+            chunk_shape=None,
+            codec='zlib',
+            comp_level=1,
+            shuffle_flag=False):
+
+        '''
+        Set the chunking and the compression of the data variable of the
+        output netCDF4. Optional. The defaults are the ones shown.
+
+        Chunks that are long in time and small in space make reading
+        time series of cells fast and reading maps slow. Chunks of a
+        single time step make it the other way round.
 
-        assert calendar in self._sett_nc_calendars, (
-            f'calendar not among the valid ones: {self._sett_nc_calendars}!')
+        Parameters
+        ----------
+        chunk_shape : tuple or None
+            The chunk shape as a tuple of three integers: (time, y, x).
+            Values larger than the dimensions are clipped to them. If None,
+            it is (1, number of rows, number of columns).
+        codec : str or None
+            The compression codec. One of the values in the class variable
+            _sett_nc_codecs. None means no compression.
+        comp_level : int
+            The compression level, from 0 to 9. Higher is smaller and
+            slower.
+        shuffle_flag : bool
+            Whether to apply the HDF5 shuffle filter before compressing.
+            It often improves the compression of floating point data.
+        '''
 
-        assert isinstance(units, str), f'units not of the data type string!'
+        _check_nc_compression(chunk_shape, codec, comp_level, shuffle_flag)
 
-        parse_res = parse.search('{del_t:w} since {time_stamp:ti}', units)
+        self._sett_nc_chunk_shape = chunk_shape
+        self._sett_nc_codec = codec
+        self._sett_nc_comp_level = comp_level
+        self._sett_nc_shuffle_flag = shuffle_flag
+        return
 
-        assert parse_res is not None, 'Unknown format of units!'
+    def set_nc_precision(self, mode=None, value=None):
 
-        assert parse_res['del_t'] in self._sett_nc_unitss, (
-            f'Time unit in units not among the allowed ones: '
-            f'{self._sett_nc_unitss}!')
+        '''
+        Set the precision of the data variable of the output netCDF4, for
+        floating point data only. Optional. Lossless by default.
 
-        assert isinstance(parse_res['time_stamp'], datetime), (
-            f'Parsed reference time not a datetime object as expected!')
+        Dropping the digits that carry no information (noise) makes the
+        outputs compress much better and write faster. The mode and value
+        are recorded in the attributes "precision_mode" and
+        "precision_value" of the data variable.
 
-        self._sett_nc_calendar = calendar
-        self._sett_nc_units = units
+        Parameters
+        ----------
+        mode : str or None
+            One of the values in the class variable
+            _sett_nc_precision_modes. None means lossless.
+        value : int or float or None
+            Depends on mode. For "lsd", the number of decimal digits to
+            keep after the decimal point e.g. 1 for 0.1 mm (netCDF4's
+            least_significant_digit). For "BitGroom" and
+            "GranularBitRound", the number of significant decimal digits
+            to keep e.g. 3. For "BitRound", the number of significant bits
+            of the mantissa to keep. For "keep_info", the fraction of the
+            real information to keep, greater than zero and less than or
+            equal to one e.g. 0.99. The bits are computed from a sample of
+            the bands then. None if mode is None.
+        '''
+
+        _check_nc_precision(mode, value)
+
+        self._sett_nc_precision_mode = mode
+        self._sett_nc_precision_value = value
+        return
+
+    def set_nc_crds_transform(self, cache_dir=None, n_threads=1):
+
+        '''
+        Set how the cell corners are transformed to the coordinate system
+        of the output netCDF4. Optional. The defaults are the ones shown.
+
+        Parameters
+        ----------
+        cache_dir : str or Path or None
+            A directory to keep the transformed cell corners in, one file
+            for each grid and coordinate system. They are then transformed
+            only once for all the conversions, in all the processes, that
+            use the same grid and coordinate system. Must exist. If None,
+            they are kept in the memory of the process only.
+        n_threads : int
+            The number of threads that transform the cell corners, a
+            block of rows each.
+        '''
+
+        cache_dir = _check_nc_crds_transform(cache_dir, n_threads)
+
+        self._sett_nc_crds_cache_dir = cache_dir
+        self._sett_nc_crds_n_threads = n_threads
+        return
+
+    def set_nc_regrid(
+            self,
+            x_crds,
+            y_crds,
+            method='bilinear',
+            n_sub=4,
+            wts_dir=None,
+            n_threads=1):
+
+        '''
+        Regrid the data to a regular grid in the coordinate system of the
+        output netCDF4 (see set_nc_crs), instead of keeping it on the GRIB
+        grid. Optional.
+
+        The remapping weights from the GRIB grid to the target grid are
+        computed once, kept as a sparse matrix and applied to every band
+        in threads. Target cells outside the GRIB grid are NaNs, as are
+        those whose source cells are all NaNs.
+
+        Parameters
+        ----------
+        x_crds : 1D array
+            The X coordinates of the centers of the target cells. Must be
+            regularly spaced, increasing or decreasing.
+        y_crds : 1D array
+            The Y coordinates of the centers of the target cells, same as
+            x_crds.
+        method : str
+            One of the values in the class variable
+            _sett_nc_regrid_methods. "nearest" takes the GRIB cell that
+            has the target cell center. "bilinear" interpolates between
+            the four GRIB cell centers around the target cell center.
+            "conservative" averages the GRIB cells that overlap the
+            target cell, weighted by the overlap area. The areas are
+            approximated by n_sub by n_sub points in each target cell.
+        n_sub : int
+            The number of points along each axis of a target cell, for the
+            conservative method. Ignored by the others.
+        wts_dir : str or Path or None
+            A directory to keep the weights in, one file for each pair of
+            grids, coordinate systems and method. They are then computed
+            only once for all the conversions, in all the processes. Must
+            exist. If None, they are kept in the memory of the process
+            only.
+        n_threads : int
+            The number of threads that apply the weights to a band.
+        '''
+
+        wts_dir = _check_nc_regrid(
+            x_crds, y_crds, method, n_sub, wts_dir, n_threads)
+
+        self._sett_nc_regrid_x_crds = x_crds.astype(np.float64)
+        self._sett_nc_regrid_y_crds = y_crds.astype(np.float64)
+        self._sett_nc_regrid_method = method
+        self._sett_nc_regrid_n_sub = n_sub
+        self._sett_nc_regrid_wts_dir = wts_dir
+        self._sett_nc_regrid_n_threads = n_threads
         return
 
     def verify(self):
@@ -211,3 +388,362 @@ class GTCSettings:
         return
 
     __verify = verify
+
+
+class GTCSettingsArgs:
+
+    '''
+    A base class to validate and record the netCDF4 settings of classes
+    that convert many GRIB files, so that they can be applied to each
+    GTCConvert object that they make.
+
+    The arguments are validated upon entry by the same functions that
+    the methods of GTCSettings use. They are kept as they were passed so
+    that they can be sent to other processes as well.
+
+    This class is supposed to be inherited so some things may no make sense.
+
+    Last updated on: 2026-Oct-19
+    '''
+
+    # The order in which the settings are applied.
+    _gtsa_nc_setters = (
+        'set_nc_crs',
+        'set_nc_time',
+        'set_nc_compression',
+        'set_nc_precision',
+        'set_nc_crds_transform',
+        'set_nc_regrid')
+
+    def __init__(self, verbose=True):
+
+        assert isinstance(verbose, bool)
+
+        self._vb = verbose
+
+        # The arguments of each GTCSettings method that was called.
+        self._gtsa_nc_args = {}
+        return
+
+    def set_nc_settings(self, crs_kind, crs, calendar, units):
+
+        '''
+        Set the settings of the netCDF4 outputs. See GTCSettings.set_nc_crs
+        and GTCSettings.set_nc_time for the parameters.
+        '''
+
+        _check_nc_crs(crs_kind, crs)
+        _check_nc_time(calendar, units)
+
+        self._gtsa_nc_args['set_nc_crs'] = (crs_kind, crs)
+        self._gtsa_nc_args['set_nc_time'] = (calendar, units)
+        return
+
+    def set_nc_compression(
+            self,
+            chunk_shape=None,
+            codec='zlib',
+            comp_level=1,
+            shuffle_flag=False):
+
+        '''
+        Set the chunking and the compression of the outputs. Optional.
+        See GTCSettings.set_nc_compression for the parameters.
+        '''
+
+        _check_nc_compression(chunk_shape, codec, comp_level, shuffle_flag)
+
+        self._gtsa_nc_args['set_nc_compression'] = (
+            chunk_shape, codec, comp_level, shuffle_flag)
+
+        return
+
+    def set_nc_precision(self, mode=None, value=None):
+
+        '''
+        Set the precision of the data variable of the outputs. Optional.
+        See GTCSettings.set_nc_precision for the parameters.
+        '''
+
+        _check_nc_precision(mode, value)
+
+        self._gtsa_nc_args['set_nc_precision'] = (mode, value)
+        return
+
+    def set_nc_crds_transform(self, cache_dir=None, n_threads=1):
+
+        '''
+        Set how the cell corners are transformed. Optional. See
+        GTCSettings.set_nc_crds_transform for the parameters.
+        '''
+
+        _check_nc_crds_transform(cache_dir, n_threads)
+
+        self._gtsa_nc_args['set_nc_crds_transform'] = (cache_dir, n_threads)
+        return
+
+    def set_nc_regrid(
+            self,
+            x_crds,
+            y_crds,
+            method='bilinear',
+            n_sub=4,
+            wts_dir=None,
+            n_threads=1):
+
+        '''
+        Regrid the data to a regular grid. Optional. See
+        GTCSettings.set_nc_regrid for the parameters.
+        '''
+
+        _check_nc_regrid(x_crds, y_crds, method, n_sub, wts_dir, n_threads)
+
+        self._gtsa_nc_args['set_nc_regrid'] = (
+            x_crds, y_crds, method, n_sub, wts_dir, n_threads)
+
+        return
+
+
+def _apply_nc_args(sett_cls, nc_args):
+
+    '''
+    Call the GTCSettings methods of sett_cls with their arguments in
+    nc_args, as recorded by GTCSettingsArgs.
+
+    Supposed to be called internally only, in a separate process as well.
+    '''
+
+    for setter_name in GTCSettingsArgs._gtsa_nc_setters:
+        if setter_name in nc_args:
+            getattr(sett_cls, setter_name)(*nc_args[setter_name])
+
+    return
+
+
+def _check_path_to_nc(path_to_nc):
+
+    '''
+    Validate the path to an output netCDF4. See GTCSettings.set_path_to_nc.
+
+    Supposed to be called internally only.
+
+    Returns
+    -------
+    The path as a Path object.
+    '''
+
+    assert isinstance(path_to_nc, (str, Path)), (
+        f'path_to_nc not of the string or Path data type!')
+
+    path_to_nc = Path(path_to_nc)
+
+    assert path_to_nc.parents[0].exists(), (
+        f'Parent directory of path_to_nc does not exist!')
+
+    return path_to_nc
+
+
+def _check_nc_crs(crs_kind, crs):
+
+    '''
+    Validate a coordinate system. See GTCSettings.set_nc_crs.
+
+    Supposed to be called internally only.
+
+    Returns
+    -------
+    The coordinate system as an osr.SpatialReference object.
+    '''
+
+    crs_kinds = GTCSettings._sett_nc_crs_kinds
+
+    assert isinstance(crs_kind, str), f'crs_kind is not a string!'
+
+    assert crs_kind in crs_kinds, (
+        f'crs_kind is not among the allowed kinds: {crs_kinds}!')
+
+    nc_crs = osr.SpatialReference()
+
+    return_code = getattr(nc_crs, f'ImportFrom{crs_kind}')(crs)
+
+    assert return_code == 0, 'Invalid crs or GDAL is misconfigured!'
+
+    return nc_crs
+
+
+def _check_nc_time(calendar, units):
+
+    '''
+    Validate the time calendar and units. See GTCSettings.set_nc_time.
+
+    Supposed to be called internally only.
+    '''
+
+    calendars = GTCSettings._sett_nc_calendars
+    unitss = GTCSettings._sett_nc_unitss
+
+    assert isinstance(calendar, str), (
+        f'calendar not of the data type string!')
+
+    assert calendar in calendars, (
+        f'calendar not among the valid ones: {calendars}!')
+
+    assert isinstance(units, str), f'units not of the data type string!'
+
+    parse_res = parse.search('{del_t:w} since {time_stamp:ti}', units)
+
+    assert parse_res is not None, 'Unknown format of units!'
+
+    assert parse_res['del_t'] in unitss, (
+        f'Time unit in units not among the allowed ones: {unitss}!')
+
+    assert isinstance(parse_res['time_stamp'], datetime), (
+        f'Parsed reference time not a datetime object as expected!')
+
+    return
+
+
+def _check_nc_compression(chunk_shape, codec, comp_level, shuffle_flag):
+
+    '''
+    Validate the chunking and the compression. See
+    GTCSettings.set_nc_compression.
+
+    Supposed to be called internally only.
+    '''
+
+    codecs = GTCSettings._sett_nc_codecs
+
+    if chunk_shape is not None:
+        assert isinstance(chunk_shape, tuple), f'chunk_shape not a tuple!'
+
+        assert len(chunk_shape) == 3, f'chunk_shape not of length three!'
+
+        assert all([isinstance(val, int) and (val > 0)
+                    for val in chunk_shape]), (
+            f'Values in chunk_shape should be integers greater than '
+            f'zero!')
+
+    assert codec in codecs, f'codec not among the valid ones: {codecs}!'
+
+    assert isinstance(comp_level, int), f'comp_level not an integer!'
+
+    assert 0 <= comp_level <= 9, f'comp_level must be from 0 to 9!'
+
+    assert isinstance(shuffle_flag, bool), (
+        f'shuffle_flag not of the boolean data type!')
+
+    return
+
+
+def _check_nc_precision(mode, value):
+
+    '''
+    Validate the precision. See GTCSettings.set_nc_precision.
+
+    Supposed to be called internally only.
+    '''
+
+    modes = GTCSettings._sett_nc_precision_modes
+
+    assert mode in modes, f'mode not among the valid ones: {modes}!'
+
+    if mode is None:
+        assert value is None, f'value must be None if mode is None!'
+
+    elif mode == 'keep_info':
+        assert isinstance(value, float), f'value not a float!'
+
+        assert 0 < value <= 1, (
+            f'value must be greater than zero and less than or equal '
+            f'to one!')
+
+    elif mode == 'lsd':
+        assert isinstance(value, int), f'value not an integer!'
+
+    else:
+        assert isinstance(value, int), f'value not an integer!'
+
+        assert value > 0, f'value must be greater than zero!'
+
+    return
+
+
+def _check_nc_crds_transform(cache_dir, n_threads):
+
+    '''
+    Validate how the cell corners are transformed. See
+    GTCSettings.set_nc_crds_transform.
+
+    Supposed to be called internally only.
+
+    Returns
+    -------
+    cache_dir as a Path object or None.
+    '''
+
+    if cache_dir is not None:
+        assert isinstance(cache_dir, (str, Path)), (
+            f'cache_dir not of the string or Path data type!')
+
+        cache_dir = Path(cache_dir)
+
+        assert cache_dir.is_dir(), (
+            f'cache_dir does not exist or is not a directory!')
+
+    assert isinstance(n_threads, int), f'n_threads not an integer!'
+
+    assert n_threads > 0, f'n_threads must be greater than zero!'
+
+    return cache_dir
+
+
+def _check_nc_regrid(x_crds, y_crds, method, n_sub, wts_dir, n_threads):
+
+    '''
+    Validate the regridding. See GTCSettings.set_nc_regrid.
+
+    Supposed to be called internally only.
+
+    Returns
+    -------
+    wts_dir as a Path object or None.
+    '''
+
+    methods = GTCSettings._sett_nc_regrid_methods
+
+    for crds, lab in ((x_crds, 'x_crds'), (y_crds, 'y_crds')):
+        assert isinstance(crds, np.ndarray), f'{lab} not a numpy array!'
+
+        assert crds.ndim == 1, f'{lab} not a 1D array!'
+
+        assert crds.size >= 2, f'{lab} must have at least two values!'
+
+        assert np.all(np.isfinite(crds)), f'Invalid values in {lab}!'
+
+        crds_diffs = np.diff(crds)
+
+        assert np.all(crds_diffs != 0) and np.allclose(
+            crds_diffs, crds_diffs[0]), (
+                f'{lab} not regularly spaced!')
+
+    assert method in methods, f'method not among the valid ones: {methods}!'
+
+    assert isinstance(n_sub, int), f'n_sub not an integer!'
+
+    assert n_sub > 0, f'n_sub must be greater than zero!'
+
+    if wts_dir is not None:
+        assert isinstance(wts_dir, (str, Path)), (
+            f'wts_dir not of the string or Path data type!')
+
+        wts_dir = Path(wts_dir)
+
+        assert wts_dir.is_dir(), (
+            f'wts_dir does not exist or is not a directory!')
+
+    assert isinstance(n_threads, int), f'n_threads not an integer!'
+
+    assert n_threads > 0, f'n_threads must be greater than zero!'
+
+    return wts_dir
@@ -0,0 +1,297 @@
+'''
+@author: Faizan3800X-Uni
+
+Oct 19, 2026
+
+9:02:44 PM
+'''
+import io
+import json
+import zlib
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import netCDF4 as nc
+
+from ..misc import print_sl, print_el
+
+# Name and version of the format of the chunked directory stores.
+_store_format = 'fgrib_store'
+_store_format_version = 1
+
+_store_header_name = 'header.json'
+_store_chunks_dir_name = 'chunks'
+
+
+class GTCStore:
+
+    '''
+    Read a chunked directory store written by GTCConvert.convert_to_store.
+
+    Only the chunks that a read touches are read and decompressed, by
+    threads. Reading the time series of a cell or a map of a time step
+    is fast then, if the chunks suit it.
+
+    Format of a store:
+    ------------------
+    1. header.json: The shape, the data type, the chunk shape and the
+    compression level of the data, the name and the attributes of the
+    variable, the fill value of the NoData cells of integer data (if any,
+    NaNs are used otherwise), the GRIB X and Y coordinates of the cell
+    centers ("rX" and "rY") and its coordinate system, the transformed
+    coordinate system, the time units and calendar and the time values.
+
+    2. X.npy and Y.npy: The transformed cell corners as in the netCDF4
+    output of GTCConvert. If the data was regridded, they do not exist
+    and the header has the cell centers of the target grid ("tX" and
+    "tY") and the "regrid_method" instead.
+
+    3. chunks: A file for each chunk, named by its indices along the time,
+    Y and X axes e.g. "12.0.3", holding the chunk as a .npy array that is
+    compressed with zlib.
+
+    How-To-Use
+    ----------
+    Initiate a GTCStore object (store_cls = GTCStore(path_to_store)) and
+    call read_data or any of the get_* methods.
+
+    Last updated on: 2026-Oct-19
+    '''
+
+    def __init__(self, path_to_store, n_threads=1, verbose=True):
+
+        assert isinstance(path_to_store, (str, Path)), (
+            f'path_to_store not of the string or Path data type!')
+
+        path_to_store = Path(path_to_store)
+
+        assert (path_to_store / _store_header_name).exists(), (
+            f'No header in path_to_store. Not a store or not written '
+            f'completely!')
+
+        assert isinstance(n_threads, int), f'n_threads not an integer!'
+
+        assert n_threads > 0, f'n_threads must be greater than zero!'
+
+        assert isinstance(verbose, bool), (
+            f'verbose not of the boolean data type!')
+
+        self._vb = verbose
+
+        with open(path_to_store / _store_header_name, 'r') as json_hdl:
+            header = json.load(json_hdl)
+
+        assert header.get('format') == _store_format, (
+            f'Unknown format of the store!')
+
+        assert header['format_version'] <= _store_format_version, (
+            f'Store written by a newer version '
+            f'({header["format_version"]})!')
+
+        self._gtcs_path_to_store = path_to_store
+        self._gtcs_n_threads = n_threads
+        self._gtcs_header = header
+
+        self._gtcs_shape = tuple(header['shape'])
+        self._gtcs_chunk_shape = tuple(header['chunk_shape'])
+        self._gtcs_dtype = np.dtype(header['dtype'])
+        return
+
+    def get_header(self):
+
+        '''
+        Returns
+        -------
+        A copy of the header of the store as a dictionary.
+        '''
+
+        return json.loads(json.dumps(self._gtcs_header))
+
+    def get_shape(self):
+
+        '''
+        Returns
+        -------
+        The shape of the data i.e. (time, Y, X).
+        '''
+
+        return self._gtcs_shape
+
+    def get_time_stamps(self):
+
+        '''
+        Returns
+        -------
+        A tuple of the time stamps of the time steps, as returned by
+        netCDF4.num2date.
+        '''
+
+        return tuple(nc.num2date(
+            self._gtcs_header['time_values'],
+            units=self._gtcs_header['time_units'],
+            calendar=self._gtcs_header['time_calendar']))
+
+    def get_crnr_crds(self):
+
+        '''
+        Returns
+        -------
+        The transformed cell corners as two 2D arrays, X and Y.
+        '''
+
+        assert 'regrid_method' not in self._gtcs_header, (
+            f'Data of the store was regridded. The cell centers are in '
+            f'the header!')
+
+        return (
+            np.load(self._gtcs_path_to_store / 'X.npy'),
+            np.load(self._gtcs_path_to_store / 'Y.npy'))
+
+    def read_data(self, time_slice=None, row_slice=None, col_slice=None):
+
+        '''
+        Read a block of the data.
+
+        Parameters
+        ----------
+        time_slice, row_slice, col_slice : slice or None
+            The time steps, the rows and the columns to read. The slices
+            should not have steps other than one. None means all.
+
+        Returns
+        -------
+        The block as a 3D array of (time, Y, X).
+        '''
+
+        if self._vb:
+            print_sl()
+
+            print('Reading data from store...')
+
+        begs_ends = []
+        for axis, axis_slice in enumerate((time_slice, row_slice, col_slice)):
+            if axis_slice is None:
+                axis_slice = slice(None)
+
+            assert isinstance(axis_slice, slice), (
+                f'Slices must be of the slice data type or None!')
+
+            beg, end, step = axis_slice.indices(self._gtcs_shape[axis])
+
+            assert step == 1, f'Slices with steps are not supported!'
+
+            begs_ends.append((beg, max(beg, end)))
+
+        data = np.empty(
+            [end - beg for beg, end in begs_ends], dtype=self._gtcs_dtype)
+
+        if not data.size:
+            return data
+
+        read_args = []
+        for chunk_idxs in np.ndindex(*[
+            (((end - 1) // chunk_len) - (beg // chunk_len)) + 1
+            for (beg, end), chunk_len in zip(
+                begs_ends, self._gtcs_chunk_shape)]):
+
+            chunk_idxs = tuple(
+                (beg // chunk_len) + chunk_idx
+                for chunk_idx, (beg, _), chunk_len in zip(
+                    chunk_idxs, begs_ends, self._gtcs_chunk_shape))
+
+            read_args.append(chunk_idxs)
+
+        with ThreadPoolExecutor(
+            max_workers=min(self._gtcs_n_threads, len(read_args))) as pool:
+
+            list(pool.map(
+                lambda chunk_idxs: self._gtcs_read_chunk(
+                    chunk_idxs, begs_ends, data),
+                read_args))
+
+        if self._vb:
+            print(f'Read {len(read_args)} chunks for a block of {data.shape}.')
+
+            print_el()
+
+        return data
+
+    def _gtcs_read_chunk(self, chunk_idxs, begs_ends, data):
+
+        '''
+        Read a chunk and copy the part of it that is in the block of
+        begs_ends to data.
+
+        Supposed to be called internally only.
+        '''
+
+        chunk = _read_store_chunk(self._gtcs_path_to_store, chunk_idxs)
+
+        chunk_slices = []
+        data_slices = []
+        for chunk_idx, (beg, end), chunk_len, axis_len in zip(
+            chunk_idxs, begs_ends, self._gtcs_chunk_shape, self._gtcs_shape):
+
+            chunk_beg = chunk_idx * chunk_len
+
+            ovlp_beg = max(beg, chunk_beg)
+            ovlp_end = min(end, chunk_beg + chunk_len, axis_len)
+
+            chunk_slices.append(
+                slice(ovlp_beg - chunk_beg, ovlp_end - chunk_beg))
+
+            data_slices.append(slice(ovlp_beg - beg, ovlp_end - beg))
+
+        data[tuple(data_slices)] = chunk[tuple(chunk_slices)]
+        return
+
+
+def _get_store_chunk_path(path_to_store, chunk_idxs):
+
+    '''
+    Supposed to be called internally only.
+    '''
+
+    return path_to_store / _store_chunks_dir_name / (
+        '.'.join([str(chunk_idx) for chunk_idx in chunk_idxs]))
+
+
+def _write_store_chunk(args):
+
+    '''
+    Compress a chunk and write it to its file.
+
+    Supposed to be called internally only, in a thread.
+    '''
+
+    path_to_store, chunk_idxs, chunk, comp_level = args
+
+    npy_hdl = io.BytesIO()
+
+    np.lib.format.write_array(
+        npy_hdl, np.ascontiguousarray(chunk), allow_pickle=False)
+
+    with open(_get_store_chunk_path(path_to_store, chunk_idxs), 'wb') as (
+        chunk_hdl):
+
+        chunk_hdl.write(zlib.compress(npy_hdl.getbuffer(), comp_level))
+
+    return
+
+
+def _read_store_chunk(path_to_store, chunk_idxs):
+
+    '''
+    Read a chunk from its file and decompress it.
+
+    Supposed to be called internally only.
+    '''
+
+    with open(_get_store_chunk_path(path_to_store, chunk_idxs), 'rb') as (
+        chunk_hdl):
+
+        npy_bytes = zlib.decompress(chunk_hdl.read())
+
+    return np.lib.format.read_array(
+        io.BytesIO(npy_bytes), allow_pickle=False)
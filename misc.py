@@ -5,9 +5,29 @@ Sep 22, 2021
 
 9:44:18 AM
 '''
+import os
+import time
+import json
+import threading
+import contextlib
+
+try:
+    import fcntl
+
+    msvcrt = None
+
+except ImportError:
+    # On Windows.
+    import msvcrt
+
+    fcntl = None
 
 print_line_str = 40 * '#'
 
+# Time between the attempts to take a lock, on Windows only. Elsewhere,
+# the operating system wakes the waiting process up.
+lock_poll_secs = 0.05
+
 
 def print_sl():
 
@@ -19,3 +39,146 @@ def print_el():
 
     print(print_line_str)
     return
+
+
+def read_manifest(manifest_path):
+
+    '''
+    Read a JSON manifest as a dict. An empty dict is returned if it does
+    not exist.
+    '''
+
+    if not manifest_path.exists():
+        return {}
+
+    with open(manifest_path, 'r') as json_hdl:
+        manifest = json.load(json_hdl)
+
+    return manifest
+
+
+def write_manifest(manifest_path, manifest):
+
+    '''
+    Write a manifest dict as JSON. A temporary file is written first and
+    then renamed so that a crash does not leave a partial manifest. The
+    temporary file is unique to the process and the thread so that
+    concurrent writers do not write to the same one.
+
+    Use lock_manifest around reading, updating and writing a manifest
+    that other processes update as well.
+    '''
+
+    temp_manifest_path = manifest_path.parents[0] / (
+        f'{manifest_path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+
+    try:
+        with open(temp_manifest_path, 'w') as json_hdl:
+            json.dump(manifest, json_hdl, indent=1, sort_keys=True)
+
+        os.replace(temp_manifest_path, manifest_path)
+
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(temp_manifest_path)
+
+    return
+
+
+@contextlib.contextmanager
+def lock_manifest(manifest_path):
+
+    '''
+    A context manager that holds the lock of a manifest, for other
+    threads and processes as well. See lock_file.
+    '''
+
+    with lock_file(
+        manifest_path.parents[0] / f'{manifest_path.name}.lock'):
+
+        yield
+
+    return
+
+
+@contextlib.contextmanager
+def lock_file(lock_path, wait_flag=True):
+
+    '''
+    A context manager that holds an exclusive lock on lock_path, for
+    other threads and processes as well. It yields True if the lock was
+    taken and False if wait_flag is False and the lock is held by someone
+    else.
+
+    The lock is taken by the operating system (flock or, on Windows,
+    locking) on the open file. It is released when the file is closed,
+    also when the process crashes, so that there are no stale locks. The
+    lock file is never removed, since a process could be waiting on it.
+    '''
+
+    lock_fd = os.open(lock_path, os.O_CREAT | os.O_RDWR)
+
+    try:
+        lock_flag = _lock_fd(lock_fd, wait_flag)
+
+        try:
+            yield lock_flag
+
+        finally:
+            if lock_flag:
+                _unlock_fd(lock_fd)
+
+    finally:
+        os.close(lock_fd)
+
+    return
+
+
+def _lock_fd(lock_fd, wait_flag):
+
+    '''
+    Supposed to be called internally only.
+    '''
+
+    if fcntl is not None:
+        flags = fcntl.LOCK_EX
+
+        if not wait_flag:
+            flags |= fcntl.LOCK_NB
+
+        try:
+            fcntl.flock(lock_fd, flags)
+
+        except BlockingIOError:
+            return False
+
+        return True
+
+    while True:
+        try:
+            msvcrt.locking(lock_fd, msvcrt.LK_NBLCK, 1)
+
+            return True
+
+        except OSError:
+            if not wait_flag:
+                return False
+
+        time.sleep(lock_poll_secs)
+
+
+def _unlock_fd(lock_fd):
+
+    '''
+    Supposed to be called internally only.
+    '''
+
+    if fcntl is not None:
+        fcntl.flock(lock_fd, fcntl.LOCK_UN)
+
+    else:
+        os.lseek(lock_fd, 0, os.SEEK_SET)
+
+        msvcrt.locking(lock_fd, msvcrt.LK_UNLCK, 1)
+
+    return
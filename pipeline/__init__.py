@@ -0,0 +1,9 @@
+'''
+@author: Faizan3800X-Uni
+
+Oct 19, 2026
+
+3:12:40 PM
+'''
+
+from .run import GPipeline
@@ -0,0 +1,686 @@
+'''
+@author: Faizan3800X-Uni
+
+Oct 19, 2026
+
+3:14:02 PM
+'''
+import queue
+import timeit
+import threading
+from pathlib import Path
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from ..grib import GDownload, GUnpack
+from ..grib_to_nc import GTCConvert
+from ..grib_to_nc.settings import GTCSettingsArgs, _apply_nc_args
+from ..misc import print_sl, print_el
+
+# A namedtuple object to hold the result of a file in the pipeline.
+# status is one of "done", "skipped" or "failed". stage is the last stage
+# that the file reached i.e. "download", "unpack" or "convert".
+_GPplRes = namedtuple(
+    'GPplRes',
+    ['name',
+     'status',
+     'stage',
+     'secs',
+     'error'])
+
+
+class GPipeline(GTCSettingsArgs):
+
+    '''
+    Download, unpack and convert many GRIB archives with the three stages
+    overlapping in time.
+
+    The stages are connected by bounded queues. Downloads run in threads
+    (GDownload), unpacking and conversion in separate process pools
+    (GUnpack and GTCConvert). A file moves to the next stage as soon as
+    it is done with the previous one. A full queue blocks the previous
+    stage (back-pressure).
+
+    The bytes of the intermediate files (archives and unpacked GRIBs)
+    on the scratch disk can be limited. No new download is started
+    while the limit is exceeded. Intermediate files are deleted as soon
+    as the next stage has consumed them, unless asked not to.
+
+    Files whose netCDF4 output exists already are skipped without any
+    download, unless overwrite_flag is True. The checks of the previous
+    unsuccessful attempts of each stage apply as they are.
+
+    How-To-Use
+    ----------
+    After initiating a GPipeline object (ppl_cls = GPipeline(verbose)),
+    call set_inputs, set_dirs and set_nc_settings. Optionally call
+    set_workers, set_scratch_limit, set_keep_intermediates_flag,
+    set_nc_compression, set_nc_precision, set_nc_crds_transform and
+    set_nc_regrid. Call verify and then run.
+
+    Last updated on: 2026-Oct-19
+    '''
+
+    def __init__(self, verbose=True):
+
+        assert isinstance(verbose, bool), (
+            f'verbose not of the boolean data type!')
+
+        GTCSettingsArgs.__init__(self, verbose)
+
+        self._gppl_url = None
+        self._gppl_names = None
+
+        self._gppl_download_dir = None
+        self._gppl_unpack_dir = None
+        self._gppl_nc_dir = None
+
+        self._gppl_n_download = 4
+        self._gppl_n_unpack = 2
+        self._gppl_n_convert = 2
+
+        self._gppl_scratch_limit = None
+        self._gppl_keep_flag = False
+
+        self._gppl_scratch_used = 0
+        self._gppl_scratch_cond = threading.Condition()
+
+        self._gppl_results = None
+        self._gppl_results_lock = threading.Lock()
+
+        self._gppl_verify_flag = False
+        return
+
+    def set_inputs(self, url, names):
+
+        '''
+        Set the archives to download.
+
+        Parameters
+        ----------
+        url : str
+            The URL where the archives exist. Must end with a "/".
+        names : list or tuple of str
+            Names of the archives at url e.g. from GDownload.get_all_names.
+            Unpacked names are these without the last suffix e.g. ".bz2".
+            netCDF4 names are the unpacked names with the suffix ".nc".
+        '''
+
+        assert isinstance(url, str), f'url not of the data type string!'
+
+        assert len(url), f'Empty url string!'
+
+        assert url[-1] == '/', f'url not ending with a "/"!'
+
+        assert isinstance(names, (list, tuple)), (
+            f'names not of the data type list or tuple!')
+
+        assert len(names), f'Empty names!'
+
+        assert all([isinstance(name, str) and len(name) for name in names]), (
+            f'All names should be non-empty strings!')
+
+        assert len(set(names)) == len(names), f'Duplicate names!'
+
+        self._gppl_url = url
+        self._gppl_names = tuple(names)
+        return
+
+    def set_dirs(self, download_dir, unpack_dir, nc_dir):
+
+        '''
+        Set the directories of the outputs of each stage. All must exist.
+        They can be the same.
+
+        Parameters
+        ----------
+        download_dir : str or Path
+            Directory of the downloaded archives (scratch).
+        unpack_dir : str or Path
+            Directory of the unpacked GRIBs (scratch).
+        nc_dir : str or Path
+            Directory of the output netCDF4 files.
+        '''
+
+        dirs = []
+        for dir_path, lab in (
+            (download_dir, 'download_dir'),
+            (unpack_dir, 'unpack_dir'),
+            (nc_dir, 'nc_dir')):
+
+            assert isinstance(dir_path, (str, Path)), (
+                f'{lab} not of the data type string or Path!')
+
+            dir_path = Path(dir_path)
+
+            assert dir_path.exists(), f'{lab} does not exist!'
+
+            assert dir_path.is_dir(), f'{lab} is not a directory!'
+
+            dirs.append(dir_path)
+
+        self._gppl_download_dir, self._gppl_unpack_dir, self._gppl_nc_dir = (
+            dirs)
+
+        return
+
+    def set_workers(self, n_download=4, n_unpack=2, n_convert=2):
+
+        '''
+        Set the number of workers of each stage.
+
+        Parameters
+        ----------
+        n_download : int
+            Number of threads that download.
+        n_unpack : int
+            Number of processes that unpack.
+        n_convert : int
+            Number of processes that convert.
+        '''
+
+        for n_workers, lab in (
+            (n_download, 'n_download'),
+            (n_unpack, 'n_unpack'),
+            (n_convert, 'n_convert')):
+
+            assert isinstance(n_workers, int), f'{lab} not an integer!'
+
+            assert n_workers > 0, f'{lab} must be greater than zero!'
+
+        self._gppl_n_download = n_download
+        self._gppl_n_unpack = n_unpack
+        self._gppl_n_convert = n_convert
+        return
+
+    def set_scratch_limit(self, max_bytes):
+
+        '''
+        Set the maximum number of bytes of the intermediate files on the
+        scratch disk. A new download is started only when the bytes of
+        the intermediate files that exist are less than this. The actual
+        usage can exceed it by the sizes of the files that are being
+        downloaded or unpacked at a given time.
+
+        Parameters
+        ----------
+        max_bytes : int or None
+            The limit. No limit if None.
+        '''
+
+        if max_bytes is not None:
+            assert isinstance(max_bytes, int), f'max_bytes not an integer!'
+
+            assert max_bytes > 0, f'max_bytes must be greater than zero!'
+
+        self._gppl_scratch_limit = max_bytes
+        return
+
+    def set_keep_intermediates_flag(self, keep_flag):
+
+        '''
+        Set whether to keep the archives and the unpacked GRIBs after
+        the next stage consumed them. False by default.
+
+        Parameters
+        ----------
+        keep_flag : bool
+            Whether to keep the intermediate files.
+        '''
+
+        assert isinstance(keep_flag, bool), (
+            f'keep_flag not of the boolean data type!')
+
+        self._gppl_keep_flag = keep_flag
+        return
+
+    def verify(self):
+
+        '''
+        Verify that all the inputs have been set correctly.
+        '''
+
+        if self._vb:
+            print_sl()
+
+            print('Verifying pipeline inputs...')
+
+        assert self._gppl_names is not None, f'Call set_inputs first!'
+
+        assert self._gppl_nc_dir is not None, f'Call set_dirs first!'
+
+        assert 'set_nc_crs' in self._gtsa_nc_args, (
+            f'Call set_nc_settings first!')
+
+        # Intermediates would never be freed otherwise.
+        assert not (
+            self._gppl_keep_flag and
+            (self._gppl_scratch_limit is not None)), (
+                f'Scratch limit cannot be used with keeping intermediates!')
+
+        self._gppl_verify_flag = True
+
+        if self._vb:
+            print('Pipeline inputs OK.')
+
+            print_el()
+
+        return
+
+    def run(self, overwrite_flag=False):
+
+        '''
+        Run the pipeline. Failures of single files are recorded and do
+        not stop the others.
+
+        Parameters
+        ----------
+        overwrite_flag : bool
+            Whether to overwrite the outputs of all the stages.
+
+        Returns
+        -------
+        A list of namedtuples, one for each name in the same order, with
+        the attributes: name, status ("done", "skipped" or "failed"),
+        stage (the last stage reached: "download", "unpack" or
+        "convert", None if a stage stopped unexpectedly), secs (time
+        from the start of the run till the file was done with) and error
+        (None or the error message).
+        '''
+
+        if self._vb:
+            print_sl()
+
+            print('Running download, unpack and convert pipeline...')
+
+        assert self._gppl_verify_flag, f'Call verify first!'
+
+        assert isinstance(overwrite_flag, bool), (
+            f'overwrite_flag not of the boolean data type!')
+
+        self._gppl_results = {}
+        self._gppl_scratch_used = 0
+
+        beg_time = timeit.default_timer()
+
+        names_q = queue.Queue()
+        for name in self._gppl_names:
+            if (not overwrite_flag) and self._gppl_is_nc_done(name):
+                self._gppl_set_result(
+                    name, 'skipped', 'convert', beg_time, None)
+
+                continue
+
+            names_q.put(name)
+
+        if self._vb:
+            print(
+                f'{len(self._gppl_results)} files skipped, '
+                f'{names_q.qsize()} to process.')
+
+        # Bounded so that a slow stage blocks the one before it.
+        unpack_q = queue.Queue(maxsize=2 * self._gppl_n_unpack)
+        convert_q = queue.Queue(maxsize=2 * self._gppl_n_convert)
+
+        down_cls = GDownload(False)
+
+        unpack_pool = ProcessPoolExecutor(max_workers=self._gppl_n_unpack)
+        convert_pool = ProcessPoolExecutor(max_workers=self._gppl_n_convert)
+
+        with unpack_pool, convert_pool:
+
+            download_thds = self._gppl_start_threads(
+                self._gppl_n_download,
+                self._gppl_download_loop,
+                (names_q, unpack_q, down_cls, overwrite_flag, beg_time))
+
+            unpack_thds = self._gppl_start_threads(
+                self._gppl_n_unpack,
+                self._gppl_unpack_loop,
+                (unpack_q, convert_q, unpack_pool, overwrite_flag, beg_time))
+
+            convert_thds = self._gppl_start_threads(
+                self._gppl_n_convert,
+                self._gppl_convert_loop,
+                (convert_q, convert_pool, overwrite_flag, beg_time))
+
+            for _ in download_thds:
+                names_q.put(None)
+
+            for thd in download_thds:
+                thd.join()
+
+            for _ in unpack_thds:
+                unpack_q.put(None)
+
+            for thd in unpack_thds:
+                thd.join()
+
+            for _ in convert_thds:
+                convert_q.put(None)
+
+            for thd in convert_thds:
+                thd.join()
+
+        # A stage thread that stopped on an unexpected error leaves
+        # no result.
+        results = [
+            self._gppl_results.get(name, _GPplRes(
+                name,
+                'failed',
+                None,
+                timeit.default_timer() - beg_time,
+                'No result. A stage stopped unexpectedly.'))
+            for name in self._gppl_names]
+
+        if self._vb:
+            for res in results:
+                if res.status != 'failed':
+                    continue
+
+                print(
+                    f'WARNING: {res.name} failed at the {res.stage} '
+                    f'stage: {res.error}')
+
+            for status in ('done', 'skipped', 'failed'):
+                print(
+                    f'{status.capitalize()}:',
+                    sum([res.status == status for res in results]))
+
+            print(
+                f'Took {timeit.default_timer() - beg_time:0.1f} seconds.')
+
+            print_el()
+
+        return results
+
+    def _gppl_start_threads(self, n_threads, target, args):
+
+        '''
+        Supposed to be called internally only.
+        '''
+
+        thds = []
+        for _ in range(n_threads):
+            thd = threading.Thread(target=target, args=args, daemon=True)
+            thd.start()
+
+            thds.append(thd)
+
+        return thds
+
+    def _gppl_download_loop(
+            self, names_q, unpack_q, down_cls, overwrite_flag, beg_time):
+
+        '''
+        Download archives until a None is had from names_q.
+
+        Supposed to be called internally only.
+        '''
+
+        while True:
+            name = names_q.get()
+
+            if name is None:
+                break
+
+            self._gppl_wait_for_scratch()
+
+            path_to_archive = self._gppl_download_dir / name
+
+            try:
+                down_cls.download_file(
+                    self._gppl_url,
+                    name,
+                    self._gppl_download_dir,
+                    overwrite_flag)
+
+                archive_n_bytes = path_to_archive.stat().st_size
+
+            except Exception as exc:
+                self._gppl_set_result(
+                    name, 'failed', 'download', beg_time, repr(exc))
+
+                continue
+
+            self._gppl_add_scratch(archive_n_bytes)
+
+            unpack_q.put((name, path_to_archive, archive_n_bytes))
+
+        return
+
+    def _gppl_unpack_loop(
+            self, unpack_q, convert_q, unpack_pool, overwrite_flag, beg_time):
+
+        '''
+        Unpack archives in unpack_pool until a None is had from unpack_q.
+
+        Supposed to be called internally only.
+        '''
+
+        while True:
+            item = unpack_q.get()
+
+            if item is None:
+                break
+
+            name, path_to_archive, archive_n_bytes = item
+
+            path_to_grib = self._gppl_unpack_dir / (
+                Path(name).with_suffix('').name)
+
+            try:
+                error = unpack_pool.submit(
+                    _unpack_file,
+                    (path_to_archive, path_to_grib, overwrite_flag)).result()
+
+                if error is None:
+                    grib_n_bytes = path_to_grib.stat().st_size
+
+            except Exception as exc:
+                error = repr(exc)
+
+            # The archive is not needed anymore, whether it was unpacked
+            # or not.
+            self._gppl_free_scratch(path_to_archive, archive_n_bytes)
+
+            if error is not None:
+                self._gppl_set_result(
+                    name, 'failed', 'unpack', beg_time, error)
+
+                continue
+
+            self._gppl_add_scratch(grib_n_bytes)
+
+            convert_q.put((name, path_to_grib, grib_n_bytes))
+
+        return
+
+    def _gppl_convert_loop(
+            self, convert_q, convert_pool, overwrite_flag, beg_time):
+
+        '''
+        Convert GRIBs in convert_pool until a None is had from convert_q.
+
+        Supposed to be called internally only.
+        '''
+
+        while True:
+            item = convert_q.get()
+
+            if item is None:
+                break
+
+            name, path_to_grib, grib_n_bytes = item
+
+            path_to_nc = self._gppl_get_nc_path(name)
+
+            try:
+                error = convert_pool.submit(
+                    _convert_file,
+                    (path_to_grib,
+                     path_to_nc,
+                     self._gtsa_nc_args,
+                     overwrite_flag)).result()
+
+            except Exception as exc:
+                error = repr(exc)
+
+            self._gppl_free_scratch(path_to_grib, grib_n_bytes)
+
+            if error is not None:
+                self._gppl_set_result(
+                    name, 'failed', 'convert', beg_time, error)
+
+                continue
+
+            self._gppl_set_result(name, 'done', 'convert', beg_time, None)
+
+        return
+
+    def _gppl_get_nc_path(self, name):
+
+        '''
+        Supposed to be called internally only.
+        '''
+
+        return self._gppl_nc_dir / (
+            Path(name).with_suffix('').with_suffix('.nc').name)
+
+    def _gppl_is_nc_done(self, name):
+
+        '''
+        Check if the netCDF4 output of an archive exists and its previous
+        conversion was not unsuccessful.
+
+        Supposed to be called internally only.
+        '''
+
+        path_to_nc = self._gppl_get_nc_path(name)
+
+        temp_file_path = path_to_nc.parents[0] / f'{path_to_nc.name}.tmp'
+
+        return path_to_nc.exists() and (not temp_file_path.exists())
+
+    def _gppl_set_result(self, name, status, stage, beg_time, error):
+
+        '''
+        Supposed to be called internally only.
+        '''
+
+        with self._gppl_results_lock:
+            self._gppl_results[name] = _GPplRes(
+                name,
+                status,
+                stage,
+                timeit.default_timer() - beg_time,
+                error)
+
+        return
+
+    def _gppl_wait_for_scratch(self):
+
+        '''
+        Wait till the bytes of the intermediate files are less than
+        the scratch limit.
+
+        Supposed to be called internally only.
+        '''
+
+        if self._gppl_scratch_limit is None:
+            return
+
+        with self._gppl_scratch_cond:
+            self._gppl_scratch_cond.wait_for(
+                lambda: self._gppl_scratch_used < self._gppl_scratch_limit)
+
+        return
+
+    def _gppl_add_scratch(self, n_bytes):
+
+        '''
+        Supposed to be called internally only.
+        '''
+
+        with self._gppl_scratch_cond:
+            self._gppl_scratch_used += n_bytes
+
+            self._gppl_scratch_cond.notify_all()
+
+        return
+
+    def _gppl_free_scratch(self, path_to_file, n_bytes):
+
+        '''
+        Free the n_bytes of an intermediate file in the scratch budget and
+        delete it, if intermediates are not kept. The bytes are freed even
+        if deleting fails so that the downloads never wait forever.
+
+        Supposed to be called internally only.
+        '''
+
+        if not self._gppl_keep_flag:
+            try:
+                path_to_file.unlink()
+
+            except OSError:
+                pass
+
+        self._gppl_add_scratch(-n_bytes)
+        return
+
+
+def _unpack_file(args):
+
+    '''
+    Unpack an archive. The error message is returned if it fails,
+    None otherwise.
+
+    Supposed to be called internally only, in a separate process.
+    '''
+
+    path_to_archive, path_to_grib, overwrite_flag = args
+
+    try:
+        GUnpack(False).unpack(
+            path_to_archive, path_to_grib, overwrite_flag, 1, None)
+
+    except Exception as exc:
+        return repr(exc)
+
+    return None
+
+
+def _convert_file(args):
+
+    '''
+    Convert a GRIB to netCDF4. The error message is returned if it fails,
+    None otherwise.
+
+    Supposed to be called internally only, in a separate process.
+    '''
+
+    path_to_grib, path_to_nc, nc_args, overwrite_flag = args
+
+    try:
+        cnvt_cls = GTCConvert(False)
+
+        cnvt_cls.set_path_to_grib(path_to_grib)
+
+        cnvt_cls.set_path_to_nc(path_to_nc)
+
+        _apply_nc_args(cnvt_cls, nc_args)
+
+        cnvt_cls.verify()
+
+        # Bands are decoded and written one at a time.
+        cnvt_cls.read_grib(data_flag=False)
+
+        cnvt_cls.convert_to_nc(overwrite_flag)
+
+        cnvt_cls.close_grib()
+
+    except Exception as exc:
+        return repr(exc)
+
+    return None
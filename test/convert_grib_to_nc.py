@@ -45,10 +45,12 @@ def main():
 
     cnvt_cls.verify()
 
-    cnvt_cls.read_grib()
-    cnvt_cls.close_grib()
+    # Bands are decoded and written one at a time.
+    cnvt_cls.read_grib(data_flag=False)
 
     cnvt_cls.convert_to_nc(overwrite_flag)
+
+    cnvt_cls.close_grib()
     return
 
 
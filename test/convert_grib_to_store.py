@@ -0,0 +1,105 @@
+'''
+@author: Faizan-Uni-Stuttgart
+
+Oct 19, 2026
+
+9:31:26 PM
+
+'''
+import os
+import sys
+import time
+import timeit
+import traceback as tb
+from pathlib import Path
+
+from fgrib import GTCConvert, GTCStore
+
+DEBUG_FLAG = False
+
+
+def main():
+
+    main_dir = Path(r'P:\Downloads')
+    os.chdir(main_dir)
+
+    path_to_grib = Path(r'TOT_PRECIP.2D.199501.grb')
+    path_to_store = Path(r'TOT_PRECIP.2D.199501.store')
+
+    nc_crs_kind = 'EPSG'
+    nc_crs = 4326
+
+    nc_calendar = 'gregorian'
+    nc_units = 'hours since 1995-01-01 00:00:00.0'
+
+    # Time series of small tiles.
+    chunk_shape = (744, 64, 64)
+    comp_level = 1
+
+    n_threads = 8
+
+    overwrite_flag = False
+    #==========================================================================
+
+    cnvt_cls = GTCConvert(True)
+
+    cnvt_cls.set_path_to_grib(path_to_grib)
+
+    # Not written to. The settings of the netCDF4 apply to the store too.
+    cnvt_cls.set_path_to_nc(path_to_store.with_suffix('.nc'))
+    cnvt_cls.set_nc_crs(nc_crs_kind, nc_crs)
+    cnvt_cls.set_nc_time(nc_calendar, nc_units)
+
+    cnvt_cls.verify()
+
+    cnvt_cls.read_grib(data_flag=False)
+
+    cnvt_cls.convert_to_store(
+        path_to_store, chunk_shape, comp_level, n_threads, overwrite_flag)
+
+    cnvt_cls.close_grib()
+    #==========================================================================
+
+    store_cls = GTCStore(path_to_store, n_threads)
+
+    # Time series of a single cell. Only the chunks of a tile are read.
+    data = store_cls.read_data(None, slice(100, 101), slice(200, 201))
+
+    print(data.shape, data.ravel()[:24])
+    return
+
+
+if __name__ == '__main__':
+    print('#### Started on %s ####\n' % time.asctime())
+    START = timeit.default_timer()
+
+    #==========================================================================
+    # When in post_mortem:
+    # 1. "where" to show the stack
+    # 2. "up" move the stack up to an older frame
+    # 3. "down" move the stack down to a newer frame
+    # 4. "interact" start an interactive interpreter
+    #==========================================================================
+
+    if DEBUG_FLAG:
+        try:
+            main()
+
+        except:
+            pre_stack = tb.format_stack()[:-1]
+
+            err_tb = list(tb.TracebackException(*sys.exc_info()).format())
+
+            lines = [err_tb[0]] + pre_stack + err_tb[2:]
+
+            for line in lines:
+                print(line, file=sys.stderr, end='')
+
+            import pdb
+            pdb.post_mortem()
+    else:
+        main()
+
+    STOP = timeit.default_timer()
+    print(('\n#### Done with everything on %s.\nTotal run time was'
+           ' about %0.4f seconds ####' % (time.asctime(), STOP - START)))
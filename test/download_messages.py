@@ -0,0 +1,92 @@
+'''
+@author: Faizan-Uni-Stuttgart
+
+Oct 19, 2026
+
+5:12:48 PM
+
+'''
+import os
+import sys
+import time
+import timeit
+import traceback as tb
+from pathlib import Path
+
+from fgrib import GDownload
+
+DEBUG_FLAG = False
+
+
+def main():
+
+    main_dir = Path(r'P:\Downloads')
+    os.chdir(main_dir)
+
+    grib_url = r'https://noaa-gfs-bdp-pds.s3.amazonaws.com/gfs.20260101/00/atmos/'
+
+    grib_name = 'gfs.t00z.pgrb2.0p25.f006'
+
+    desc_patts = ['*:TMP:2 m above ground:*', '*:APCP:surface:*']
+
+    out_name = 'gfs.t00z.pgrb2.0p25.f006.sel.grb2'
+
+    overwrite_flag = False
+
+    out_dir = main_dir
+    #==========================================================================
+
+    out_dir.mkdir(exist_ok=True)
+
+    down_cls = GDownload()
+
+    msgs = down_cls.get_remote_inventory(grib_url, grib_name)
+
+    for msg in msgs[:10]:
+        print(msg.index, msg.offset, msg.length, msg.desc)
+
+    down_cls.download_messages(
+        grib_url,
+        grib_name,
+        out_dir,
+        desc_patts=desc_patts,
+        out_name=out_name,
+        overwrite_flag=overwrite_flag)
+
+    return
+
+
+if __name__ == '__main__':
+    print('#### Started on %s ####\n' % time.asctime())
+    START = timeit.default_timer()
+
+    #==========================================================================
+    # When in post_mortem:
+    # 1. "where" to show the stack
+    # 2. "up" move the stack up to an older frame
+    # 3. "down" move the stack down to a newer frame
+    # 4. "interact" start an interactive interpreter
+    #==========================================================================
+
+    if DEBUG_FLAG:
+        try:
+            main()
+
+        except:
+            pre_stack = tb.format_stack()[:-1]
+
+            err_tb = list(tb.TracebackException(*sys.exc_info()).format())
+
+            lines = [err_tb[0]] + pre_stack + err_tb[2:]
+
+            for line in lines:
+                print(line, file=sys.stderr, end='')
+
+            import pdb
+            pdb.post_mortem()
+    else:
+        main()
+
+    STOP = timeit.default_timer()
+    print(('\n#### Done with everything on %s.\nTotal run time was'
+           ' about %0.4f seconds ####' % (time.asctime(), STOP - START)))
@@ -0,0 +1,162 @@
+'''
+@author: Faizan-Uni-Stuttgart
+
+Oct 19, 2026
+
+6:20:37 PM
+
+'''
+import os
+import sys
+import time
+import timeit
+import random
+import threading
+import traceback as tb
+import http.server
+from pathlib import Path
+
+from fgrib import GDownload, GTransferCtrl
+
+DEBUG_FLAG = False
+
+
+class ThrottlingHandler(http.server.SimpleHTTPRequestHandler):
+
+    '''
+    Serve files from the current directory like a throttling server.
+    Too many parallel requests get a 429 with a Retry-After. Some others
+    get a 503 or are cut short.
+    '''
+
+    max_conns = 3
+    n_active = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+
+        with ThrottlingHandler.lock:
+            ThrottlingHandler.n_active += 1
+            n_active = ThrottlingHandler.n_active
+
+        try:
+            if n_active > self.max_conns:
+                self.send_response(429)
+                self.send_header('Retry-After', '1')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            elif random.random() < 0.1:
+                self.send_error(503)
+
+            else:
+                # Slow, so that the requests overlap.
+                time.sleep(0.2)
+
+                super().do_GET()
+
+        finally:
+            with ThrottlingHandler.lock:
+                ThrottlingHandler.n_active -= 1
+
+        return
+
+    def log_message(self, *args):
+
+        return
+
+
+def main():
+
+    main_dir = Path(r'P:\Downloads')
+    os.chdir(main_dir)
+
+    n_files = 32
+
+    file_size = 2 * 1024 ** 2
+
+    max_conns = 8
+
+    max_bytes_per_sec = 50 * 1024 ** 2
+
+    srv_dir = main_dir / 'throttled_server'
+
+    out_dir = main_dir / 'throttled_downloads'
+    #==========================================================================
+
+    srv_dir.mkdir(exist_ok=True)
+    out_dir.mkdir(exist_ok=True)
+
+    names = []
+    for i in range(n_files):
+        name = f'file_{i:03d}.bin'
+
+        with open(srv_dir / name, 'wb') as srv_hdl:
+            srv_hdl.write(os.urandom(file_size))
+
+        names.append(name)
+
+    os.chdir(srv_dir)
+
+    server = http.server.ThreadingHTTPServer(
+        ('127.0.0.1', 0), ThrottlingHandler)
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    url = f'http://127.0.0.1:{server.server_port}/'
+
+    ctrl_cls = GTransferCtrl(
+        max_conns=max_conns,
+        backoff_base_secs=0.5,
+        backoff_max_secs=8.0,
+        max_bytes_per_sec=max_bytes_per_sec)
+
+    down_cls = GDownload()
+
+    down_cls.set_transfer_ctrl(ctrl_cls)
+
+    results = down_cls.download_many(url, names, out_dir, True)
+
+    server.shutdown()
+
+    for res in results:
+        print(res.name, res.status, res.n_bytes, f'{res.secs:0.2f}')
+
+    print('Final number of connections:', ctrl_cls.get_n_conns())
+    return
+
+
+if __name__ == '__main__':
+    print('#### Started on %s ####\n' % time.asctime())
+    START = timeit.default_timer()
+
+    #==========================================================================
+    # When in post_mortem:
+    # 1. "where" to show the stack
+    # 2. "up" move the stack up to an older frame
+    # 3. "down" move the stack down to a newer frame
+    # 4. "interact" start an interactive interpreter
+    #==========================================================================
+
+    if DEBUG_FLAG:
+        try:
+            main()
+
+        except:
+            pre_stack = tb.format_stack()[:-1]
+
+            err_tb = list(tb.TracebackException(*sys.exc_info()).format())
+
+            lines = [err_tb[0]] + pre_stack + err_tb[2:]
+
+            for line in lines:
+                print(line, file=sys.stderr, end='')
+
+            import pdb
+            pdb.post_mortem()
+    else:
+        main()
+
+    STOP = timeit.default_timer()
+    print(('\n#### Done with everything on %s.\nTotal run time was'
+           ' about %0.4f seconds ####' % (time.asctime(), STOP - START)))
@@ -0,0 +1,90 @@
+'''
+@author: Faizan-Uni-Stuttgart
+
+Oct 19, 2026
+
+8:40:52 PM
+
+'''
+import os
+import sys
+import time
+import timeit
+import traceback as tb
+from pathlib import Path
+
+from fgrib import GTCMerge
+
+DEBUG_FLAG = False
+
+
+def main():
+
+    main_dir = Path(r'P:\Downloads')
+    os.chdir(main_dir)
+
+    inputs = r'TOT_PRECIP.2D.*.grb'
+
+    path_to_nc = main_dir / 'TOT_PRECIP.2D.nc'
+
+    nc_crs_kind = 'EPSG'
+    nc_crs = 4326
+
+    nc_calendar = 'gregorian'
+    nc_units = 'hours since 1995-01-01 00:00:00.0'
+
+    overwrite_flag = False
+
+    dups_mode = 'skip'
+    #==========================================================================
+
+    merge_cls = GTCMerge(True)
+
+    merge_cls.set_inputs(inputs)
+    merge_cls.set_path_to_nc(path_to_nc)
+    merge_cls.set_nc_settings(nc_crs_kind, nc_crs, nc_calendar, nc_units)
+
+    merge_cls.verify()
+
+    merge_res = merge_cls.merge(overwrite_flag, dups_mode)
+
+    for time_stamp in merge_res.missing_time_stamps:
+        print('Missing:', time_stamp)
+
+    return
+
+
+if __name__ == '__main__':
+    print('#### Started on %s ####\n' % time.asctime())
+    START = timeit.default_timer()
+
+    #==========================================================================
+    # When in post_mortem:
+    # 1. "where" to show the stack
+    # 2. "up" move the stack up to an older frame
+    # 3. "down" move the stack down to a newer frame
+    # 4. "interact" start an interactive interpreter
+    #==========================================================================
+
+    if DEBUG_FLAG:
+        try:
+            main()
+
+        except:
+            pre_stack = tb.format_stack()[:-1]
+
+            err_tb = list(tb.TracebackException(*sys.exc_info()).format())
+
+            lines = [err_tb[0]] + pre_stack + err_tb[2:]
+
+            for line in lines:
+                print(line, file=sys.stderr, end='')
+
+            import pdb
+            pdb.post_mortem()
+    else:
+        main()
+
+    STOP = timeit.default_timer()
+    print(('\n#### Done with everything on %s.\nTotal run time was'
+           ' about %0.4f seconds ####' % (time.asctime(), STOP - START)))
@@ -32,6 +32,9 @@ def main():
 
     grib_cls.verify()
 
+    grib_cls.scan_grib()
+    grib_cls.get_messages_grib()
+
     grib_cls.read_grib()
     grib_cls.close_grib()
 
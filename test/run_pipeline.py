@@ -0,0 +1,106 @@
+'''
+@author: Faizan-Uni-Stuttgart
+
+Oct 19, 2026
+
+3:58:13 PM
+
+'''
+import os
+import sys
+import time
+import timeit
+import traceback as tb
+from pathlib import Path
+
+from fgrib import GDownload, GPipeline
+
+DEBUG_FLAG = False
+
+
+def main():
+
+    main_dir = Path(r'P:\Downloads')
+    os.chdir(main_dir)
+
+    grib_url = r'https://opendata.dwd.de/climate_environment/REA/COSMO_REA6/hourly/2D/TOT_PRECIP/'
+
+    ext = '.bz2'
+
+    download_dir = main_dir / 'scratch'
+    unpack_dir = main_dir / 'scratch'
+    nc_dir = main_dir / 'nc'
+
+    nc_crs_kind = 'EPSG'
+    nc_crs = 4326
+
+    nc_calendar = 'gregorian'
+    nc_units = 'hours since 1995-01-01 00:00:00.0'
+
+    n_download = 4
+    n_unpack = 4
+    n_convert = 2
+
+    scratch_limit = 20 * 1024 ** 3
+
+    overwrite_flag = False
+    #==========================================================================
+
+    download_dir.mkdir(exist_ok=True)
+    unpack_dir.mkdir(exist_ok=True)
+    nc_dir.mkdir(exist_ok=True)
+
+    grib_names = GDownload().get_all_names(grib_url, ext)
+
+    ppl_cls = GPipeline(True)
+
+    ppl_cls.set_inputs(grib_url, grib_names)
+    ppl_cls.set_dirs(download_dir, unpack_dir, nc_dir)
+    ppl_cls.set_nc_settings(nc_crs_kind, nc_crs, nc_calendar, nc_units)
+    ppl_cls.set_workers(n_download, n_unpack, n_convert)
+    ppl_cls.set_scratch_limit(scratch_limit)
+
+    ppl_cls.verify()
+
+    results = ppl_cls.run(overwrite_flag)
+
+    for res in results:
+        print(res.name, res.status, res.stage, res.secs)
+
+    return
+
+
+if __name__ == '__main__':
+    print('#### Started on %s ####\n' % time.asctime())
+    START = timeit.default_timer()
+
+    #==========================================================================
+    # When in post_mortem:
+    # 1. "where" to show the stack
+    # 2. "up" move the stack up to an older frame
+    # 3. "down" move the stack down to a newer frame
+    # 4. "interact" start an interactive interpreter
+    #==========================================================================
+
+    if DEBUG_FLAG:
+        try:
+            main()
+
+        except:
+            pre_stack = tb.format_stack()[:-1]
+
+            err_tb = list(tb.TracebackException(*sys.exc_info()).format())
+
+            lines = [err_tb[0]] + pre_stack + err_tb[2:]
+
+            for line in lines:
+                print(line, file=sys.stderr, end='')
+
+            import pdb
+            pdb.post_mortem()
+    else:
+        main()
+
+    STOP = timeit.default_timer()
+    print(('\n#### Done with everything on %s.\nTotal run time was'
+           ' about %0.4f seconds ####' % (time.asctime(), STOP - START)))